@@ -0,0 +1,64 @@
+"""
+Latency per reserve update of ArbitrageGraph on a large pool graph against a full scan of cycles
+"""
+import random
+import time
+
+from pytoniq_defi import ArbitrageGraph, ConstantProductPool, DedustAsset, PoolSync
+
+from .common import addresses
+
+ASSETS = 300
+POOLS = 3000
+UPDATES = 5000
+
+
+def graph(seed: int = 1) -> ArbitrageGraph:
+    """
+    Pools between random assets priced from one price per asset, so graph has no cycles until reserves move
+    """
+    generator = random.Random(seed)
+    assets = [DedustAsset.native()] + [DedustAsset.from_address(address) for address in addresses(ASSETS - 1, seed)]
+    prices = [10 ** generator.uniform(-3, 3) for _ in assets]
+    result = ArbitrageGraph(max_hops=3, base_assets=assets[:1])
+    for n, pool in enumerate(addresses(POOLS, seed + 1)):
+        # every 3rd pool is against base asset, pairs may have several pools as on different DEXes
+        i, j = (0, generator.randrange(1, ASSETS)) if n % 3 == 0 else generator.sample(range(1, ASSETS), 2)
+        reserve = generator.randrange(10 ** 12, 10 ** 14)
+        model = ConstantProductPool(reserve, int(reserve * prices[i] / prices[j]), 30, (assets[i], assets[j]))
+        result.add_pool(pool, model)
+    return result
+
+
+def main():
+    generator = random.Random(2)
+    start = time.perf_counter()
+    arbitrage = graph()
+    print(f'{len(arbitrage):,} pools, {ASSETS:,} assets, {len(arbitrage.cycles):,} cycles through base asset, '
+          f'built in {time.perf_counter() - start:.2f} s')
+    pools = list(arbitrage.pools)
+    updates = []
+    for _ in range(UPDATES):
+        pool = generator.choice(pools)
+        model = arbitrage.pools[pool]
+        updates.append((pool, PoolSync(model.reserve0, int(model.reserve1 * generator.uniform(0.97, 1.03)))))
+
+    latencies = []
+    found = 0
+    for pool, body in updates:
+        start = time.perf_counter()
+        found += len(arbitrage.apply(pool, body))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    cycles = sum(len(arbitrage.pool_cycles[pool]) for pool, _ in updates) / UPDATES
+    print(f'update: {cycles:,.0f} cycles per pool on average, {found:,} opportunities found')
+    for label, value in (('mean', sum(latencies) / UPDATES), ('p50', latencies[UPDATES // 2]),
+                         ('p99', latencies[UPDATES * 99 // 100]), ('max', latencies[-1])):
+        print(f'latency per reserve update {label:<29} {value * 1e6:>14,.0f} us')
+    start = time.perf_counter()
+    arbitrage.scan()
+    print(f'{"full scan of all cycles":<56} {(time.perf_counter() - start) * 1e6:>14,.0f} us')
+
+
+if __name__ == '__main__':
+    main()
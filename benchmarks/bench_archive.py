@@ -0,0 +1,53 @@
+"""
+Columnar archive against JSON lines of to_dict(): size, write and scan of amount and destination columns
+"""
+import collections
+import json
+
+from pytoniq_defi import ArchiveReader, ArchiveWriter, JettonTransfer
+
+from .common import measure, jetton_transfers
+
+COUNT = 50000
+
+
+def main():
+    messages = jetton_transfers(COUNT)
+
+    def write_json() -> bytes:
+        return '\n'.join(json.dumps(message.to_dict(amounts_as_str=True)) for message in messages).encode()
+
+    def write_archive() -> bytes:
+        writer = ArchiveWriter()
+        writer.extend(messages)
+        return writer.to_bytes()
+
+    lines = write_json()
+    archive = write_archive()
+    print(f'{COUNT:,} transfers: JSON lines {len(lines):,} bytes, archive {len(archive):,} bytes, '
+          f'{len(lines) / len(archive):.1f}x smaller')
+    measure('write JSON lines', write_json, COUNT, repeat=1)
+    measure('write archive', write_archive, COUNT, repeat=1)
+
+    def scan_json():
+        amounts = 0
+        destinations = collections.Counter()
+        for line in lines.splitlines():
+            row = json.loads(line)
+            amounts += int(row['amount'])
+            destinations[row['destination']] += 1
+        return amounts, destinations
+
+    def scan_archive():
+        reader = ArchiveReader(archive)
+        amounts = int(reader.column(JettonTransfer, 'amount').sum())
+        destinations = collections.Counter(reader.column(JettonTransfer, 'destination').tolist())
+        return amounts, destinations
+
+    assert scan_json()[0] == scan_archive()[0]
+    measure('scan JSON lines: sum of amount, count per destination', scan_json, COUNT)
+    measure('scan archive: sum of amount, count per destination', scan_archive, COUNT)
+
+
+if __name__ == '__main__':
+    main()
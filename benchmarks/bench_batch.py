@@ -0,0 +1,33 @@
+"""
+Multi-root batch BoC against per message BoCs: size, encode and decode throughput
+"""
+from pytoniq_core import Cell
+
+from pytoniq_defi import MessageBatchWriter, deserialize_batch, deserialize_body
+
+from .common import measure, jetton_transfers
+
+COUNT = 5000
+
+
+def main():
+    messages = jetton_transfers(COUNT)
+    cells = [message.serialize() for message in messages]
+    bocs = [cell.to_boc() for cell in cells]
+    batch = MessageBatchWriter().extend(cells).to_boc()
+    print(f'size: per message BoCs {sum(map(len, bocs)):,} bytes, batch {len(batch):,} bytes')
+    measure('encode per message BoCs', lambda: [cell.to_boc() for cell in cells], COUNT)
+    measure('encode batch', lambda: MessageBatchWriter().extend(cells).to_boc(), COUNT)
+    measure('decode per message BoCs', lambda: [deserialize_body(Cell.one_from_boc(boc).begin_parse()) for boc in bocs],
+            COUNT)
+    measure('decode batch', lambda: list(deserialize_batch(batch)), COUNT)
+
+    def touch_one_percent():
+        reader = deserialize_batch(batch)
+        return [reader[i] for i in range(0, COUNT, 100)]
+
+    measure('open batch, decode 1% of messages', touch_one_percent, COUNT)
+
+
+if __name__ == '__main__':
+    main()
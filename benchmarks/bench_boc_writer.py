@@ -0,0 +1,38 @@
+"""
+Direct BoC writing of outgoing messages against serialize().to_boc()
+"""
+from pytoniq_defi import (DedustMessageSwap, DedustSwapParams, DedustSwapStep, DedustSwapStepParams, JettonBurn,
+                          StonfiMessageSwap, SwapKind)
+
+from .common import measure, addresses, jetton_transfers
+
+COUNT = 5000
+
+
+def dedust_swaps(count: int) -> list:
+    pool = addresses(100)
+    result = []
+    for i in range(count):
+        last = DedustSwapStep(pool[(i + 1) % 100], DedustSwapStepParams(SwapKind.given_in, i, None))
+        step = DedustSwapStep(pool[i % 100], DedustSwapStepParams(SwapKind.given_in, 0, last))
+        result.append(DedustMessageSwap(i, 10 ** 9 + i, step, DedustSwapParams(1700000000 + i, pool[i % 7], None)))
+    return result
+
+
+def main():
+    pool = addresses(100)
+    cases = (
+        ('JettonTransfer', jetton_transfers(COUNT)),
+        ('JettonBurn', [JettonBurn(i, i + 1, pool[i % 100]) for i in range(COUNT)]),
+        ('StonfiMessageSwap', [StonfiMessageSwap(pool[i % 100], i, pool[i % 13]) for i in range(COUNT)]),
+        ('DedustMessageSwap, two hops', dedust_swaps(COUNT)),
+    )
+    for label, messages in cases:
+        assert all(message.to_boc() == message.serialize().to_boc() for message in messages[:100])
+        measure(f'{label}: serialize().to_boc()', lambda: [message.serialize().to_boc() for message in messages],
+                COUNT)
+        measure(f'{label}: to_boc()', lambda: [message.to_boc() for message in messages], COUNT)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Column extraction of jetton bodies against decoding message objects and reading their fields
+"""
+from pytoniq_core import Cell
+
+from pytoniq_defi import JettonTransfer, JettonTransferNotification, WalletIndex, deserialize_body, extract_columns
+
+from .common import measure, jetton_transfers, jetton_notifications
+
+COUNT = 20_000
+
+
+def main():
+    for cls, messages, address in ((JettonTransfer, jetton_transfers(COUNT), 'destination'),
+                                   (JettonTransferNotification, jetton_notifications(COUNT), 'sender')):
+        bocs = [message.serialize().to_boc() for message in messages]
+        cells = [Cell.one_from_boc(boc) for boc in bocs]
+
+        def objects():
+            index = WalletIndex()
+            rows = [deserialize_body(cell.begin_parse()) for cell in cells]
+            return ([message.query_id for message in rows], [message.amount for message in rows],
+                    [index.intern(getattr(message, address)) for message in rows])
+
+        columns = extract_columns(bocs, cls)
+        assert columns.valid.all() and columns['amount'].tolist() == [message.amount for message in messages]
+        assert [columns.address(address, row) for row in range(COUNT)] == [getattr(m, address) for m in messages]
+        name = cls.__name__
+        measure(f'{name}: decode objects, read fields', objects, COUNT)
+        measure(f'{name}: extract_columns of cells', lambda: extract_columns(cells, cls), COUNT)
+        measure(f'{name}: extract_columns of BoCs', lambda: extract_columns(bocs, cls), COUNT)
+
+
+if __name__ == '__main__':
+    main()
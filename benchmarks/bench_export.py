@@ -0,0 +1,24 @@
+"""
+to_dict / JSON lines export rows per second on a large batch
+"""
+import io
+
+from pytoniq_defi import get_exporter, write_jsonl
+
+from .common import measure, jetton_transfers
+
+COUNT = 20_000
+
+
+def main():
+    messages = jetton_transfers(COUNT)
+    for address_format in ('raw', 'non_bounceable'):
+        exporter = get_exporter(address_format, decode_payloads=False)
+        measure(f'to_dict, {address_format} addresses', lambda: [exporter.to_dict(m) for m in messages], COUNT)
+    exporter = get_exporter(amounts_as_str=True)
+    measure('to_dict, amounts as str, decoded payloads', lambda: [exporter.to_dict(m) for m in messages], COUNT)
+    measure('write_jsonl', lambda: write_jsonl(messages, io.StringIO()), COUNT)
+
+
+if __name__ == '__main__':
+    main()
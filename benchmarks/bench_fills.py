@@ -0,0 +1,69 @@
+"""
+Ston.fi v2 fill tracking on a synthetic trace stream: swap transfers to router, pay_to results, unrelated messages
+"""
+import random
+
+from pytoniq_defi import JettonComment, JettonTransfer, StonfiV2FillTracker, StonfiV2MessagePayTo, StonfiV2MessageSwap
+from pytoniq_defi.transaction import DecodedMessage, TransactionRecord
+
+from .common import measure, addresses
+
+COUNT = 20000
+IN_FLIGHT = 500  # swaps between a swap and its pay_to
+SWAP_OK = 0xc64370e5
+
+
+def trace_stream(count: int, seed: int = 1) -> list:
+    """
+    Transactions of count swaps: router receives the swap transfer, pool sends pay_to, router receives pay_to.
+    pay_to arrives IN_FLIGHT swaps later, every 4th transaction is an unrelated comment transfer.
+    """
+    generator = random.Random(seed)
+    users = addresses(1000, seed)
+    router, pool = addresses(2, seed + 1)
+    comment = JettonComment('deposit').serialize()
+
+    def record(now, account, source, body, out_bodies=()):
+        in_msg = DecodedMessage(source, account, 10 ** 8, False, now, body.op, body, None)
+        out_msgs = [DecodedMessage(account, router, 10 ** 8, False, now, item.op, item, None) for item in out_bodies]
+        return TransactionRecord(account, now, now, b'', in_msg, out_msgs)
+
+    records = []
+    for i in range(count + IN_FLIGHT):
+        now = 1700000000 + i
+        if i < count:
+            user = generator.choice(users)
+            payload = StonfiV2MessageSwap(user, user, user, now + 600, 5, user).serialize()
+            records.append(record(now, router, user, JettonTransfer(i, generator.randrange(1, 10 ** 12), router,
+                                                                    user, None, 1, payload)))
+        if i >= IN_FLIGHT:
+            query_id = i - IN_FLIGHT
+            user = generator.choice(users)
+            result = StonfiV2MessagePayTo(query_id, user, user, user, SWAP_OK, None, 1, generator.randrange(10 ** 9),
+                                          user, 0, None)
+            records.append(record(now, pool, router, JettonComment('x'), [result]))  # pool sends pay_to
+            records.append(record(now, router, pool, result))
+        if i % 4 == 0:
+            user = generator.choice(users)
+            records.append(record(now, user, user, JettonTransfer(i, 1, router, user, None, 0, comment)))
+    return records
+
+
+def main():
+    records = trace_stream(COUNT)
+
+    def track():
+        tracker = StonfiV2FillTracker()
+        fills = []
+        for record in records:
+            fills += tracker.process_transaction(record)
+        assert len(fills) == COUNT and all(fill.filled for fill in fills)
+        return fills
+
+    print(f'{len(records):,} transactions, {COUNT:,} swaps')
+    measure('process_transaction, transactions', track, len(records))
+    measure('process_transaction, fills', track, COUNT)
+
+
+if __name__ == '__main__':
+    main()
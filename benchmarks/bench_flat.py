@@ -0,0 +1,27 @@
+"""
+Flat decoder of single cell payload BoCs against Cell.one_from_boc and generic deserialization
+"""
+from pytoniq_core import Cell
+
+from pytoniq_defi import deserialize_body
+from pytoniq_defi.flat import decode_boc, decode_flat
+
+from .common import measure, jetton_transfers, jetton_notifications
+
+COUNT = 5000
+
+
+def main():
+    for label, messages in (('transfers', jetton_transfers(COUNT)), ('notifications', jetton_notifications(COUNT))):
+        bocs = [message.serialize().to_boc() for message in messages]
+        assert all(decode_flat(boc) is not None for boc in bocs)
+        measure(f'{label}: one_from_boc + deserialize_body',
+                lambda: [deserialize_body(Cell.one_from_boc(boc).begin_parse()) for boc in bocs], COUNT)
+        measure(f'{label}: decode_flat', lambda: [decode_flat(boc) for boc in bocs], COUNT)
+        measure(f'{label}: decode_flat, crc verified', lambda: [decode_flat(boc, verify_crc=True) for boc in bocs],
+                COUNT)
+        measure(f'{label}: decode_boc', lambda: [decode_boc(boc) for boc in bocs], COUNT)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Dedup of a high duplication stream of message BoCs: frozen messages in a set against hashing mutable messages
+"""
+import random
+
+from pytoniq_defi import JettonTransfer, freeze
+
+from .common import measure, jetton_transfers
+
+COUNT = 100_000
+DISTINCT = 1000
+
+
+def main():
+    generator = random.Random(1)
+    distinct = [message.to_boc() for message in jetton_transfers(DISTINCT)]
+    bocs = [generator.choice(distinct) for _ in range(COUNT)]
+    frozen_class = type(freeze(JettonTransfer()))
+
+    def mutable_by_hash():
+        unique = {}
+        for boc in bocs:
+            message = JettonTransfer.from_bytes(boc)
+            unique.setdefault(message.serialize().hash, message)
+        return unique
+
+    def frozen_decoded():
+        return {frozen_class.from_bytes(boc) for boc in bocs}
+
+    def frozen_lazy():
+        # pickled form: hash is read from BoC, duplicates are never decoded
+        return {frozen_class.from_wire(boc) for boc in bocs}
+
+    frozen = [frozen_class.from_bytes(boc) for boc in bocs]
+
+    assert len(mutable_by_hash()) == len(frozen_decoded()) == len(frozen_lazy()) == len(set(frozen)) == DISTINCT
+    print(f'{COUNT:,} messages, {DISTINCT:,} distinct')
+    measure('decode, serialize().hash as dict key', mutable_by_hash, COUNT, repeat=1)
+    measure('decode frozen, set', frozen_decoded, COUNT, repeat=1)
+    measure('lazy frozen from wire, set', frozen_lazy, COUNT)
+    measure('set of frozen messages with cached hashes', lambda: set(frozen), COUNT)
+
+
+if __name__ == '__main__':
+    main()
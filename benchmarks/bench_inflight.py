@@ -0,0 +1,48 @@
+"""
+In-flight tracker at 100k entries: track, match and timer wheel expiry
+"""
+import random
+
+from pytoniq_defi import InflightTracker, QueryIdAllocator
+
+from .common import measure
+
+ENTRIES = 100_000
+NOW = 1_700_000_000
+
+
+def main():
+    allocator = QueryIdAllocator()
+    query_ids = [allocator() for _ in range(ENTRIES)]
+    generator = random.Random(1)
+    deadlines = [NOW + generator.randrange(1, 600) for _ in range(ENTRIES)]
+    measure('allocate query_id', lambda: [allocator() for _ in range(ENTRIES)], ENTRIES)
+
+    def track():
+        tracker = InflightTracker(now=NOW)
+        for query_id, deadline in zip(query_ids, deadlines):
+            tracker.track(query_id, None, deadline)
+        return tracker
+
+    measure(f'track {ENTRIES:,}', track, ENTRIES)
+    matched = query_ids[::2]
+
+    def match_half():
+        tracker = track()
+        match = tracker.match
+        for query_id in matched:
+            match(query_id)
+
+    measure('track + match half', match_half, ENTRIES + len(matched))
+
+    def expire():
+        tracker = track()
+        for second in range(NOW + 1, NOW + 601):
+            tracker.advance(second)
+        assert not tracker.entries
+
+    measure('track + expire all, advance every second', expire, ENTRIES)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Jetton ledger at millions of wallets: interning, applying messages, memory per wallet, snapshot and mmap restore.
+Wallet count is the first argument, e.g. python -m benchmarks.bench_ledger 20000000 (default 1,000,000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from pytoniq_core import Address
+
+from pytoniq_defi import JettonComment, JettonInternalTransfer, JettonLedger, JettonTransfer
+from pytoniq_defi.transaction import DecodedMessage
+
+from .common import measure
+
+WALLETS = 1_000_000
+MESSAGES = 200_000
+
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    result = function()
+    print(f'{label:<56} {(time.perf_counter() - start) * 1e3:>10.2f} ms')
+    return result
+
+
+def main():
+    wallets = int(sys.argv[1]) if len(sys.argv) > 1 else WALLETS
+    generator = random.Random(1)
+    hashes = [generator.randbytes(32) for _ in range(wallets)]
+
+    ledger = JettonLedger()
+    intern = ledger.index.intern_raw
+    measure(f'intern {wallets:,} wallets', lambda: [intern(0, hash_part) for hash_part in hashes], wallets, repeat=1)
+    ledger.add(Address((0, hashes[-1])), 0)  # grows balance arrays to index capacity
+
+    owner = Address((0, bytes(32)))
+    comment = JettonComment('x').serialize()
+    messages = []
+    for i in range(MESSAGES):
+        wallet = Address((0, hashes[generator.randrange(wallets)]))
+        body = (JettonInternalTransfer(i, generator.randrange(10 ** 9), owner, None, 0, comment) if i % 3
+                else JettonTransfer(i, generator.randrange(10 ** 6), owner, None, None, 0, comment))
+        messages.append(DecodedMessage(owner, wallet, 10 ** 8, False, i, body.op, body, None))
+    measure('apply messages to existing wallets', lambda: [ledger.process(message) for message in messages],
+            MESSAGES, repeat=1)
+
+    index = ledger.index
+    size = sum(array.nbytes for array in (index.wc, index.hashes, index.table, ledger.balances, ledger.query_ids))
+    print(f'arrays: {size / 2 ** 20:,.1f} MiB, {size / len(ledger):.1f} bytes per wallet (with unused capacity)')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ledger.bin')
+        timed('snapshot', lambda: ledger.snapshot(path))
+        print(f'snapshot file: {os.path.getsize(path) / 2 ** 20:,.1f} MiB')
+        restored = timed('restore (mmap)', lambda: JettonLedger.restore(path))
+        wallet = messages[0].dest
+        timed('restore + balance of one wallet', lambda: JettonLedger.restore(path).balance(wallet))
+        assert restored.balance(wallet) == ledger.balance(wallet)
+        del restored
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Deposit memo matching on notification cells against decoding notifications and comments
+"""
+import random
+
+from pytoniq_core import Address
+
+from pytoniq_defi import JettonComment, JettonTransferNotification, MemoMatcher, deserialize_body
+
+from .common import measure
+
+COUNT = 20_000
+MEMOS = 100_000
+
+
+def main():
+    generator = random.Random(1)
+    memos = [f'user-{i:08d}' for i in range(MEMOS)]
+    sender = Address((0, bytes(32)))
+    texts = []
+    for i in range(COUNT):
+        if i % 20 == 0:
+            texts.append(generator.choice(memos))  # 5% deposits
+        elif i % 20 == 1:
+            texts.append('x' * 200)  # snake comment split across refs
+        else:
+            texts.append(f'other-{i}')
+    cells = [JettonTransferNotification(i, 10 ** 9, sender, JettonComment(text).serialize()).serialize()
+             for i, text in enumerate(texts)]
+    matcher = MemoMatcher(memos)
+    memo_set = set(memos)
+
+    def decode_all():
+        result = []
+        for cell in cells:
+            payload = deserialize_body(cell.begin_parse()).forward_payload
+            text = JettonComment.deserialize(payload.copy()).comment if payload is not None else None
+            result.append(text if text in memo_set else None)
+        return result
+
+    assert decode_all() == matcher.match_many(cells)
+    measure('decode notification and comment', decode_all, COUNT, repeat=1)
+    measure('MemoMatcher.match_many', lambda: matcher.match_many(cells), COUNT)
+    measure('MemoMatcher.find', lambda: matcher.find(cells), COUNT)
+
+
+if __name__ == '__main__':
+    main()
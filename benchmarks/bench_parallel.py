@@ -0,0 +1,26 @@
+"""
+Thread-parallel decoding with 1..N threads. Threads scale only on free-threaded builds (python3.13t -X gil=0),
+run this script with both interpreters to compare.
+"""
+import os
+import sys
+
+from pytoniq_defi import ParallelDecoder, is_free_threaded
+
+from .common import measure, jetton_transfers
+
+COUNT = 20_000
+
+
+def main():
+    bocs = [message.to_boc() for message in jetton_transfers(COUNT)]
+    print(f'python {sys.version.split()[0]}, free-threaded: {is_free_threaded()}, cpus: {os.cpu_count()}')
+    threads = 1
+    while threads <= max(os.cpu_count() or 1, 2):
+        with ParallelDecoder(threads) as decoder:
+            measure(f'decode, {threads} threads', lambda: decoder.decode(bocs), COUNT)
+        threads *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Compact pickling of decoded messages (BoC wire form) against default object pickling, in process and over a pipe
+"""
+import copyreg
+import io
+import multiprocessing
+import pickle
+
+from pytoniq_defi import DefiTlbScheme, JettonTransfer
+
+from .common import measure, jetton_transfers
+
+COUNT = 20_000
+
+
+class DefaultPickler(pickle.Pickler):
+    """
+    Pickles messages as plain objects (class and __dict__), as if they had no __reduce__
+    """
+    def reducer_override(self, obj):
+        if isinstance(obj, DefiTlbScheme):
+            return copyreg.__newobj__, (type(obj),), obj.__dict__
+        return NotImplemented
+
+
+def default_dumps(value) -> bytes:
+    buffer = io.BytesIO()
+    DefaultPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(value)
+    return buffer.getvalue()
+
+
+def _receive(connection):
+    # unpickles batches and reads one field of every message, as a worker would
+    while True:
+        data = connection.recv_bytes()
+        if not data:
+            return
+        connection.send(sum(message.amount for message in pickle.loads(data)))
+
+
+def main():
+    # decoded from wire, so messages don't share Address and Cell objects
+    messages = [JettonTransfer.from_bytes(message.to_boc()) for message in jetton_transfers(COUNT)]
+    compact = pickle.dumps(messages, pickle.HIGHEST_PROTOCOL)
+    default = default_dumps(messages)
+    print(f'size: default {len(default):,} bytes, compact {len(compact):,} bytes')
+    measure('dumps default', lambda: default_dumps(messages), COUNT)
+    measure('dumps compact', lambda: pickle.dumps(messages, pickle.HIGHEST_PROTOCOL), COUNT)
+    measure('loads default', lambda: pickle.loads(default), COUNT)
+    measure('loads compact (lazy)', lambda: pickle.loads(compact), COUNT)
+    measure('loads compact + read field', lambda: [m.amount for m in pickle.loads(compact)], COUNT)
+
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_receive, args=(child,), daemon=True)
+    process.start()
+    try:
+        for label, dumps in (('default', default_dumps), ('compact', lambda v: pickle.dumps(v, pickle.HIGHEST_PROTOCOL))):
+            def round_trip():
+                parent.send_bytes(dumps(messages))
+                return parent.recv()
+            measure(f'pipe to worker, {label}', round_trip, COUNT)
+    finally:
+        parent.send_bytes(b'')
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
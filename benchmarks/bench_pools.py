@@ -0,0 +1,35 @@
+"""
+Dedust pool index lookups by (pool_type, asset0, asset1) in any asset order
+"""
+import random
+
+from pytoniq_defi import DedustAsset, DedustPoolIndex, DedustPoolParams, DedustPoolType
+
+from .common import measure
+
+POOLS = 100_000
+LOOKUPS = 200_000
+
+
+def main():
+    assets = [DedustAsset.native()] + [DedustAsset(type=1, workchain_id=0, address=i) for i in range(1, 20_000)]
+    generator = random.Random(1)
+    index = DedustPoolIndex()
+    params = []
+    while len(index) < POOLS:
+        asset0, asset1 = generator.sample(assets, 2)
+        pool_params = DedustPoolParams(generator.choice(list(DedustPoolType)), asset0, asset1)
+        index[pool_params] = len(params)
+        params.append(pool_params)
+    queries = [generator.choice(params) for _ in range(LOOKUPS)]
+    # fresh equal assets, as decoded from messages
+    fresh = [(p.pool_type.value, DedustAsset(type=p.asset1.type, workchain_id=p.asset1.workchain_id,
+                                             address=p.asset1.address), p.asset0) for p in queries]
+    get = index.get
+    measure(f'get, swapped assets ({POOLS:,} pools)', lambda: [get(t, a1, a0) for t, a1, a0 in fresh], LOOKUPS)
+    measure('__getitem__ by pool params', lambda: [index[p] for p in queries], LOOKUPS)
+    measure('intern pool params', lambda: [DedustPoolParams.intern(p) for p in queries], LOOKUPS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Price aggregator at thousands of pools: trade ingestion, default window queries, memory per pool
+"""
+import random
+
+from pytoniq_defi import PriceAggregator
+
+from .common import measure
+
+POOLS = 5000
+TRADES = 200000
+CAPACITY = 256
+
+
+def trades(count: int, pools: int, seed: int = 1) -> list:
+    generator = random.Random(seed)
+    return [(generator.randrange(pools), 1700000000 + i // 10, generator.randrange(1, 10 ** 12),
+             generator.randrange(1, 10 ** 12)) for i in range(count)]
+
+
+def main():
+    stream = trades(TRADES, POOLS)
+
+    def ingest():
+        prices = PriceAggregator(window=300, capacity=CAPACITY)
+        for key, timestamp, amount_in, amount_out in stream:
+            prices.add(key, timestamp, amount_in, amount_out)
+        return prices
+
+    def ingest_and_query():
+        prices = PriceAggregator(window=300, capacity=CAPACITY)
+        for key, timestamp, amount_in, amount_out in stream:
+            prices.add(key, timestamp, amount_in, amount_out)
+            prices.vwap(key)
+            prices.twap(key)
+            prices.volume(key)
+        return prices
+
+    print(f'{POOLS:,} pools, {TRADES:,} trades')
+    measure('add', ingest, TRADES)
+    measure('add + vwap, twap, volume of pool, default window', ingest_and_query, TRADES)
+    prices = ingest()
+    now = 1700000000 + TRADES // 10
+    measure('vwap of every pool, default window', lambda: prices.vwaps(now=now), POOLS)
+    measure('vwap of every pool, 60 s window', lambda: prices.vwaps(window=60, now=now), POOLS)
+    series = next(iter(prices.series.values()))
+    # arrays are preallocated, size per pool doesn't depend on number of trades; amount ints are not counted
+    print(f'arrays per pool: {(series.data.nbytes + series.amounts.nbytes) / 1024:,.1f} KiB, '
+          f'{len(prices):,} pools: {len(prices) * (series.data.nbytes + series.amounts.nbytes) / 2 ** 20:,.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
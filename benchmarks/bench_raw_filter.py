@@ -0,0 +1,40 @@
+"""
+Raw bits predicates on a mix where 99% of bodies are dropped, against decoding every body
+"""
+import random
+
+from pytoniq_defi import JettonTransfer, RawFilter, deserialize_body, watched_addresses
+
+from .common import measure, addresses, jetton_transfers
+
+COUNT = 20_000
+
+
+def main():
+    messages = jetton_transfers(COUNT, wallets=100_000)
+    generator = random.Random(2)
+    watched = addresses(10_000, seed=3)
+    for message in generator.sample(messages, COUNT // 100):
+        message.destination = generator.choice(watched)
+    cells = [message.serialize() for message in messages]
+    watched_set = watched_addresses(watched)
+    watched_bloom = watched_addresses(watched, bloom_threshold=0)
+    keys = {address.to_str() for address in watched}
+
+    def decode_all():
+        return [message for message in (deserialize_body(cell.begin_parse()) for cell in cells)
+                if message.destination.to_str() in keys]
+
+    expected = len(decode_all())
+    print(f'{COUNT:,} transfers, {expected:,} to {len(watched):,} watched addresses')
+    measure('decode every body, then filter', decode_all, COUNT, repeat=1)
+    for label, watched_keys in (('set', watched_set), ('Bloom filter', watched_bloom)):
+        raw_filter = RawFilter(ops=[JettonTransfer.op], addresses=watched_keys, address_fields=['destination'])
+        assert len(raw_filter.filter(cells)) >= expected
+        measure(f'raw filter, {label}', lambda: raw_filter.filter(cells), COUNT)
+        measure(f'raw filter, {label}, then decode passed',
+                lambda: [deserialize_body(cell.begin_parse()) for cell in raw_filter.filter(cells)], COUNT)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Replay throughput: Dedust swap events into constant product models on one core, with a strategy, and sharded.
+Sharded runs pay for pickling of event batches, they pay off with at least as many free cores as processes.
+"""
+import os
+import random
+import time
+
+from pytoniq_defi import (ConstantProductPool, DedustAsset, DedustEventSwap, DedustMessageSwap, DedustSwapParams, DedustSwapStep,
+                          DedustSwapStepParams, Order, PoolTrade, ReplayEngine, SwapKind, replay_sharded)
+
+from .common import addresses
+
+POOLS = 1000
+EVENTS = 500000
+TON = DedustAsset.native()
+JETTON = DedustAsset.from_address(addresses(1, seed=2)[0])
+
+
+def events(count: int, pools: list, seed: int = 1) -> list:
+    """
+    Observed pool events in lt order: Dedust swap events with reserves, every 4th one a PoolTrade
+    """
+    generator = random.Random(seed)
+    sender = addresses(1, seed=3)[0]
+    result = []
+    for lt in range(count):
+        pool = pools[generator.randrange(len(pools))]
+        if lt % 4:
+            reserve = generator.randrange(10 ** 12, 10 ** 13)
+            body = DedustEventSwap(TON, JETTON, 10 ** 9, 10 ** 9, sender, None, reserve, reserve + lt)
+        else:
+            body = PoolTrade(generator.randrange(1, 10 ** 9), TON if lt % 3 else JETTON)
+        result.append((lt, pool, body))
+    return result
+
+
+def models(pools: list) -> dict:
+    return {pool: ConstantProductPool(10 ** 12, 10 ** 12, 30, (TON, JETTON)) for pool in pools}
+
+
+def strategy(engine: ReplayEngine, lt: int, pool, body):
+    # buys jetton for TON on every 100th event
+    if lt % 100 == 0:
+        step = DedustSwapStep(pool, DedustSwapStepParams(SwapKind.given_in, 1, None))
+        return [Order(DedustMessageSwap(lt, 10 ** 8, step, DedustSwapParams()))]
+    return None
+
+
+def strategy_factory():
+    return strategy
+
+
+def run(label: str, function, count: int, repeat: int = 3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    assert result.events == count
+    print(f'{label:<56} {count / best * 60:>14,.0f} events/min {best * 1e3:>10.2f} ms')
+
+
+def main():
+    pools = addresses(POOLS)
+    stream = events(EVENTS, pools)
+    print(f'{POOLS:,} pools, {EVENTS:,} events, {os.cpu_count()} CPUs')
+    run('one process, no strategy', lambda: ReplayEngine(models(pools)).run(stream), EVENTS)
+    run('one process, strategy, fills not kept',
+        lambda: ReplayEngine(models(pools), strategy, keep_fills=False).run(stream), EVENTS)
+    for processes in (2, 4):
+        run(f'{processes} processes, strategy, fills not kept',
+            lambda: replay_sharded(iter(stream), models(pools), strategy_factory, processes, keep_fills=False),
+            EVENTS, repeat=1)
+
+
+if __name__ == '__main__':
+    main()
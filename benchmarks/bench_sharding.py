@@ -0,0 +1,53 @@
+"""
+Scaling of ShardedProcessor(JettonLedger) from 1 to N processes on a stream of jetton messages to wallets
+"""
+import os
+import random
+
+from pytoniq_defi import JettonComment, JettonInternalTransfer, JettonLedger, JettonTransfer, ShardedProcessor
+from pytoniq_defi.transaction import DecodedMessage
+
+from .common import measure, addresses
+
+COUNT = 50000
+WALLETS = 5000
+
+
+def stream(count: int, seed: int = 1) -> list:
+    """
+    Incoming messages of wallets: internal transfers from other wallets and transfers from owners
+    """
+    generator = random.Random(seed)
+    wallets = addresses(WALLETS, seed)
+    owners = addresses(1000, seed + 1)
+    comment = JettonComment('x').serialize()
+    result = []
+    for i in range(count):
+        wallet = generator.choice(wallets)
+        if generator.random() < 0.6:
+            body = JettonInternalTransfer(i, generator.randrange(1, 10 ** 9), generator.choice(owners), None, 0, comment)
+            source = generator.choice(wallets)
+        else:
+            body = JettonTransfer(i, generator.randrange(1, 10 ** 6), generator.choice(owners), None, None, 0, comment)
+            source = generator.choice(owners)
+        result.append(DecodedMessage(source, wallet, 10 ** 8, False, i, body.op, body, None))
+    return result
+
+
+def main():
+    messages = stream(COUNT)
+    print(f'{COUNT:,} messages, {WALLETS:,} wallets, {os.cpu_count()} CPUs')
+
+    def run(processes: int):
+        with ShardedProcessor(JettonLedger, processes=processes) as sharded:
+            sharded.run(messages)
+            sharded.close()
+
+    for processes in (1, 2, 4, 8):
+        if processes > 1 and processes > 2 * (os.cpu_count() or 1):
+            break
+        measure(f'{processes} processes', lambda: run(processes), COUNT, repeat=1)
+
+
+if __name__ == '__main__':
+    main()
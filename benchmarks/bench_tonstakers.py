@@ -0,0 +1,62 @@
+"""
+Tonstakers aggregator on a high volume stream of deposits and tsTON burns over many rounds
+"""
+import json
+import random
+
+from pytoniq_defi import JettonBurn, TonstakersAggregator, TonstakersBurnPayload, TonstakersDeposit
+from pytoniq_defi.transaction import DecodedMessage, TransactionRecord
+
+from .common import measure, addresses
+
+COUNT = 200_000
+ORIGIN = 1_700_000_000
+ROUND = 65536
+
+
+def transactions(count: int, seed: int = 1) -> list:
+    """
+    Deposits to pool and burns to tsTON wallets, a transaction every 3 seconds, burns carry all payload kinds.
+    Bodies are decoded from BoCs as in a live stream, so burn custom payloads are Slices.
+    """
+    generator = random.Random(seed)
+    users = addresses(1000, seed)
+    pool = addresses(1, seed + 1)[0]
+    payloads = [None] + [TonstakersBurnPayload(fill_or_kill, wait_till_round_end).serialize()
+                         for fill_or_kill in (False, True) for wait_till_round_end in (False, True)]
+    result = []
+    for i in range(count):
+        user = generator.choice(users)
+        now = ORIGIN + 3 * i
+        if i % 2:
+            body = TonstakersDeposit(i)
+            account, value = pool, generator.randrange(10 ** 9, 10 ** 13)
+        else:
+            body = JettonBurn(i, generator.randrange(10 ** 9, 10 ** 13), user, generator.choice(payloads))
+            account, value = generator.choice(users), 10 ** 8
+        body = type(body).from_bytes(body.to_boc())
+        in_msg = DecodedMessage(user, account, value, False, i, body.op, body, None)
+        result.append(TransactionRecord(account, i, now, b'', in_msg, []))
+    return result
+
+
+def main():
+    records = transactions(COUNT)
+
+    def aggregate():
+        aggregator = TonstakersAggregator(ORIGIN, ROUND)
+        for record in records:
+            aggregator.apply_transaction(record)
+        return aggregator
+
+    aggregator = aggregate()
+    kinds = {kind for result in aggregator.rounds.values() for kind, count in result.withdrawal_counts.items() if count}
+    print(f'{COUNT:,} transactions, {len(aggregator):,} rounds, withdrawal kinds: {sorted(kinds)}')
+    measure('apply_transaction', aggregate, COUNT)
+    measure('snapshot to JSON', lambda: json.dumps(aggregator.snapshot()), len(aggregator))
+    data = aggregator.snapshot()
+    measure('restore', lambda: TonstakersAggregator.restore(data, ORIGIN, ROUND), len(aggregator))
+
+
+if __name__ == '__main__':
+    main()
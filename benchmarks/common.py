@@ -0,0 +1,48 @@
+"""
+Helpers of benchmarks. Benchmarks are run from repository root, e.g. python -m benchmarks.bench_batch
+"""
+import random
+import time
+import typing
+
+from pytoniq_core import Address
+
+from pytoniq_defi import JettonComment, JettonTransfer, JettonTransferNotification
+
+
+def measure(label: str, function: typing.Callable[[], typing.Any], count: int, repeat: int = 3) -> float:
+    """
+    Best of repeat runs of function processing count items, prints and returns items per second
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    rate = count / best
+    print(f'{label:<56} {rate:>14,.0f} /s {best * 1e3:>10.2f} ms')
+    return rate
+
+
+def addresses(count: int, seed: int = 1) -> typing.List[Address]:
+    generator = random.Random(seed)
+    return [Address((0, generator.randbytes(32))) for _ in range(count)]
+
+
+def jetton_transfers(count: int, wallets: int = 1000, seed: int = 1) -> typing.List[JettonTransfer]:
+    """
+    Transfers between wallets with comment payloads, a few distinct comments as in deposit flows
+    """
+    generator = random.Random(seed)
+    pool = addresses(wallets, seed)
+    comments = [JettonComment(f'deposit {i}').serialize() for i in range(16)]
+    return [JettonTransfer(i, generator.randrange(1, 10 ** 12), generator.choice(pool), generator.choice(pool),
+                           None, 1, generator.choice(comments)) for i in range(count)]
+
+
+def jetton_notifications(count: int, wallets: int = 1000, seed: int = 1) -> typing.List[JettonTransferNotification]:
+    generator = random.Random(seed)
+    pool = addresses(wallets, seed)
+    comments = [JettonComment(f'deposit {i}').serialize() for i in range(16)]
+    return [JettonTransferNotification(i, generator.randrange(1, 10 ** 12), generator.choice(pool),
+                                       generator.choice(comments)) for i in range(count)]
@@ -1 +1,25 @@
 from .defi import *
+from .batch import *
+from .jetton_wallet import *
+from .pools import *
+from .fees import *
+from .inflight import *
+from .export import *
+from .transaction import *
+from .raw_filter import *
+from .parallel import *
+from .memo import *
+from .flat import *
+from .boc_writer import *
+from .reserves import *
+from .fills import *
+from .prices import *
+from .pool_models import *
+from .replay import *
+from .archive import *
+from .sharding import *
+from .ledger import *
+from .tonstakers import *
+from .frozen import *
+from .columns import *
+from .arbitrage import *
@@ -0,0 +1,317 @@
+import math
+import typing
+
+from pytoniq_core import Address
+
+from .defi import (DedustAsset, DedustMessageSwap, DedustJettonPayloadSwap, DedustSwapStep, DedustSwapStepParams,
+                   DedustSwapParams, StonfiV2MessageSwap, ToncoV3Swap, SwapKind)
+from .pool_models import ConstantProductPool, ConcentratedLiquidityPool, Q96
+from .replay import Order
+
+############################################################
+# Arbitrage cycles
+############################################################
+
+DEX_DEDUST = 'dedust'
+DEX_STONFI = 'stonfi'
+DEX_TONCO = 'tonco'
+
+DEXES = (DEX_DEDUST, DEX_STONFI, DEX_TONCO)
+
+
+def _edge(model, zero_for_one: bool) -> typing.Tuple[int, int, int]:
+    # (a, b, c) of swap as map amount_out = a * x / (b + c * x), exact for ConstantProductPool,
+    # for ConcentratedLiquidityPool it is the same map over virtual reserves
+    fee = 10000 - model.fee_bps
+    if isinstance(model, ConstantProductPool):
+        if zero_for_one:
+            reserve_in, reserve_out = model.reserve0, model.reserve1
+        else:
+            reserve_in, reserve_out = model.reserve1, model.reserve0
+    elif isinstance(model, ConcentratedLiquidityPool):
+        sqrt_price = model.sqrt_price_x96
+        if not sqrt_price:
+            return 0, 1, fee
+        reserve0 = model.liquidity * Q96 // sqrt_price
+        reserve1 = model.liquidity * sqrt_price // Q96
+        reserve_in, reserve_out = (reserve0, reserve1) if zero_for_one else (reserve1, reserve0)
+    else:
+        raise ValueError(f"Unsupported pool model: {type(model).__name__}")
+    if reserve_in <= 0 or reserve_out <= 0:
+        return 0, 1, fee
+    return fee * reserve_out, 10000 * reserve_in, fee
+
+
+def _weight(edge: typing.Tuple[int, int, int]) -> float:
+    # log of marginal rate (fee included) at zero amount
+    return math.log(edge[0]) - math.log(edge[1]) if edge[0] else -math.inf
+
+
+class Opportunity:
+    """
+    Profitable cycle quoted exactly by pool models: amounts[0] of assets[0] in,
+    amounts[i + 1] of assets[i + 1] out of pools[i], assets[-1] is assets[0]
+    """
+    __slots__ = ('pools', 'assets', 'amounts')
+
+    def __init__(self, pools: tuple, assets: tuple, amounts: tuple):
+        self.pools = pools
+        self.assets = assets
+        self.amounts = amounts
+
+    @property
+    def amount_in(self) -> int:
+        return self.amounts[0]
+
+    @property
+    def amount_out(self) -> int:
+        return self.amounts[-1]
+
+    @property
+    def profit(self) -> int:
+        return self.amounts[-1] - self.amounts[0]
+
+    def __repr__(self):
+        return (f'<Opportunity {len(self.pools)} hops: {self.amount_in} -> {self.amount_out} '
+                f'profit: {self.profit} of {self.assets[0]}>')
+
+
+class ArbitrageGraph:
+    """
+    Pools (pool_models instances) as edges between their assets (e.g. DedustAsset ids).
+    Cycles of up to max_hops pools are enumerated once, when their last pool is added, and indexed by pool,
+    so update(pool) re-checks only cycles through that pool: a cycle passes if the sum of log marginal
+    rates of its hops (fees included) is positive in either direction, then it is re-quoted with
+    integer model math at the optimal amount and returned if profit exceeds min_profit.
+    With base_assets cycles must contain one of them and start at the first one listed.
+    """
+    def __init__(self,
+                 max_hops: int = 3,
+                 base_assets: typing.Optional[typing.Sequence] = None,
+                 min_profit: int = 0,
+                 max_amount_in: typing.Optional[int] = None
+                 ):
+        if max_hops < 2:
+            raise ValueError(f"Cycles have at least 2 hops, got max_hops {max_hops}")
+        self.max_hops = max_hops
+        self.base_assets = {asset: rank for rank, asset in enumerate(base_assets)} if base_assets is not None else None
+        self.min_profit = min_profit
+        self.max_amount_in = max_amount_in
+        self.pools = {}
+        self.dexes = {}
+        self.router_wallets = {}
+        self.edges = {}  # pool -> (edge zero_for_one, edge one_for_zero)
+        self.weights = {}  # pool -> [weight zero_for_one, weight one_for_zero]
+        self.adjacency = {}  # asset -> {pool: None}
+        self.pairs = {}  # frozenset of assets -> {pool: None}
+        self.cycles = {}  # id -> (pools, directions, assets), direction 0 is zero_for_one
+        self.pool_cycles = {}  # pool -> {cycle id: None}
+        self._next_cycle = 0
+
+    def __len__(self):
+        return len(self.pools)
+
+    def __contains__(self, pool) -> bool:
+        return pool in self.pools
+
+    def add_pool(self, pool, model, dex: str = DEX_DEDUST, router_wallets: typing.Optional[tuple] = None) -> int:
+        """
+        Adds pool, returns number of new cycles through it.
+        router_wallets are router jetton wallets of (asset0, asset1), needed for Ston.fi and Tonco orders
+        """
+        if dex not in DEXES:
+            raise ValueError(f"Unknown dex: {dex}, expected one of {DEXES}")
+        if pool in self.pools:
+            raise ValueError(f"Pool {pool} is already in graph")
+        asset0, asset1 = model.assets
+        if asset0 == asset1:
+            raise ValueError(f"Pool {pool} has the same asset on both sides")
+        self.pools[pool] = model
+        self.dexes[pool] = dex
+        self.router_wallets[pool] = router_wallets
+        self._reweigh(pool)
+        self.pool_cycles[pool] = {}
+        # paths between pool assets without pool are cycles with it, searched from the less connected side
+        source, target = asset0, asset1
+        if len(self.adjacency.get(source, ())) > len(self.adjacency.get(target, ())):
+            source, target = target, source
+        added = 0
+        for path in self._paths(source, target, self.max_hops - 1):
+            pools = tuple(hop[0] for hop in path) + (pool,)
+            assets = (source,) + tuple(hop[1] for hop in path)
+            if self._add_cycle(pools, assets):
+                added += 1
+        self.adjacency.setdefault(asset0, {})[pool] = None
+        self.adjacency.setdefault(asset1, {})[pool] = None
+        self.pairs.setdefault(frozenset((asset0, asset1)), {})[pool] = None
+        return added
+
+    def _paths(self, source, target, depth: int, visited: tuple = ()) -> typing.Iterator[list]:
+        # simple paths [(pool, asset reached), ...] from source to target of at most depth pools
+        for pool in self.pairs.get(frozenset((source, target)), ()):
+            yield [(pool, target)]
+        if depth < 2:
+            return
+        visited = visited + (source,)
+        pools = self.pools
+        for pool in self.adjacency.get(source, ()):
+            asset0, asset1 = pools[pool].assets
+            other = asset1 if asset0 == source else asset0
+            if other == target or other in visited:
+                continue
+            for path in self._paths(other, target, depth - 1, visited):
+                path.insert(0, (pool, other))
+                yield path
+
+    def _add_cycle(self, pools: tuple, assets: tuple) -> bool:
+        # assets[i] is asset in of pools[i]
+        if self.base_assets is not None:
+            ranks = [self.base_assets.get(asset, len(self.base_assets)) for asset in assets]
+            start = min(range(len(ranks)), key=ranks.__getitem__)
+            if ranks[start] == len(self.base_assets):
+                return False
+            pools = pools[start:] + pools[:start]
+            assets = assets[start:] + assets[:start]
+        directions = tuple(0 if self.pools[pool].assets[0] == asset else 1 for pool, asset in zip(pools, assets))
+        cycle_id = self._next_cycle
+        self._next_cycle += 1
+        self.cycles[cycle_id] = (pools, directions, assets)
+        for pool in pools:
+            self.pool_cycles[pool][cycle_id] = None
+        return True
+
+    def remove_pool(self, pool):
+        model = self.pools.pop(pool)
+        for cycle_id in self.pool_cycles.pop(pool):
+            for other in self.cycles.pop(cycle_id)[0]:
+                if other != pool:
+                    del self.pool_cycles[other][cycle_id]
+        for asset in model.assets:
+            del self.adjacency[asset][pool]
+        del self.pairs[frozenset(model.assets)][pool]
+        del self.dexes[pool], self.router_wallets[pool], self.edges[pool], self.weights[pool]
+
+    def _reweigh(self, pool):
+        model = self.pools[pool]
+        edges = self.edges[pool] = (_edge(model, True), _edge(model, False))
+        self.weights[pool] = [_weight(edges[0]), _weight(edges[1])]
+
+    def apply(self, pool, body) -> typing.List[Opportunity]:
+        """
+        Updates pool model from body (see pool_models apply, e.g. PoolSync(reserve0, reserve1) or Dedust event)
+        and returns opportunities of cycles through pool
+        """
+        model = self.pools.get(pool)
+        if model is None or not model.apply(body):
+            return []
+        return self.update(pool)
+
+    def update(self, pool) -> typing.List[Opportunity]:
+        """
+        Re-checks cycles through pool after its model changed
+        """
+        self._reweigh(pool)
+        return self._check(self.pool_cycles[pool])
+
+    def scan(self) -> typing.List[Opportunity]:
+        """
+        Checks all cycles
+        """
+        return self._check(self.cycles)
+
+    def _check(self, cycle_ids: typing.Iterable[int]) -> typing.List[Opportunity]:
+        result = []
+        cycles = self.cycles
+        weights = self.weights
+        for cycle_id in cycle_ids:
+            pools, directions, assets = cycles[cycle_id]
+            forward = reverse = 0.0
+            for pool, direction in zip(pools, directions):
+                pool_weights = weights[pool]
+                forward += pool_weights[direction]
+                reverse += pool_weights[1 - direction]
+            if forward > 0:
+                opportunity = self._quote(pools, directions, assets)
+                if opportunity is not None:
+                    result.append(opportunity)
+            elif reverse > 0:
+                n = len(pools)
+                opportunity = self._quote(pools[::-1], tuple(1 - direction for direction in directions[::-1]),
+                                          (assets[0],) + tuple(assets[n - i] for i in range(1, n)))
+                if opportunity is not None:
+                    result.append(opportunity)
+        return result
+
+    def _quote(self, pools: tuple, directions: tuple, assets: tuple) -> typing.Optional[Opportunity]:
+        # optimal amount of composed map (a * x / (b + c * x)) is (sqrt(a * b) - b) / c, then exact model quote
+        a, b, c = 1, 1, 0
+        for pool, direction in zip(pools, directions):
+            edge_a, edge_b, edge_c = self.edges[pool][direction]
+            a, b, c = a * edge_a, b * edge_b, edge_b * c + edge_c * a
+        if a <= b or not c:
+            return None
+        amount = (math.isqrt(a * b) - b) // c
+        if self.max_amount_in is not None:
+            amount = min(amount, self.max_amount_in)
+        if amount <= 0:
+            return None
+        amounts = [amount]
+        for pool, asset in zip(pools, assets):
+            amount = self.pools[pool].amount_out(amount, asset)
+            amounts.append(amount)
+        if amount - amounts[0] <= self.min_profit:
+            return None
+        return Opportunity(pools, assets + (assets[0],), tuple(amounts))
+
+    def orders(self,
+               opportunity: Opportunity,
+               recipient: typing.Union[Address, str],
+               query_id: int = 0,
+               deadline: int = 0,
+               slippage_bps: int = 0
+               ) -> typing.List[Order]:
+        """
+        Orders executing opportunity hop by hop (see replay.Order): consecutive Dedust pools are one
+        DedustMessageSwap chain (DedustJettonPayloadSwap when it starts with a jetton, pool keys are pool addresses),
+        Ston.fi and Tonco pools are single StonfiV2MessageSwap and ToncoV3Swap swaps.
+        Limits are quoted amounts less slippage_bps, outputs go to recipient.
+        """
+        if isinstance(recipient, str):
+            recipient = Address(recipient)
+        limits = [amount * (10000 - slippage_bps) // 10000 for amount in opportunity.amounts]
+        pools, assets = opportunity.pools, opportunity.assets
+        result = []
+        hop = 0
+        while hop < len(pools):
+            pool = pools[hop]
+            dex = self.dexes[pool]
+            asset_in, amount_in = assets[hop], limits[hop] if hop else opportunity.amount_in
+            if dex == DEX_DEDUST:
+                end = hop
+                while end < len(pools) and self.dexes[pools[end]] == DEX_DEDUST:
+                    end += 1
+                step = None
+                for i in range(end - 1, hop - 1, -1):
+                    step = DedustSwapStep(pools[i], DedustSwapStepParams(SwapKind.given_in, limits[i + 1], step))
+                params = DedustSwapParams(deadline, recipient)
+                if asset_in is None or (isinstance(asset_in, DedustAsset) and asset_in.type == 0):
+                    message = DedustMessageSwap(query_id, amount_in, step, params)
+                else:
+                    message = DedustJettonPayloadSwap(step, params)
+                result.append(Order(message, pool, amount_in, asset_in))
+                hop = end
+                continue
+            wallets = self.router_wallets[pool]
+            if wallets is None:
+                raise ValueError(f"No router wallets of {dex} pool {pool}")
+            zero_for_one = self.pools[pool].is_zero_for_one(asset_in)
+            if dex == DEX_STONFI:
+                message = StonfiV2MessageSwap(token_wallet1=wallets[1] if zero_for_one else wallets[0],
+                                              refund_address=recipient, excesses_address=recipient,
+                                              tx_deadline=deadline, min_out=limits[hop + 1], receiver=recipient)
+            else:
+                message = ToncoV3Swap(query_id, recipient, wallets[0] if zero_for_one else wallets[1],
+                                      amount_in, 0, limits[hop + 1], recipient)
+            result.append(Order(message, pool, amount_in, asset_in))
+            hop += 1
+        return result
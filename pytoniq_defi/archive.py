@@ -0,0 +1,414 @@
+import mmap
+import typing
+from enum import Enum
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, needed only to read columns
+    np = None
+
+from pytoniq_core import TlbScheme
+from pytoniq_core import Cell, Slice, Address
+
+from .export import _fields, _type_name
+
+############################################################
+# Columnar archive
+############################################################
+
+# archive := magic:"PDA1" address_count:varint wc:(address_count * int8) hash:(address_count * bytes32)
+#            block_count:varint block*
+# block   := name:str op:varint rows:varint column_count:varint column*
+# column  := key:str kind:uint8 size:varint payload:(size * bytes)
+# str     := length:varint utf8
+#
+# Blocks hold rows of one message class, columns are fields of the class.
+# Nested schemes of the same class in every row are flattened to "field.subfield" columns,
+# other nested schemes, cells and slices are stored as BoC.
+# Column "@seq" is the position of the row in written stream, so order across blocks can be restored.
+# Context of rows passed to ArchiveWriter.add as extra (e.g. "@src", "@lt" of indexer) is stored as columns too,
+# rows without some extra key are None in its column.
+
+ARCHIVE_MAGIC = b'PDA1'
+
+# column kinds
+_UINT = 1  # varint
+_DELTA = 2  # zigzag varint of difference with previous row, modulo 2 ** 64
+_SINT = 3  # zigzag varint
+_ADDRESS = 4  # varint id in address dictionary, 0 is None
+_STR = 5  # varint length + utf8
+_BOC = 6  # varint length + BoC, 0 length is None
+_NULLABLE = 0x80  # flag: payload starts with presence bitmap (rows bits), values of present rows only
+
+DELTA_FIELDS = frozenset(('query_id', '@seq', '@lt', '@created_lt'))
+
+_MASK64 = (1 << 64) - 1
+
+
+def _write_varint(result: bytearray, value: int):
+    while value > 0x7f:
+        result.append((value & 0x7f) | 0x80)
+        value >>= 7
+    result.append(value)
+
+
+def _read_varint(data, i: int) -> typing.Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, i
+        shift += 7
+
+
+def _write_str(result: bytearray, value: str):
+    value = value.encode()
+    _write_varint(result, len(value))
+    result += value
+
+
+def _read_str(data, i: int) -> typing.Tuple[str, int]:
+    size, i = _read_varint(data, i)
+    return bytes(data[i: i + size]).decode(), i + size
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Slice):
+        return value.to_cell()
+    return value
+
+
+class ArchiveWriter:
+    """
+    Collects decoded messages into op partitioned blocks of up to block_rows rows,
+    addresses of all blocks share one dictionary. See ArchiveReader.
+    """
+    def __init__(self, block_rows: int = 65536):
+        self.block_rows = block_rows
+        self.addresses = {}
+        self.blocks = []
+        self.pending = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, message: TlbScheme, extra: typing.Optional[dict] = None):
+        """
+        Adds message, extra maps column keys to context values of the row (addresses, ints, str or None)
+        """
+        cls = type(message)
+        rows = self.pending.get(cls)
+        if rows is None:
+            rows = self.pending[cls] = []
+        rows.append((self.count, message, extra))
+        self.count += 1
+        if len(rows) >= self.block_rows:
+            self._flush(cls)
+
+    def extend(self, messages: typing.Iterable[TlbScheme]) -> int:
+        add = self.add
+        count = 0
+        for message in messages:
+            add(message)
+            count += 1
+        return count
+
+    def _flush(self, cls):
+        rows = self.pending.pop(cls)
+        block = bytearray()
+        _write_str(block, _type_name(cls))
+        _write_varint(block, getattr(cls, 'op', None) or 0)
+        _write_varint(block, len(rows))
+        columns = [('@seq', [seq for seq, _, _ in rows])]
+        keys = {}
+        for _, _, extra in rows:
+            if extra:
+                keys.update(dict.fromkeys(extra))
+        for key in keys:
+            columns.append((key, [extra.get(key) if extra else None for _, _, extra in rows]))
+        self._collect(cls, [message for _, message, _ in rows], '', columns)
+        _write_varint(block, len(columns))
+        for key, values in columns:
+            _write_str(block, key)
+            kind, payload = self._encode(key, values)
+            block.append(kind)
+            _write_varint(block, len(payload))
+            block += payload
+        self.blocks.append(bytes(block))
+
+    def _collect(self, cls, messages: list, prefix: str, columns: list):
+        for key, attribute in _fields(cls):
+            values = [_plain(getattr(message, attribute)) for message in messages]
+            nested = type(values[0]) if values else None
+            if (nested is not None and issubclass(nested, TlbScheme)
+                    and all(type(value) is nested for value in values)):
+                self._collect(nested, values, prefix + key + '.', columns)
+            else:
+                columns.append((prefix + key, values))
+
+    def _address_id(self, address: Address) -> int:
+        address_id = self.addresses.get(address)
+        if address_id is None:
+            address_id = self.addresses[address] = len(self.addresses) + 1
+        return address_id
+
+    def _encode(self, key: str, values: list) -> typing.Tuple[int, bytearray]:
+        payload = bytearray()
+        present = [value for value in values if value is not None]
+        types = {type(value) for value in present}
+        if present and types <= {Address}:
+            address_id = self._address_id
+            for value in values:
+                _write_varint(payload, 0 if value is None else address_id(value))
+            return _ADDRESS, payload
+        if present and all(isinstance(value, (Cell, TlbScheme)) for value in present):
+            for value in values:
+                if value is None:
+                    payload.append(0)
+                    continue
+                boc = (value if isinstance(value, Cell) else value.serialize()).to_boc()
+                _write_varint(payload, len(boc))
+                payload += boc
+            return _BOC, payload
+
+        kind = 0
+        if len(present) < len(values):
+            kind = _NULLABLE
+            bitmap = bytearray((len(values) + 7) // 8)
+            for i, value in enumerate(values):
+                if value is not None:
+                    bitmap[i >> 3] |= 0x80 >> (i & 7)
+            payload += bitmap
+
+        if types <= {int, bool}:
+            if key in DELTA_FIELDS and not kind and all(0 <= value <= _MASK64 for value in present):
+                previous = 0
+                for value in present:
+                    delta = (value - previous) & _MASK64
+                    _write_varint(payload, _zigzag(delta - (1 << 64) if delta >> 63 else delta))
+                    previous = value
+                return _DELTA, payload
+            if all(value >= 0 for value in present):
+                for value in present:
+                    _write_varint(payload, value)
+                return kind | _UINT, payload
+            for value in present:
+                _write_varint(payload, _zigzag(value))
+            return kind | _SINT, payload
+        if types <= {str}:
+            for value in present:
+                _write_str(payload, value)
+            return kind | _STR, payload
+        raise ValueError(f"Can't store column {key} with values of types {types}")
+
+    def to_bytes(self) -> bytes:
+        for cls in list(self.pending):
+            self._flush(cls)
+        result = bytearray(ARCHIVE_MAGIC)
+        _write_varint(result, len(self.addresses))
+        result += bytes(address.wc & 0xff for address in self.addresses)
+        for address in self.addresses:
+            result += address.hash_part
+        _write_varint(result, len(self.blocks))
+        for block in self.blocks:
+            result += block
+        return bytes(result)
+
+    def write(self, fp: typing.BinaryIO) -> int:
+        """
+        Writes archive to binary file, returns number of written messages
+        """
+        fp.write(self.to_bytes())
+        return self.count
+
+
+def write_archive(messages: typing.Iterable[TlbScheme], fp: typing.BinaryIO, block_rows: int = 65536) -> int:
+    """
+    Writes messages as columnar archive, returns number of written messages
+    """
+    writer = ArchiveWriter(block_rows)
+    writer.extend(messages)
+    return writer.write(fp)
+
+
+def _decode_varints(data, count: int) -> "np.ndarray":
+    # vectorized varint decoding into uint64, object array if some value doesn't fit 64 bits
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not count:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(raw < 0x80)
+    if len(ends) != count:
+        raise ValueError(f"Archive column is corrupted: expected {count} values, got {len(ends)}")
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    longest = int(lengths.max())
+    if longest > 10 or (longest == 10 and int(raw[ends[lengths == 10]].max()) > 1):
+        values = []
+        i = 0
+        for _ in range(count):
+            value, i = _read_varint(data, i)
+            values.append(value)
+        return np.array(values, dtype=object)
+    shifts = (np.arange(len(raw)) - np.repeat(starts, lengths)).astype(np.uint64) * np.uint64(7)
+    return np.bitwise_or.reduceat((raw & 0x7f).astype(np.uint64) << shifts, starts)
+
+
+def _unzigzag_array(values: "np.ndarray") -> "np.ndarray":
+    if values.dtype == object:
+        return np.array([_unzigzag(value) for value in values], dtype=object)
+    return ((values >> np.uint64(1)) ^ (np.uint64(0) - (values & np.uint64(1)))).view(np.int64)
+
+
+class ArchiveBlock:
+    """
+    Block of rows of one message class. Columns are decoded on access, payloads stay in archive buffer.
+    """
+    __slots__ = ('name', 'op', 'rows', 'columns', 'reader')
+
+    def __init__(self, name: str, op: int, rows: int, columns: dict, reader: "ArchiveReader"):
+        self.name = name
+        self.op = op
+        self.rows = rows
+        self.columns = columns  # key -> (kind, payload)
+        self.reader = reader
+
+    def __len__(self):
+        return self.rows
+
+    def keys(self) -> typing.List[str]:
+        return list(self.columns)
+
+    def column(self, key: str):
+        """
+        uint64 / int64 array for integer columns (object array if some value doesn't fit 64 bits),
+        masked array if column has None values, uint32 address ids for address columns (0 is None, see ArchiveReader.address),
+        object array of str / BoC bytes (None for absent) for string and cell columns
+        """
+        kind, payload = self.columns[key]
+        rows = self.rows
+        base = kind & ~_NULLABLE
+        mask = None
+        if base in (_ADDRESS, _BOC):
+            count = rows
+        elif kind & _NULLABLE:
+            size = (rows + 7) // 8
+            present = np.unpackbits(np.frombuffer(payload[:size], dtype=np.uint8), count=rows).astype(bool)
+            payload = payload[size:]
+            mask = ~present
+            count = int(present.sum())
+        else:
+            count = rows
+        if base == _ADDRESS:
+            return _decode_varints(payload, count).astype(np.uint32)
+        if base in (_STR, _BOC):
+            values = []
+            i = 0
+            for _ in range(count):
+                size, i = _read_varint(payload, i)
+                value = bytes(payload[i: i + size])
+                i += size
+                values.append(value.decode() if base == _STR else value or None)
+            column = np.array(values + [None], dtype=object)[:-1]  # keeps 1d shape for any values
+        else:
+            column = _decode_varints(payload, count)
+            if base == _SINT:
+                column = _unzigzag_array(column)
+            elif base == _DELTA:
+                column = _unzigzag_array(column)
+                if column.dtype == object:
+                    column = np.array([value & _MASK64 for value in np.cumsum(column)], dtype=object)
+                else:
+                    column = np.cumsum(column.view(np.uint64), dtype=np.uint64)
+        if mask is None:
+            return column
+        values = np.zeros(rows, dtype=column.dtype)
+        values[~mask] = column
+        return np.ma.masked_array(values, mask=mask)
+
+    def __getitem__(self, key: str):
+        return self.column(key)
+
+    def __repr__(self):
+        return f'<ArchiveBlock {self.name} rows: {self.rows} columns: {len(self.columns)}>'
+
+
+class ArchiveReader:
+    """
+    Reads archive written by ArchiveWriter from bytes or file (memory mapped) without building per row objects.
+    Only block directory is parsed on open, columns are decoded by ArchiveBlock.column.
+    """
+    def __init__(self, data: typing.Union[bytes, bytearray, memoryview, mmap.mmap]):
+        if np is None:
+            raise ImportError("ArchiveReader requires numpy")
+        data = memoryview(data)
+        if bytes(data[:4]) != ARCHIVE_MAGIC:
+            raise ValueError(f"Not an archive, unknown magic: {bytes(data[:4])}")
+        self.data = data
+        count, i = _read_varint(data, 4)
+        self.address_wc = np.frombuffer(data, dtype=np.int8, count=count, offset=i)
+        i += count
+        self.address_hash = np.frombuffer(data, dtype=np.uint8, count=count * 32, offset=i).reshape(count, 32)
+        i += count * 32
+        self.blocks = []
+        block_count, i = _read_varint(data, i)
+        for _ in range(block_count):
+            name, i = _read_str(data, i)
+            op, i = _read_varint(data, i)
+            rows, i = _read_varint(data, i)
+            column_count, i = _read_varint(data, i)
+            columns = {}
+            for _ in range(column_count):
+                key, i = _read_str(data, i)
+                kind = data[i]
+                size, i = _read_varint(data, i + 1)
+                columns[key] = (kind, data[i: i + size])
+                i += size
+            self.blocks.append(ArchiveBlock(name, op, rows, columns, self))
+        if i != len(data):
+            raise ValueError("Archive has trailing bytes")
+
+    @classmethod
+    def open(cls, path: str) -> "ArchiveReader":
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return sum(block.rows for block in self.blocks)
+
+    def address(self, address_id: int) -> typing.Optional[Address]:
+        if not address_id:
+            return None
+        return Address((int(self.address_wc[address_id - 1]), bytes(self.address_hash[address_id - 1])))
+
+    def blocks_of(self, cls: typing.Union[type, str]) -> typing.List[ArchiveBlock]:
+        name = cls if isinstance(cls, str) else cls.__name__
+        return [block for block in self.blocks if block.name == name]
+
+    def column(self, cls: typing.Union[type, str], key: str):
+        """
+        Column of all blocks of message class concatenated, see ArchiveBlock.column
+        """
+        columns = [block.column(key) for block in self.blocks_of(cls)]
+        if not columns:
+            raise KeyError(f"No {cls} blocks in archive")
+        if len(columns) == 1:
+            return columns[0]
+        if any(isinstance(column, np.ma.MaskedArray) for column in columns):
+            return np.ma.concatenate(columns)
+        return np.concatenate(columns)
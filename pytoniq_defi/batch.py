@@ -0,0 +1,150 @@
+import typing
+
+from pytoniq_core import Cell
+from pytoniq_core.crypto.crc import crc32c
+
+from .defi import deserialize_body
+
+############################################################
+# Multi-root BoC batches
+############################################################
+"""
+serialized_boc#b5ee9c72 has_idx:(## 1) has_crc32c:(## 1)
+  has_cache_bits:(## 1) flags:(## 2) { flags = 0 }
+  size:(## 3) { size <= 4 }
+  off_bytes:(## 8) { off_bytes <= 8 }
+  cells:(##(size * 8))
+  roots:(##(size * 8)) { roots >= 1 }
+  absent:(##(size * 8)) { roots + absent <= cells }
+  tot_cells_size:(##(off_bytes * 8))
+  root_list:(roots * ##(size * 8))
+  index:has_idx?(cells * ##(off_bytes * 8))
+  cell_data:(tot_cells_size * [ uint8 ])
+  crc32c:has_crc32c?uint32
+ = BagOfCells;
+"""
+
+BOC_MAGIC = b'\xb5\xee\x9c\x72'
+
+
+def _order_cells(roots: typing.List[Cell]) -> typing.Dict[Cell, int]:
+    # iterative dfs postorder; cells are compared by representation hash, so equal subtrees are stored once
+    visited = set()
+    postorder = []
+    for root in roots:
+        if root in visited:
+            continue
+        visited.add(root)
+        stack = [(root, iter(root.refs))]
+        while stack:
+            cell, refs = stack[-1]
+            for ref in refs:
+                if ref not in visited:
+                    visited.add(ref)
+                    stack.append((ref, iter(ref.refs)))
+                    break
+            else:
+                stack.pop()
+                postorder.append(cell)
+    # reversed postorder is a topological order: every cell goes before its refs
+    return {cell: i for i, cell in enumerate(reversed(postorder))}
+
+
+def serialize_batch(messages: typing.Iterable[typing.Any], has_idx: bool = False, hash_crc32: bool = True) -> bytes:
+    """
+    Serializes messages (TlbScheme objects or Cells) into one multi-root BoC.
+    Cells shared between messages are stored once.
+    """
+    roots = [m if isinstance(m, Cell) else m.serialize() for m in messages]
+    if not roots:
+        raise ValueError("Can't serialize empty batch")
+    indexes = _order_cells(roots)
+
+    cells_num = len(indexes)
+    size_bytes = max((cells_num.bit_length() + 7) // 8, 1)
+
+    payload = bytearray()
+    offsets = []
+    for cell in indexes:
+        payload += cell.serialize(indexes, size_bytes)
+        offsets.append(len(payload))
+    off_bytes = max((len(payload).bit_length() + 7) // 8, 1)
+
+    result = bytearray(BOC_MAGIC)
+    result.append(has_idx * 128 + hash_crc32 * 64 + size_bytes)
+    result.append(off_bytes)
+    result += cells_num.to_bytes(size_bytes, 'big')
+    result += len(roots).to_bytes(size_bytes, 'big')
+    result += b'\x00' * size_bytes  # absent
+    result += len(payload).to_bytes(off_bytes, 'big')
+    for root in roots:
+        result += indexes[root].to_bytes(size_bytes, 'big')
+    if has_idx:
+        for offset in offsets:
+            result += offset.to_bytes(off_bytes, 'big')
+    result += payload
+    if hash_crc32:
+        result += crc32c(result)
+    return bytes(result)
+
+
+class MessageBatchWriter:
+    """
+    Collects messages and writes them as one multi-root BoC with deduplicated cells.
+    """
+    def __init__(self):
+        self.roots = []
+
+    def add(self, message) -> int:
+        """
+        Adds message (TlbScheme object or Cell), returns its index in batch
+        """
+        self.roots.append(message if isinstance(message, Cell) else message.serialize())
+        return len(self.roots) - 1
+
+    def extend(self, messages: typing.Iterable[typing.Any]):
+        for message in messages:
+            self.add(message)
+        return self
+
+    def __len__(self):
+        return len(self.roots)
+
+    def to_boc(self, has_idx: bool = False, hash_crc32: bool = True) -> bytes:
+        return serialize_batch(self.roots, has_idx=has_idx, hash_crc32=hash_crc32)
+
+
+class MessageBatchReader:
+    """
+    Reads multi-root BoC written by MessageBatchWriter.
+    Messages are deserialized on first access with the classes registered for their opcodes,
+    roots with unknown opcode are returned as Cells.
+    """
+    def __init__(self, data: typing.Union[bytes, str], opcodes: typing.Optional[dict] = None):
+        self.roots = Cell.from_boc(data)
+        self.opcodes = opcodes
+        self._messages = [None] * len(self.roots)
+
+    def __len__(self):
+        return len(self.roots)
+
+    def cell(self, index: int) -> Cell:
+        return self.roots[index]
+
+    def __getitem__(self, index: int):
+        message = self._messages[index]
+        if message is None:
+            root = self.roots[index]
+            message = deserialize_body(root.begin_parse(), self.opcodes)
+            if message is None:
+                message = root
+            self._messages[index] = message
+        return message
+
+    def __iter__(self):
+        for i in range(len(self.roots)):
+            yield self[i]
+
+
+def deserialize_batch(data: typing.Union[bytes, str], opcodes: typing.Optional[dict] = None) -> MessageBatchReader:
+    return MessageBatchReader(data, opcodes)
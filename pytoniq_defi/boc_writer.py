@@ -0,0 +1,251 @@
+import hashlib
+import typing
+
+from pytoniq_core import Cell, Slice, Address
+from pytoniq_core.crypto.crc import crc32c
+
+from .defi import (JettonTransfer, JettonExcesses, JettonBurn, DedustMessageSwap, DedustJettonPayloadSwap,
+                   DedustSwapStep, DedustSwapParams, SwapKind, StonfiMessageSwap)
+
+############################################################
+# Direct BoC writing
+############################################################
+
+
+class UnsupportedShape(Exception):
+    """
+    Message can't be written by fast path, it is serialized through Builder instead
+    """
+
+
+class RawCell:
+    """
+    Ordinary cell kept as data bytes (with completion tag), representation hash is computed once on creation
+    """
+    __slots__ = ('data', 'descriptors', 'refs', 'hash', 'depth')
+
+    def __init__(self, data: bytes, bit_length: int, refs: list):
+        self.data = data
+        self.descriptors = bytes((len(refs), (bit_length // 8) * 2 + (1 if bit_length % 8 else 0)))
+        self.refs = refs
+        representation = self.descriptors + data
+        depth = 0
+        hashes = b''
+        for ref in refs:
+            ref_depth = ref.depth if isinstance(ref, RawCell) else ref.get_depth()
+            representation += ref_depth.to_bytes(2, 'big')
+            hashes += ref.hash
+            if ref_depth >= depth:
+                depth = ref_depth + 1
+        self.depth = depth
+        self.hash = hashlib.sha256(representation + hashes).digest()
+
+
+class CellWriter:
+    """
+    Accumulates cell bits in one int, Builder subset used by message classes
+    """
+    __slots__ = ('value', 'length', 'refs')
+
+    def __init__(self):
+        self.value = 0
+        self.length = 0
+        self.refs = []
+
+    def uint(self, value: int, bits: int):
+        if value < 0 or value >> bits:
+            raise UnsupportedShape
+        self.value = (self.value << bits) | value
+        self.length += bits
+        return self
+
+    def bit(self, value) -> 'CellWriter':
+        return self.uint(1 if value else 0, 1)
+
+    def coins(self, amount: int):
+        size = (amount.bit_length() + 7) // 8
+        if size > 15:
+            raise UnsupportedShape
+        return self.uint(size, 4).uint(amount, size * 8)
+
+    def address(self, address: typing.Optional[Address]):
+        if address is None:
+            return self.uint(0, 2)
+        if type(address) is not Address:
+            raise UnsupportedShape  # addr_extern
+        self.uint(0b100, 3).uint(address.wc & 0xff, 8)
+        return self.uint(int.from_bytes(address.hash_part, 'big'), 256)
+
+    def ref(self, cell: typing.Union[Cell, Slice, RawCell]):
+        if isinstance(cell, Slice):
+            cell = cell.to_cell()
+        elif not isinstance(cell, RawCell):
+            if not isinstance(cell, Cell) or cell.level_mask.mask:
+                raise UnsupportedShape
+        self.refs.append(cell)
+        return self
+
+    def maybe_ref(self, cell: typing.Union[Cell, Slice, RawCell, None]):
+        if cell is None:
+            return self.uint(0, 1)
+        return self.uint(1, 1).ref(cell)
+
+    def end(self) -> RawCell:
+        length = self.length
+        if length > 1023 or len(self.refs) > 4:
+            raise UnsupportedShape
+        value = self.value
+        if length % 8:
+            pad = 8 - length % 8
+            value = ((value << 1) | 1) << (pad - 1)
+            size = (length + pad) // 8
+        else:
+            size = length // 8
+        return RawCell(value.to_bytes(size, 'big'), length, self.refs)
+
+
+def _write_step(writer: CellWriter, step: DedustSwapStep):
+    params = step.step_params
+    if not isinstance(params.kind, SwapKind):
+        raise UnsupportedShape
+    writer.address(step.pool_addr).uint(params.kind.value, 1).coins(params.limit)
+    if params.next is not None:
+        writer.uint(1, 1).ref(_write_step(CellWriter(), params.next).end())
+    else:
+        writer.uint(0, 1)
+    return writer
+
+
+def _swap_params_cell(params: DedustSwapParams) -> RawCell:
+    return CellWriter() \
+        .uint(params.deadline, 32) \
+        .address(params.recipient_addr) \
+        .address(params.referral_addr) \
+        .maybe_ref(params.fulfill_payload) \
+        .maybe_ref(params.reject_payload) \
+        .end()
+
+
+def _write_jetton_transfer(message: JettonTransfer) -> CellWriter:
+    return CellWriter() \
+        .uint(JettonTransfer.op, 32) \
+        .uint(message.query_id, 64) \
+        .coins(message.amount) \
+        .address(message.destination) \
+        .address(message.response_destination) \
+        .maybe_ref(message.custom_payload) \
+        .coins(message.forward_ton_amount) \
+        .maybe_ref(message.forward_payload)
+
+
+def _write_jetton_excesses(message: JettonExcesses) -> CellWriter:
+    return CellWriter().uint(JettonExcesses.op, 32).uint(message.query_id, 64)
+
+
+def _write_jetton_burn(message: JettonBurn) -> CellWriter:
+    return CellWriter() \
+        .uint(JettonBurn.op, 32) \
+        .uint(message.query_id, 64) \
+        .coins(message.amount) \
+        .address(message.response_destination) \
+        .maybe_ref(message.custom_payload)
+
+
+def _write_dedust_swap(message: DedustMessageSwap) -> CellWriter:
+    writer = CellWriter().uint(DedustMessageSwap.op, 32).uint(message.query_id, 64).coins(message.amount)
+    return _write_step(writer, message.step).ref(_swap_params_cell(message.swap_params))
+
+
+def _write_dedust_jetton_swap(message: DedustJettonPayloadSwap) -> CellWriter:
+    writer = CellWriter().uint(DedustJettonPayloadSwap.op, 32)
+    return _write_step(writer, message.step).ref(_swap_params_cell(message.swap_params))
+
+
+def _write_stonfi_swap(message: StonfiMessageSwap) -> CellWriter:
+    writer = CellWriter() \
+        .uint(StonfiMessageSwap.op, 32) \
+        .address(message.token_wallet) \
+        .coins(message.min_out) \
+        .address(message.to_address)
+    if message.referral_address is not None:
+        return writer.uint(1, 1).address(message.referral_address)
+    return writer.uint(0, 1)
+
+
+FAST_WRITERS = {
+    JettonTransfer: _write_jetton_transfer,
+    JettonExcesses: _write_jetton_excesses,
+    JettonBurn: _write_jetton_burn,
+    DedustMessageSwap: _write_dedust_swap,
+    DedustJettonPayloadSwap: _write_dedust_jetton_swap,
+    StonfiMessageSwap: _write_stonfi_swap,
+}
+
+
+def _order(cell, result: dict):
+    # same order as Cell.order: revisited subtree is moved after the last cell referencing it
+    key = cell.hash
+    if key in result:
+        result.pop(key)
+    result[key] = cell
+    for ref in cell.refs:
+        _order(ref, result)
+
+
+def write_boc(root: typing.Union[RawCell, Cell], has_idx: bool = False, hash_crc32: bool = False) -> bytes:
+    """
+    Serializes tree of RawCells and Cells to single root BoC, output is the same as Cell.to_boc
+    """
+    ordered = {}
+    _order(root, ordered)
+    indexes = {key: i for i, key in enumerate(ordered)}
+    cells_num = len(indexes)
+    size_bytes = (cells_num.bit_length() + 7) // 8
+
+    payload = bytearray()
+    lengths = []
+    for cell in ordered.values():
+        start = len(payload)
+        if isinstance(cell, RawCell):
+            payload += cell.descriptors
+        else:
+            payload += cell.get_descriptors(cell.level_mask)
+        payload += cell.data
+        for ref in cell.refs:
+            payload += indexes[ref.hash].to_bytes(size_bytes, 'big')
+        lengths.append(len(payload) - start)
+    off_bytes = (len(payload).bit_length() + 7) // 8
+
+    result = bytearray(b'\xb5\xee\x9c\x72')
+    result.append(has_idx * 128 + hash_crc32 * 64 + size_bytes)
+    result.append(off_bytes)
+    result += cells_num.to_bytes(size_bytes, 'big')
+    result += (1).to_bytes(size_bytes, 'big')
+    result += bytes(size_bytes)  # absent
+    result += len(payload).to_bytes(off_bytes, 'big')
+    result += bytes(size_bytes)  # root index
+    if has_idx:
+        # Cell.to_boc stores cell lengths in index, kept for identical output
+        for length in lengths:
+            result += length.to_bytes(off_bytes, 'big')
+    result += payload
+    if hash_crc32:
+        result += crc32c(result)
+    return bytes(result)
+
+
+def write_message(message, has_idx: bool = False, hash_crc32: bool = False) -> typing.Tuple[bytes, bytes]:
+    """
+    Returns (BoC bytes, representation hash) of serialized message.
+    Messages of classes in FAST_WRITERS are written without building Cells, others go through serialize().
+    """
+    writer = FAST_WRITERS.get(type(message))
+    if writer is not None:
+        try:
+            root = writer(message).end()
+        except (UnsupportedShape, AttributeError, TypeError):
+            pass  # serialize() raises the proper error or handles the shape
+        else:
+            return write_boc(root, has_idx, hash_crc32), root.hash
+    cell = message.serialize()
+    return cell.to_boc(has_idx=has_idx, hash_crc32=hash_crc32), cell.hash
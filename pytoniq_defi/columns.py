@@ -0,0 +1,182 @@
+import typing
+from types import MappingProxyType
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, needed only by MessageColumns
+    np = None
+
+from pytoniq_core import Cell, Address
+
+from .defi import (JettonTransfer, JettonTransferNotification, JettonInternalTransfer, JettonBurn,
+                   JettonBurnNotification, JettonExcesses)
+from .flat import boc_root_data, _Reader
+from .ledger import WalletIndex, _grown
+from .raw_filter import RAW_LAYOUTS, COINS, ADDRESS
+
+############################################################
+# Struct of arrays extraction
+############################################################
+
+# root cell fields read as columns: RAW_LAYOUTS of message classes, up to the last field, refs are not read
+COLUMN_LAYOUTS = MappingProxyType({cls: RAW_LAYOUTS[cls.op] for cls in (
+    JettonTransfer, JettonTransferNotification, JettonInternalTransfer, JettonBurn, JettonBurnNotification,
+    JettonExcesses)})
+
+# coins column value of amounts kept in MessageColumns.overflow
+COINS_OVERFLOW = (1 << 64) - 1
+
+
+class MessageColumns:
+    """
+    Fields of bodies of one message class in preallocated arrays, one row per body:
+        uint64 query_id, uint64 coins (COINS_OVERFLOW marks exact value in overflow[column][row]),
+        int32 address ids of index (-1 for addr_none), valid flag of row.
+    Bodies (Cells or BoC bytes) are read from root cell bits directly, no messages are built.
+    Rows of bodies of other op or of layouts not handled here (addr_extern, anycast, short data)
+    are not valid and keep zeros, decode them with decode_body if needed.
+    """
+    def __init__(self, cls: type, capacity: int = 1024, index: typing.Optional[WalletIndex] = None):
+        if np is None:
+            raise ImportError("MessageColumns requires numpy")
+        cls = getattr(cls, 'mutable_class', cls)  # frozen variants
+        layout = COLUMN_LAYOUTS.get(cls)
+        if layout is None:
+            raise ValueError(f"No column layout of {cls.__name__}")
+        capacity = max(capacity, 16)
+        self.cls = cls
+        self.layout = layout
+        self.index = index if index is not None else WalletIndex()
+        self.count = 0
+        self.columns = {}
+        self.overflow = {}
+        for name, kind in layout:
+            if kind == ADDRESS:
+                self.columns[name] = np.full(capacity, -1, dtype=np.int32)
+            elif name is not None:
+                if kind > 64:
+                    raise ValueError(f"Column {name} of {kind} bits doesn't fit uint64")
+                self.columns[name] = np.zeros(capacity, dtype=np.uint64)
+            if kind == COINS:
+                self.overflow[name] = {}
+        self.valid = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name: str) -> "np.ndarray":
+        return self.columns[name][:self.count]
+
+    @property
+    def capacity(self) -> int:
+        return len(self.valid)
+
+    def reserve(self, capacity: int):
+        if capacity <= self.capacity:
+            return
+        size = max(capacity, 2 * self.capacity)
+        for name, kind in self.layout:
+            if kind == ADDRESS:
+                column = np.full(size, -1, dtype=np.int32)
+                column[:self.capacity] = self.columns[name]
+                self.columns[name] = column
+            elif name is not None:
+                self.columns[name] = _grown(self.columns[name], size)
+        self.valid = _grown(self.valid, size)
+
+    def extend(self, bodies: typing.Iterable[typing.Union[Cell, bytes]]) -> int:
+        """
+        Appends a row per body, returns number of valid rows appended
+        """
+        if not isinstance(bodies, (list, tuple)):
+            bodies = list(bodies)
+        start = self.count
+        self.reserve(start + len(bodies))
+        op = self.cls.op
+        fields = [(kind, self.columns.get(name), self.overflow.get(name)) for name, kind in self.layout]
+        intern = self.index.intern_raw
+        valid = self.valid
+        appended = 0
+        for row, body in enumerate(bodies, start):
+            if isinstance(body, Cell):
+                data = body.bits.tobytes()
+                length = len(body.bits)
+            else:
+                root = boc_root_data(body)
+                if root is None:  # root is not the first cell
+                    bits = Cell.one_from_boc(bytes(body)).bits
+                    data = bits.tobytes()
+                    length = len(bits)
+                else:
+                    data, length = root
+            if length < 32 or int.from_bytes(data[:4], 'big') != op:
+                continue
+            reader = _Reader(data, length)
+            try:
+                for kind, column, overflow in fields:
+                    if kind == COINS:
+                        coins = reader.coins()
+                        if coins >= COINS_OVERFLOW:
+                            overflow[row] = coins
+                            coins = COINS_OVERFLOW
+                        column[row] = coins
+                    elif kind == ADDRESS:
+                        address = reader.address_raw()
+                        if address is not None:
+                            column[row] = intern(*address)
+                    else:
+                        value = reader.uint(kind)
+                        if column is not None:
+                            column[row] = value
+            except IndexError:  # truncated, addr_extern, addr_var or anycast
+                self._clear(row)
+                continue
+            valid[row] = True
+            appended += 1
+        self.count = start + len(bodies)
+        return appended
+
+    def _clear(self, row: int):
+        for name, kind in self.layout:
+            if kind == ADDRESS:
+                self.columns[name][row] = -1
+            elif name is not None:
+                self.columns[name][row] = 0
+            if kind == COINS:
+                self.overflow[name].pop(row, None)
+
+    def coins(self, name: str, row: int) -> int:
+        """
+        Exact coins value of row
+        """
+        value = int(self.columns[name][row])
+        return self.overflow[name][row] if value == COINS_OVERFLOW else value
+
+    def address(self, name: str, row: int) -> typing.Optional[Address]:
+        address_id = int(self.columns[name][row])
+        return self.index.address(address_id) if address_id >= 0 else None
+
+    def clear(self):
+        """
+        Drops rows, keeps arrays and address index
+        """
+        for name, kind in self.layout:
+            if name is not None:
+                self.columns[name][:self.count] = -1 if kind == ADDRESS else 0
+        for overflow in self.overflow.values():
+            overflow.clear()
+        self.valid[:self.count] = False
+        self.count = 0
+
+
+def extract_columns(bodies: typing.Iterable[typing.Union[Cell, bytes]],
+                    cls: type,
+                    index: typing.Optional[WalletIndex] = None) -> MessageColumns:
+    """
+    MessageColumns of bodies of cls, e.g. extract_columns(bocs, JettonTransferNotification)['amount'].sum()
+    """
+    if not isinstance(bodies, (list, tuple)):
+        bodies = list(bodies)
+    result = MessageColumns(cls, len(bodies), index)
+    result.extend(bodies)
+    return result
@@ -1,10 +1,101 @@
+import copyreg
+import io
+import pickle
+import threading
 import typing
+import weakref
 from enum import Enum
 
 from pytoniq_core import TlbScheme
 from pytoniq_core import Cell, Builder, Slice, HashMap, Address
 from .payload_type import PayloadType
-from types import SimpleNamespace
+from types import SimpleNamespace, MappingProxyType
+
+
+def _as_cell(value):
+    # deserialized payloads are Slices, Builder.store_ref expects Cell
+    return value.to_cell() if isinstance(value, Slice) else value
+
+
+# WeakValueDictionary.setdefault is not atomic without GIL
+_intern_lock = threading.Lock()
+
+
+class DefiTlbScheme(TlbScheme):
+    """
+    Base of message classes, adds compact wire form used by pickle:
+    message is stored as BoC bytes and is deserialized on first attribute access.
+    """
+    def to_bytes(self) -> bytes:
+        wire = self.__dict__.get('_wire')
+        if wire is not None:
+            return wire
+        return self.to_boc()
+
+    def to_boc(self, has_idx: bool = False, hash_crc32: bool = False) -> bytes:
+        """
+        Same bytes as serialize().to_boc(), common outgoing messages are written without building Cells
+        """
+        return self.to_boc_with_hash(has_idx, hash_crc32)[0]
+
+    def to_boc_with_hash(self, has_idx: bool = False, hash_crc32: bool = False) -> typing.Tuple[bytes, bytes]:
+        """
+        Returns (BoC bytes, representation hash of root cell)
+        """
+        from .boc_writer import write_message
+        return write_message(self, has_idx, hash_crc32)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        from .flat import decode_flat
+        message = decode_flat(data, cls)
+        if message is not None:
+            return message
+        return cls.deserialize(Cell.one_from_boc(data).begin_parse())
+
+    @classmethod
+    def from_wire(cls, data: bytes):
+        """
+        Lazy message: data is deserialized when any field is accessed
+        """
+        message = cls.__new__(cls)
+        message.__dict__['_wire'] = data
+        return message
+
+    def __getattr__(self, name):
+        # called only for missing attributes, so decoded messages don't pay for it
+        wire = self.__dict__.get('_wire')
+        if wire is None or name.startswith('__'):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        decoded = type(self).from_bytes(wire)
+        self.__dict__.update(decoded.__dict__)
+        self.__dict__.pop('_wire', None)  # another thread may have decoded it concurrently
+        return getattr(self, name)
+
+    def __reduce__(self):
+        return (type(self).from_wire, (self.to_bytes(),))
+
+    def to_dict(self, address_format: str = 'non_bounceable', amounts_as_str: bool = False, decode_payloads: bool = True) -> dict:
+        from .export import to_dict
+        return to_dict(self, address_format, amounts_as_str, decode_payloads)
+
+
+class _StatePickler(pickle.Pickler):
+    # messages are pickled as class and __dict__, without the BoC round trip of DefiTlbScheme.__reduce__
+    def reducer_override(self, obj):
+        if isinstance(obj, DefiTlbScheme):
+            return copyreg.__newobj__, (type(obj),), obj.__dict__
+        return NotImplemented
+
+
+def _dumps_state(value) -> bytes:
+    """
+    Pickles value with messages stored as plain objects: larger than compact form, but ~25x faster
+    to dump and load when every message is read, e.g. batches sent to worker processes
+    """
+    buffer = io.BytesIO()
+    _StatePickler(buffer, pickle.HIGHEST_PROTOCOL).dump(value)
+    return buffer.getvalue()
 
 ############################################################
 # Jetton
@@ -37,7 +128,7 @@ burn_notification#7bdd97de query_id:uint64 amount:Coins
        = InternalMsgBody;
 """
 
-class JettonTransfer(TlbScheme):
+class JettonTransfer(DefiTlbScheme):
     """
     transfer#f8a7ea5 query_id:uint64 amount:Coins destination:MsgAddress
                response_destination:MsgAddress custom_payload:(Maybe ^Cell)
@@ -73,9 +164,9 @@ class JettonTransfer(TlbScheme):
             .store_coins(self.amount) \
             .store_address(self.destination) \
             .store_address(self.response_destination)
-        builder.store_bit(1).store_ref(self.custom_payload) if self.custom_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.custom_payload)) if self.custom_payload is not None else builder.store_bit(0)
         builder.store_coins(self.forward_ton_amount)
-        builder.store_bit(1).store_ref(self.forward_payload) if self.forward_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.forward_payload)) if self.forward_payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -94,7 +185,7 @@ class JettonTransfer(TlbScheme):
     op = 0xf8a7ea5
     message_type = PayloadType.internal
 
-class JettonTransferNotification(TlbScheme):
+class JettonTransferNotification(DefiTlbScheme):
     """
     transfer_notification#7362d09c query_id:uint64 amount:Coins
                sender:MsgAddress forward_payload:(Either Cell ^Cell)
@@ -120,7 +211,7 @@ class JettonTransferNotification(TlbScheme):
             .store_uint(self.query_id, 64) \
             .store_coins(self.amount) \
             .store_address(self.sender)
-        builder.store_bit(1).store_ref(self.forward_payload)
+        builder.store_bit(1).store_ref(_as_cell(self.forward_payload))
         return builder.end_cell()
 
     @classmethod
@@ -137,7 +228,7 @@ class JettonTransferNotification(TlbScheme):
 
     message_type = PayloadType.internal
 
-class JettonExcesses(TlbScheme):
+class JettonExcesses(DefiTlbScheme):
     """
     excesses#d53276db query_id:uint64 = InternalMsgBody;
     """
@@ -164,7 +255,7 @@ class JettonExcesses(TlbScheme):
 
     message_type = PayloadType.internal
 
-class JettonBurn(TlbScheme):
+class JettonBurn(DefiTlbScheme):
     """
     burn#595f07bc query_id:uint64 amount:Coins
            response_destination:MsgAddress custom_payload:(Maybe ^Cell)
@@ -190,7 +281,7 @@ class JettonBurn(TlbScheme):
             .store_uint(self.query_id, 64) \
             .store_coins(self.amount) \
             .store_address(self.response_destination)
-        builder.store_bit(1).store_ref(self.custom_payload) if self.custom_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.custom_payload)) if self.custom_payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -208,7 +299,7 @@ class JettonBurn(TlbScheme):
 
     message_type = PayloadType.internal
 
-class JettonInternalTransfer(TlbScheme):
+class JettonInternalTransfer(DefiTlbScheme):
     """
     internal_transfer#178d4519  query_id:uint64 amount:Coins from:MsgAddress
                      response_address:MsgAddress
@@ -244,7 +335,7 @@ class JettonInternalTransfer(TlbScheme):
             .store_address(self.from_) \
             .store_address(self.response_address) \
             .store_coins(self.forward_ton_amount)
-        builder.store_bit(1).store_ref(self.forward_payload)
+        builder.store_bit(1).store_ref(_as_cell(self.forward_payload))
         return builder.end_cell()
 
     @classmethod
@@ -264,7 +355,7 @@ class JettonInternalTransfer(TlbScheme):
     message_type = PayloadType.internal
 
 
-class JettonBurnNotification(TlbScheme):
+class JettonBurnNotification(DefiTlbScheme):
     """
     burn_notification#7bdd97de query_id:uint64 amount:Coins
            sender:MsgAddress response_destination:MsgAddress
@@ -310,7 +401,7 @@ class JettonBurnNotification(TlbScheme):
     message_type = PayloadType.internal
 
 
-class JettonComment(TlbScheme):
+class JettonComment(DefiTlbScheme):
     """
 
     """
@@ -339,7 +430,7 @@ class JettonComment(TlbScheme):
 # Dedust v2 https://docs.dedust.io/reference/tlb-schemes
 ############################################################
 
-class DedustSwapParams(TlbScheme):
+class DedustSwapParams(DefiTlbScheme):
     """
     timestamp#_ _:uint32 = Timestamp;
     swap_params#_ deadline:Timestamp recipient_addr:MsgAddressInt referral_addr:MsgAddress
@@ -368,8 +459,8 @@ class DedustSwapParams(TlbScheme):
             .store_uint(self.deadline, 32) \
             .store_address(self.recipient_addr) \
             .store_address(self.referral_addr)
-        builder.store_bit(1).store_ref(self.fulfill_payload) if self.fulfill_payload is not None else builder.store_bit(0)
-        builder.store_bit(1).store_ref(self.reject_payload) if self.reject_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.fulfill_payload)) if self.fulfill_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.reject_payload)) if self.reject_payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -381,7 +472,7 @@ class DedustSwapParams(TlbScheme):
                    reject_payload   = cell_slice.load_ref().begin_parse() if cell_slice.load_bit() else None)
 
 
-class DedustSwapStep(TlbScheme):
+class DedustSwapStep(DefiTlbScheme):
     """
     given_in$0 = SwapKind;
     given_out$1 = SwapKind;
@@ -428,7 +519,7 @@ class SwapKind(Enum):
         return cls(cell_slice.load_uint(1))
 
 
-class DedustSwapStepParams(TlbScheme):
+class DedustSwapStepParams(DefiTlbScheme):
     """
         given_in$0 = SwapKind;
         given_out$1 = SwapKind;
@@ -460,7 +551,7 @@ class DedustSwapStepParams(TlbScheme):
                    limit=cell_slice.load_coins(),
                    next=DedustSwapStep.deserialize(cell_slice.load_ref().begin_parse()) if cell_slice.load_bit() else None)
 
-class DedustMessageSwap(TlbScheme):
+class DedustMessageSwap(DefiTlbScheme):
     """
         swap#ea06185d query_id:uint64 amount:Coins _:SwapStep swap_params:^SwapParams = InMsgBody;
     """
@@ -513,7 +604,7 @@ class DedustPoolType(Enum):
     def deserialize(cls, cell_slice: Slice):
         return cls(cell_slice.load_uint(1))
 
-class DedustAsset(TlbScheme):
+class DedustAsset(DefiTlbScheme):
     """
         native$0000 = Asset;
         jetton$0001 workchain_id:int8 address:uint256 = Asset;
@@ -523,9 +614,9 @@ class DedustAsset(TlbScheme):
     def __init__(self, type= None, workchain_id = None, address = None, currency_id = None):
         if type == None:
             if not ((workchain_id == None) and (address == None)):
-                self.type = 1
-            elif currency_id:
-                self.type = 2
+                type = 1
+            elif currency_id is not None:
+                type = 2
             else:
                 raise ValueError("Undetermined DedustAsset: type, (workchain_id, address) or currency_id should be provided")
         elif type == 1:
@@ -540,16 +631,69 @@ class DedustAsset(TlbScheme):
         self.address = address
         self.currency_id = currency_id
 
+    # interned assets, see DedustAsset.intern
+    _interned = weakref.WeakValueDictionary()
+
+    def key(self) -> tuple:
+        return (self.type, self.workchain_id, self.address, self.currency_id)
+
+    def __eq__(self, other):
+        if not isinstance(other, DedustAsset):
+            return NotImplemented
+        return self is other or self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    @classmethod
+    def intern(cls, asset: "DedustAsset") -> "DedustAsset":
+        """
+        Returns canonical instance equal to asset, so equal assets share one object
+        """
+        with _intern_lock:
+            return cls._interned.setdefault(asset.key(), asset)
+
+    @classmethod
+    def native(cls) -> "DedustAsset":
+        return cls.intern(cls(type=0))
+
+    @classmethod
+    def from_address(cls, address: typing.Optional[Address]) -> "DedustAsset":
+        """
+        Interned jetton asset for jetton minter address, native asset for None
+        """
+        if address is None:
+            return cls.native()
+        if isinstance(address, str):
+            address = Address(address)
+        asset = cls.intern(cls(type=1, workchain_id=address.wc, address=int.from_bytes(address.hash_part, 'big')))
+        if asset.__dict__.get('_address') is None:
+            asset.__dict__['_address'] = address  # cache, also on frozen assets
+        return asset
+
+    def to_address(self) -> typing.Optional[Address]:
+        """
+        Jetton minter address, None for native asset
+        """
+        if self.type == 0:
+            return None
+        if self.type != 1:
+            raise ValueError(f"DedustAsset type {self.type} has no address")
+        address = self.__dict__.get('_address')
+        if address is None or address.wc != self.workchain_id:
+            address = Address((self.workchain_id, self.address.to_bytes(32, 'big')))
+            self.__dict__['_address'] = address  # cache, also on frozen assets
+        return address
 
     def serialize(self) -> Cell:
         builder = Builder()
-        if type == 0:
+        if self.type == 0:
             builder.store_uint(0, 4)
-        elif type == 1:
+        elif self.type == 1:
             builder.store_uint(1, 4)
             builder.store_int(self.workchain_id, 8)
             builder.store_uint(self.address, 256)
-        elif type == 2:
+        elif self.type == 2:
             builder.store_uint(2, 4)
             builder.store_int(self.currency_id, 32)
         return builder.end_cell()
@@ -567,7 +711,7 @@ class DedustAsset(TlbScheme):
             raise ValueError(f"Not a DedustAsset, unknown type: {type}")
     
 
-class DedustPoolParams(TlbScheme):
+class DedustPoolParams(DefiTlbScheme):
     """
         pool_params#_ pool_type:PoolType asset0:Asset asset1:Asset = PoolParams;
     """
@@ -580,6 +724,34 @@ class DedustPoolParams(TlbScheme):
         self.asset0 = asset0
         self.asset1 = asset1
 
+    # interned pool params, see DedustPoolParams.intern
+    _interned = weakref.WeakValueDictionary()
+
+    def key(self) -> tuple:
+        return (DedustPoolType(self.pool_type), self.asset0, self.asset1)
+
+    def __eq__(self, other):
+        if not isinstance(other, DedustPoolParams):
+            return NotImplemented
+        return self is other or self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    @classmethod
+    def intern(cls, pool_params: "DedustPoolParams") -> "DedustPoolParams":
+        """
+        Returns canonical instance equal to pool_params, assets are interned too
+        """
+        interned = cls._interned.get(pool_params.key())
+        if interned is None:
+            interned = cls(pool_type=DedustPoolType(pool_params.pool_type),
+                           asset0=DedustAsset.intern(pool_params.asset0),
+                           asset1=DedustAsset.intern(pool_params.asset1))
+            with _intern_lock:
+                interned = cls._interned.setdefault(interned.key(), interned)
+        return interned
+
     def serialize(self) -> Cell:
         builder = Builder()
         builder \
@@ -594,7 +766,7 @@ class DedustPoolParams(TlbScheme):
                    asset0=DedustAsset.deserialize(cell_slice),
                    asset1=DedustAsset.deserialize(cell_slice))
 
-class DedustMessageSwap(TlbScheme):
+class DedustMessageSwap(DefiTlbScheme):
     """
         swap#ea06185d query_id:uint64 amount:Coins _:SwapStep swap_params:^SwapParams = InMsgBody;
     """
@@ -635,7 +807,7 @@ class DedustMessageSwap(TlbScheme):
 
 
 #Message "deposit_liquidity"
-class DedustMessageDepositLiquidity(TlbScheme):
+class DedustMessageDepositLiquidity(DefiTlbScheme):
     """
         deposit_liquidity#d55e4686 query_id:uint64 amount:Coins pool_params:PoolParams
                                    min_lp_amount:Coins
@@ -672,8 +844,8 @@ class DedustMessageDepositLiquidity(TlbScheme):
             .store_coins(self.min_lp_amount) \
             .store_coins(self.asset0_target_balance) \
             .store_coins(self.asset1_target_balance)
-        builder.store_bit(1).store_ref(self.fulfill_payload) if self.fulfill_payload is not None else builder.store_bit(0)
-        builder.store_bit(1).store_ref(self.reject_payload) if self.reject_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.fulfill_payload)) if self.fulfill_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.reject_payload)) if self.reject_payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -694,7 +866,7 @@ class DedustMessageDepositLiquidity(TlbScheme):
 
     message_type = PayloadType.internal
 
-class DedustMessagePayoutFromPool(TlbScheme):
+class DedustMessagePayoutFromPool(DefiTlbScheme):
     """
         pay_out_from_pool#ad4eb6f5 query_id:uint64 proof:^Cell amount:(VarUInteger 16) recipient_addr:MsgAddress payload:(Maybe ^Cell) = InMsgBody;
     """
@@ -718,10 +890,10 @@ class DedustMessagePayoutFromPool(TlbScheme):
         builder \
             .store_uint(0xad4eb6f5, 32) \
             .store_uint(self.query_id, 64) \
-            .store_ref(self.proof) \
+            .store_ref(_as_cell(self.proof)) \
             .store_coins(self.amount) \
             .store_address(self.recipient_addr)
-        builder.store_bit(1).store_ref(self.payload) if self.payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.payload)) if self.payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -742,7 +914,7 @@ class DedustMessagePayoutFromPool(TlbScheme):
 
 # Message payout
 
-class DedustMessagePayout(TlbScheme):
+class DedustMessagePayout(DefiTlbScheme):
     """
         payout#474f86cf query_id:uint64 payload:(Maybe ^Cell) = InMsgBody;
     """
@@ -758,7 +930,7 @@ class DedustMessagePayout(TlbScheme):
         builder \
             .store_uint(0x474f86cf, 32) \
             .store_uint(self.query_id, 64)
-        builder.store_bit(1).store_ref(self.payload) if self.payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.payload)) if self.payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -775,7 +947,7 @@ class DedustMessagePayout(TlbScheme):
 
 # Message JettonPayloadSwap
 
-class DedustJettonPayloadSwap(TlbScheme):
+class DedustJettonPayloadSwap(DefiTlbScheme):
     """
     swap#e3a0d482 _:SwapStep swap_params:^SwapParams = ForwardPayload;
     """
@@ -808,7 +980,7 @@ class DedustJettonPayloadSwap(TlbScheme):
 
 # Message JettonPayloadDepositLiquidity
 
-class DedustJettonPayloadDepositLiquidity(TlbScheme):
+class DedustJettonPayloadDepositLiquidity(DefiTlbScheme):
     """
         deposit_liquidity#40e108d6 pool_params:PoolParams min_lp_amount:Coins
                                asset0_target_balance:Coins asset1_target_balance:Coins
@@ -839,8 +1011,8 @@ class DedustJettonPayloadDepositLiquidity(TlbScheme):
             .store_coins(self.min_lp_amount) \
             .store_coins(self.asset0_target_balance) \
             .store_coins(self.asset1_target_balance)
-        builder.store_bit(1).store_ref(self.fulfill_payload) if self.fulfill_payload is not None else builder.store_bit(0)
-        builder.store_bit(1).store_ref(self.reject_payload) if self.reject_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.fulfill_payload)) if self.fulfill_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.reject_payload)) if self.reject_payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -861,7 +1033,7 @@ class DedustJettonPayloadDepositLiquidity(TlbScheme):
 
 # Message cancel_deposit
 
-class DedustMessageCancelDeposit(TlbScheme):
+class DedustMessageCancelDeposit(DefiTlbScheme):
     """
     cancel_deposit#166cedee query_id:uint64 payload:(Maybe ^Cell) = InMsgBody;
     """
@@ -877,7 +1049,7 @@ class DedustMessageCancelDeposit(TlbScheme):
         builder \
             .store_uint(0x166cedee, 32) \
             .store_uint(self.query_id, 64)
-        builder.store_bit(1).store_ref(self.payload) if self.payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.payload)) if self.payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -892,6 +1064,178 @@ class DedustMessageCancelDeposit(TlbScheme):
 
     message_type = PayloadType.internal
 
+# Pool events, sent by pool as external out messages
+
+class DedustEventSwap(DefiTlbScheme):
+    """
+    swap#9c610de3 asset_in:Asset asset_out:Asset amount_in:Coins amount_out:Coins
+      ^[ sender_addr:MsgAddressInt referral_addr:MsgAddress
+         reserve0:Coins reserve1:Coins ] = ExtOutMsgBody;
+    """
+    def __init__(self,
+                 asset_in: typing.Optional[DedustAsset] = None,
+                 asset_out: typing.Optional[DedustAsset] = None,
+                 amount_in: typing.Optional[int] = 0,
+                 amount_out: typing.Optional[int] = 0,
+                 sender_addr: typing.Optional[Address] = None,
+                 referral_addr: typing.Optional[Address] = None,
+                 reserve0: typing.Optional[int] = 0,
+                 reserve1: typing.Optional[int] = 0
+                 ):
+        self.asset_in = asset_in
+        self.asset_out = asset_out
+        self.amount_in = amount_in
+        self.amount_out = amount_out
+        if isinstance(sender_addr, str):
+            sender_addr = Address(sender_addr)
+        if isinstance(referral_addr, str):
+            referral_addr = Address(referral_addr)
+        self.sender_addr = sender_addr
+        self.referral_addr = referral_addr
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+
+    def serialize(self) -> Cell:
+        builder = Builder()
+        builder \
+            .store_uint(0x9c610de3, 32) \
+            .store_cell(self.asset_in.serialize()) \
+            .store_cell(self.asset_out.serialize()) \
+            .store_coins(self.amount_in) \
+            .store_coins(self.amount_out) \
+            .store_ref(Builder()
+                       .store_address(self.sender_addr)
+                       .store_address(self.referral_addr)
+                       .store_coins(self.reserve0)
+                       .store_coins(self.reserve1)
+                       .end_cell())
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0x9c610de3:
+            raise ValueError(f"Not a DedustEventSwap, unknown operation: {op}")
+        asset_in = DedustAsset.intern(DedustAsset.deserialize(cell_slice))
+        asset_out = DedustAsset.intern(DedustAsset.deserialize(cell_slice))
+        amount_in = cell_slice.load_coins()
+        amount_out = cell_slice.load_coins()
+        info = cell_slice.load_ref().begin_parse()
+        return cls(asset_in=asset_in,
+                   asset_out=asset_out,
+                   amount_in=amount_in,
+                   amount_out=amount_out,
+                   sender_addr=info.load_address(),
+                   referral_addr=info.load_address(),
+                   reserve0=info.load_coins(),
+                   reserve1=info.load_coins())
+
+    op = 0x9c610de3
+
+    message_type = PayloadType.external
+
+
+class DedustEventDeposit(DefiTlbScheme):
+    """
+    deposit#b544f4a4 sender_addr:MsgAddressInt amount0:Coins amount1:Coins
+      reserve0:Coins reserve1:Coins liquidity:Coins = ExtOutMsgBody;
+    """
+    def __init__(self,
+                 sender_addr: typing.Optional[Address] = None,
+                 amount0: typing.Optional[int] = 0,
+                 amount1: typing.Optional[int] = 0,
+                 reserve0: typing.Optional[int] = 0,
+                 reserve1: typing.Optional[int] = 0,
+                 liquidity: typing.Optional[int] = 0
+                 ):
+        if isinstance(sender_addr, str):
+            sender_addr = Address(sender_addr)
+        self.sender_addr = sender_addr
+        self.amount0 = amount0
+        self.amount1 = amount1
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+        self.liquidity = liquidity
+
+    def serialize(self) -> Cell:
+        builder = Builder()
+        builder \
+            .store_uint(0xb544f4a4, 32) \
+            .store_address(self.sender_addr) \
+            .store_coins(self.amount0) \
+            .store_coins(self.amount1) \
+            .store_coins(self.reserve0) \
+            .store_coins(self.reserve1) \
+            .store_coins(self.liquidity)
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0xb544f4a4:
+            raise ValueError(f"Not a DedustEventDeposit, unknown operation: {op}")
+        return cls(sender_addr=cell_slice.load_address(),
+                   amount0=cell_slice.load_coins(),
+                   amount1=cell_slice.load_coins(),
+                   reserve0=cell_slice.load_coins(),
+                   reserve1=cell_slice.load_coins(),
+                   liquidity=cell_slice.load_coins())
+
+    op = 0xb544f4a4
+
+    message_type = PayloadType.external
+
+
+class DedustEventWithdrawal(DefiTlbScheme):
+    """
+    withdrawal#3aa870a6 sender_addr:MsgAddressInt liquidity:Coins
+      amount0:Coins amount1:Coins reserve0:Coins reserve1:Coins = ExtOutMsgBody;
+    """
+    def __init__(self,
+                 sender_addr: typing.Optional[Address] = None,
+                 liquidity: typing.Optional[int] = 0,
+                 amount0: typing.Optional[int] = 0,
+                 amount1: typing.Optional[int] = 0,
+                 reserve0: typing.Optional[int] = 0,
+                 reserve1: typing.Optional[int] = 0
+                 ):
+        if isinstance(sender_addr, str):
+            sender_addr = Address(sender_addr)
+        self.sender_addr = sender_addr
+        self.liquidity = liquidity
+        self.amount0 = amount0
+        self.amount1 = amount1
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+
+    def serialize(self) -> Cell:
+        builder = Builder()
+        builder \
+            .store_uint(0x3aa870a6, 32) \
+            .store_address(self.sender_addr) \
+            .store_coins(self.liquidity) \
+            .store_coins(self.amount0) \
+            .store_coins(self.amount1) \
+            .store_coins(self.reserve0) \
+            .store_coins(self.reserve1)
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0x3aa870a6:
+            raise ValueError(f"Not a DedustEventWithdrawal, unknown operation: {op}")
+        return cls(sender_addr=cell_slice.load_address(),
+                   liquidity=cell_slice.load_coins(),
+                   amount0=cell_slice.load_coins(),
+                   amount1=cell_slice.load_coins(),
+                   reserve0=cell_slice.load_coins(),
+                   reserve1=cell_slice.load_coins())
+
+    op = 0x3aa870a6
+
+    message_type = PayloadType.external
+
 ############################################################
 # Ston.fi v1
 ############################################################
@@ -903,7 +1247,7 @@ swap_success_referal#45078540 = JettonPayload;
 swap_error_no_liquidity#5ffe1295 = JettonPayload;
 swap_error_reserve_error#38976e9b = JettonPayload;
 """
-class StonfiMessageSwap(TlbScheme):
+class StonfiMessageSwap(DefiTlbScheme):
     """
     swap#25938561 token_wallet:MsgAddress min_out:Coins to_address:MsgAddress referral_address:(Maybe MsgAddress) = JettonPayload;
     """
@@ -948,7 +1292,7 @@ class StonfiMessageSwap(TlbScheme):
 
     message_type = PayloadType.jetton
 
-class StonfiMessageProvideLiquidity(TlbScheme):
+class StonfiMessageProvideLiquidity(DefiTlbScheme):
     """
     provide_liquidity#fcf9e58f token_wallet:MsgAddress min_lp_out:Coins = JettonPayload;
     """
@@ -981,7 +1325,7 @@ class StonfiMessageProvideLiquidity(TlbScheme):
 
     message_type = PayloadType.jetton
 
-class StonfiMessageSwapSuccess(TlbScheme):
+class StonfiMessageSwapSuccess(DefiTlbScheme):
     """
     swap_success#c64370e5 = JettonPayload;
     """
@@ -1004,7 +1348,7 @@ class StonfiMessageSwapSuccess(TlbScheme):
 
     message_type = PayloadType.jetton
 
-class StonfiMessageSwapSuccessReferal(TlbScheme):
+class StonfiMessageSwapSuccessReferal(DefiTlbScheme):
     """
     swap_success_referal#45078540 = JettonPayload;
     """
@@ -1027,7 +1371,7 @@ class StonfiMessageSwapSuccessReferal(TlbScheme):
 
     message_type = PayloadType.jetton
 
-class StonfiMessageSwapErrorNoLiquidity(TlbScheme):
+class StonfiMessageSwapErrorNoLiquidity(DefiTlbScheme):
     """
     swap_error_no_liquidity#5ffe1295 = JettonPayload;
     """
@@ -1050,7 +1394,7 @@ class StonfiMessageSwapErrorNoLiquidity(TlbScheme):
 
     message_type = PayloadType.jetton
 
-class StonfiMessageSwapErrorReserveError(TlbScheme):
+class StonfiMessageSwapErrorReserveError(DefiTlbScheme):
     """
     swap_error_reserve_error#38976e9b = JettonPayload;
     """
@@ -1075,7 +1419,33 @@ class StonfiMessageSwapErrorReserveError(TlbScheme):
 
 ############################################################
 # Ston.fi v2
-class StonfiV2MessageSwap(TlbScheme):
+############################################################
+"""
+swap#6664de2a token_wallet1:MsgAddress refund_address:MsgAddress excesses_address:MsgAddress tx_deadline:uint64 cross_swap_body:^[...] = JettonPayload;
+cross_swap#69cf1a5b token_wallet1:MsgAddress refund_address:MsgAddress excesses_address:MsgAddress tx_deadline:uint64 cross_swap_body:^[...] = CustomPayload;
+provide_lp#37c096df token_wallet1:MsgAddress refund_address:MsgAddress excesses_address:MsgAddress tx_deadline:uint64 cross_provide_lp_body:^[...] = JettonPayload;
+pay_to#657b54f5 query_id:uint64 to_address:MsgAddress excesses_address:MsgAddress original_caller:MsgAddress exit_code:uint32 custom_payload:(Maybe ^Cell) additional_info:^[...] = InternalMsgBody;
+burn_notification_ext#297437cf query_id:uint64 jetton_amount:Coins from_address:MsgAddress response_address:MsgAddress maybe_custom_payload:(Maybe ^Cell) = InternalMsgBody;
+refund_me#132b9a2c query_id:uint64 left_maybe_payload:(Maybe ^Cell) right_maybe_payload:(Maybe ^Cell) = InternalMsgBody;
+ton_transfer#01f3835d query_id:uint64 ton_amount:Coins refund_address:MsgAddress forward_payload:(Either Cell ^Cell) = InternalMsgBody;
+"""
+
+# pay_to exit_code values
+STONFI_V2_EXIT_CODES = {
+    0xc64370e5: 'swap_ok',
+    0x45078540: 'swap_ok_ref',
+    0x5ffe1295: 'swap_refund_no_liq',
+    0x38976e9b: 'swap_refund_reserve_err',
+    0x1ec28412: 'swap_refund_tx_expired',
+    0x39603190: 'swap_refund_slippage',
+    0x5f954434: 'swap_refund_0_out',
+    0x365c484d: 'swap_pool_locked',
+    0xa768c0f6: 'swap_fee_out_of_bounds',
+    0xdda48b6a: 'burn_ok',
+    0xde7dbbc2: 'refund_ok',
+}
+
+class StonfiV2MessageSwap(DefiTlbScheme):
     """
     swap#6664de2a token_wallet1:MsgAddress refund_address:MsgAddress excesses_address:MsgAddress tx_deadline:uint64 cross_swap_body:^[min_out:Coins receiver:MsgAddress fwd_gas:Coins custom_payload:(Maybe ^Cell) refund_fwd_gas:Coins refund_payload:(Maybe ^Cell) ref_fee:uint16 ref_address:MsgAddress] = JettonPayload;
     """
@@ -1122,9 +1492,9 @@ class StonfiV2MessageSwap(TlbScheme):
             .store_coins(self.min_out) \
             .store_address(self.receiver) \
             .store_coins(self.fwd_gas)
-        cross_swap_body.store_bit(1).store_ref(self.custom_payload) if self.custom_payload is not None else cross_swap_body.store_bit(0)
+        cross_swap_body.store_bit(1).store_ref(_as_cell(self.custom_payload)) if self.custom_payload is not None else cross_swap_body.store_bit(0)
         cross_swap_body.store_coins(self.refund_fwd_gas)
-        cross_swap_body.store_bit(1).store_ref(self.refund_payload) if self.refund_payload is not None else cross_swap_body.store_bit(0)
+        cross_swap_body.store_bit(1).store_ref(_as_cell(self.refund_payload)) if self.refund_payload is not None else cross_swap_body.store_bit(0)
         cross_swap_body.store_uint(self.ref_fee, 16).store_address(self.ref_address)
         cross_swap_body_cell = cross_swap_body.end_cell()
         
@@ -1144,7 +1514,7 @@ class StonfiV2MessageSwap(TlbScheme):
         if not op == 0x6664de2a:
           raise ValueError(f"Not a StonSwap, unknown operation: {op}")
         token_wallet1=cell_slice.load_address()
-        refund_address=cell_slice.load_address(),
+        refund_address=cell_slice.load_address()
         excesses_address=cell_slice.load_address()
         tx_deadline=cell_slice.load_uint(64)
         cross_swap_body = cell_slice.load_ref().begin_parse()
@@ -1169,8 +1539,356 @@ class StonfiV2MessageSwap(TlbScheme):
                    ref_fee=ref_fee,
                    ref_address=ref_address)
 
+    op = 0x6664de2a
 
-class StonfiV2pTONTransfer(TlbScheme):
+    message_type = PayloadType.jetton
+
+
+class StonfiV2MessageCrossSwap(DefiTlbScheme):
+    """
+    cross_swap#69cf1a5b token_wallet1:MsgAddress refund_address:MsgAddress excesses_address:MsgAddress tx_deadline:uint64 cross_swap_body:^[min_out:Coins receiver:MsgAddress fwd_gas:Coins custom_payload:(Maybe ^Cell) refund_fwd_gas:Coins refund_payload:(Maybe ^Cell) ref_fee:uint16 ref_address:MsgAddress] = CustomPayload;
+    Next hop of multi-hop swap, it is put in custom_payload of swap.
+    """
+    def __init__(self,
+                 token_wallet1: typing.Optional[Address] = None,
+                 refund_address: typing.Optional[Address] = None,
+                 excesses_address: typing.Optional[Address] = None,
+                 tx_deadline: typing.Optional[int] = 0,
+                 min_out: typing.Optional[int] = 0,
+                 receiver: typing.Optional[Address] = None,
+                 fwd_gas: typing.Optional[int] = 0,
+                 custom_payload: typing.Optional[Cell] = None,
+                 refund_fwd_gas: typing.Optional[int] = 0,
+                 refund_payload: typing.Optional[Cell] = None,
+                 ref_fee: typing.Optional[int] = 0,
+                 ref_address: typing.Optional[Address] = None
+                ):
+        if isinstance(token_wallet1, str):
+            token_wallet1 = Address(token_wallet1)
+        if isinstance(refund_address, str):
+            refund_address = Address(refund_address)
+        if isinstance(excesses_address, str):
+            excesses_address = Address(excesses_address)
+        if isinstance(receiver, str):
+            receiver = Address(receiver)
+        if isinstance(ref_address, str):
+            ref_address = Address(ref_address)
+        self.token_wallet1 = token_wallet1
+        self.refund_address = refund_address
+        self.excesses_address = excesses_address
+        self.tx_deadline = tx_deadline
+        self.min_out = min_out
+        self.receiver = receiver
+        self.fwd_gas = fwd_gas
+        self.custom_payload = custom_payload
+        self.refund_fwd_gas = refund_fwd_gas
+        self.refund_payload = refund_payload
+        self.ref_fee = ref_fee
+        self.ref_address = ref_address
+
+    def serialize(self) -> Cell:
+        cross_swap_body = Builder()
+        cross_swap_body \
+            .store_coins(self.min_out) \
+            .store_address(self.receiver) \
+            .store_coins(self.fwd_gas)
+        cross_swap_body.store_bit(1).store_ref(_as_cell(self.custom_payload)) if self.custom_payload is not None else cross_swap_body.store_bit(0)
+        cross_swap_body.store_coins(self.refund_fwd_gas)
+        cross_swap_body.store_bit(1).store_ref(_as_cell(self.refund_payload)) if self.refund_payload is not None else cross_swap_body.store_bit(0)
+        cross_swap_body.store_uint(self.ref_fee, 16).store_address(self.ref_address)
+
+        builder = Builder()
+        builder \
+            .store_uint(0x69cf1a5b, 32) \
+            .store_address(self.token_wallet1) \
+            .store_address(self.refund_address) \
+            .store_address(self.excesses_address) \
+            .store_uint(self.tx_deadline, 64) \
+            .store_ref(cross_swap_body.end_cell())
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0x69cf1a5b:
+            raise ValueError(f"Not a StonfiV2MessageCrossSwap, unknown operation: {op}")
+        token_wallet1 = cell_slice.load_address()
+        refund_address = cell_slice.load_address()
+        excesses_address = cell_slice.load_address()
+        tx_deadline = cell_slice.load_uint(64)
+        cross_swap_body = cell_slice.load_ref().begin_parse()
+        return cls(token_wallet1=token_wallet1,
+                   refund_address=refund_address,
+                   excesses_address=excesses_address,
+                   tx_deadline=tx_deadline,
+                   min_out=cross_swap_body.load_coins(),
+                   receiver=cross_swap_body.load_address(),
+                   fwd_gas=cross_swap_body.load_coins(),
+                   custom_payload=cross_swap_body.load_ref().begin_parse() if cross_swap_body.load_bit() else None,
+                   refund_fwd_gas=cross_swap_body.load_coins(),
+                   refund_payload=cross_swap_body.load_ref().begin_parse() if cross_swap_body.load_bit() else None,
+                   ref_fee=cross_swap_body.load_uint(16),
+                   ref_address=cross_swap_body.load_address())
+
+    op = 0x69cf1a5b
+
+    message_type = PayloadType.jetton
+
+
+class StonfiV2MessageProvideLiquidity(DefiTlbScheme):
+    """
+    provide_lp#37c096df token_wallet1:MsgAddress refund_address:MsgAddress excesses_address:MsgAddress tx_deadline:uint64 cross_provide_lp_body:^[min_lp_out:Coins to_address:MsgAddress both_positive:uint1 fwd_amount:Coins custom_payload:(Maybe ^Cell)] = JettonPayload;
+    """
+    def __init__(self,
+                 token_wallet1: typing.Optional[Address] = None,
+                 refund_address: typing.Optional[Address] = None,
+                 excesses_address: typing.Optional[Address] = None,
+                 tx_deadline: typing.Optional[int] = 0,
+                 min_lp_out: typing.Optional[int] = 0,
+                 to_address: typing.Optional[Address] = None,
+                 both_positive: typing.Optional[int] = 0,
+                 fwd_amount: typing.Optional[int] = 0,
+                 custom_payload: typing.Optional[Cell] = None
+                 ):
+        if isinstance(token_wallet1, str):
+            token_wallet1 = Address(token_wallet1)
+        if isinstance(refund_address, str):
+            refund_address = Address(refund_address)
+        if isinstance(excesses_address, str):
+            excesses_address = Address(excesses_address)
+        if isinstance(to_address, str):
+            to_address = Address(to_address)
+        self.token_wallet1 = token_wallet1
+        self.refund_address = refund_address
+        self.excesses_address = excesses_address
+        self.tx_deadline = tx_deadline
+        self.min_lp_out = min_lp_out
+        self.to_address = to_address
+        self.both_positive = both_positive
+        self.fwd_amount = fwd_amount
+        self.custom_payload = custom_payload
+
+    def serialize(self) -> Cell:
+        body = Builder()
+        body \
+            .store_coins(self.min_lp_out) \
+            .store_address(self.to_address) \
+            .store_uint(self.both_positive, 1) \
+            .store_coins(self.fwd_amount)
+        body.store_bit(1).store_ref(_as_cell(self.custom_payload)) if self.custom_payload is not None else body.store_bit(0)
+
+        builder = Builder()
+        builder \
+            .store_uint(0x37c096df, 32) \
+            .store_address(self.token_wallet1) \
+            .store_address(self.refund_address) \
+            .store_address(self.excesses_address) \
+            .store_uint(self.tx_deadline, 64) \
+            .store_ref(body.end_cell())
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0x37c096df:
+            raise ValueError(f"Not a StonfiV2MessageProvideLiquidity, unknown operation: {op}")
+        token_wallet1 = cell_slice.load_address()
+        refund_address = cell_slice.load_address()
+        excesses_address = cell_slice.load_address()
+        tx_deadline = cell_slice.load_uint(64)
+        body = cell_slice.load_ref().begin_parse()
+        return cls(token_wallet1=token_wallet1,
+                   refund_address=refund_address,
+                   excesses_address=excesses_address,
+                   tx_deadline=tx_deadline,
+                   min_lp_out=body.load_coins(),
+                   to_address=body.load_address(),
+                   both_positive=body.load_uint(1),
+                   fwd_amount=body.load_coins(),
+                   custom_payload=body.load_ref().begin_parse() if body.load_bit() else None)
+
+    op = 0x37c096df
+
+    message_type = PayloadType.jetton
+
+
+class StonfiV2MessagePayTo(DefiTlbScheme):
+    """
+    pay_to#657b54f5 query_id:uint64 to_address:MsgAddress excesses_address:MsgAddress original_caller:MsgAddress exit_code:uint32 custom_payload:(Maybe ^Cell) additional_info:^[fwd_ton_amount:Coins amount0_out:Coins token0_address:MsgAddress amount1_out:Coins token1_address:MsgAddress] = InternalMsgBody;
+    Pool to router: pay out swap result, refund or liquidity withdrawal, see STONFI_V2_EXIT_CODES.
+    """
+    def __init__(self,
+                 query_id: typing.Optional[int] = 0,
+                 to_address: typing.Optional[Address] = None,
+                 excesses_address: typing.Optional[Address] = None,
+                 original_caller: typing.Optional[Address] = None,
+                 exit_code: typing.Optional[int] = 0,
+                 custom_payload: typing.Optional[Cell] = None,
+                 fwd_ton_amount: typing.Optional[int] = 0,
+                 amount0_out: typing.Optional[int] = 0,
+                 token0_address: typing.Optional[Address] = None,
+                 amount1_out: typing.Optional[int] = 0,
+                 token1_address: typing.Optional[Address] = None
+                 ):
+        if isinstance(to_address, str):
+            to_address = Address(to_address)
+        if isinstance(excesses_address, str):
+            excesses_address = Address(excesses_address)
+        if isinstance(original_caller, str):
+            original_caller = Address(original_caller)
+        if isinstance(token0_address, str):
+            token0_address = Address(token0_address)
+        if isinstance(token1_address, str):
+            token1_address = Address(token1_address)
+        self.query_id = query_id
+        self.to_address = to_address
+        self.excesses_address = excesses_address
+        self.original_caller = original_caller
+        self.exit_code = exit_code
+        self.custom_payload = custom_payload
+        self.fwd_ton_amount = fwd_ton_amount
+        self.amount0_out = amount0_out
+        self.token0_address = token0_address
+        self.amount1_out = amount1_out
+        self.token1_address = token1_address
+
+    def serialize(self) -> Cell:
+        additional_info = Builder()
+        additional_info \
+            .store_coins(self.fwd_ton_amount) \
+            .store_coins(self.amount0_out) \
+            .store_address(self.token0_address) \
+            .store_coins(self.amount1_out) \
+            .store_address(self.token1_address)
+
+        builder = Builder()
+        builder \
+            .store_uint(0x657b54f5, 32) \
+            .store_uint(self.query_id, 64) \
+            .store_address(self.to_address) \
+            .store_address(self.excesses_address) \
+            .store_address(self.original_caller) \
+            .store_uint(self.exit_code, 32)
+        builder.store_bit(1).store_ref(_as_cell(self.custom_payload)) if self.custom_payload is not None else builder.store_bit(0)
+        builder.store_ref(additional_info.end_cell())
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0x657b54f5:
+            raise ValueError(f"Not a StonfiV2MessagePayTo, unknown operation: {op}")
+        query_id = cell_slice.load_uint(64)
+        to_address = cell_slice.load_address()
+        excesses_address = cell_slice.load_address()
+        original_caller = cell_slice.load_address()
+        exit_code = cell_slice.load_uint(32)
+        custom_payload = cell_slice.load_ref().begin_parse() if cell_slice.load_bit() else None
+        additional_info = cell_slice.load_ref().begin_parse()
+        return cls(query_id=query_id,
+                   to_address=to_address,
+                   excesses_address=excesses_address,
+                   original_caller=original_caller,
+                   exit_code=exit_code,
+                   custom_payload=custom_payload,
+                   fwd_ton_amount=additional_info.load_coins(),
+                   amount0_out=additional_info.load_coins(),
+                   token0_address=additional_info.load_address(),
+                   amount1_out=additional_info.load_coins(),
+                   token1_address=additional_info.load_address())
+
+    op = 0x657b54f5
+
+    message_type = PayloadType.internal
+
+
+class StonfiV2MessageBurnNotification(DefiTlbScheme):
+    """
+    burn_notification_ext#297437cf query_id:uint64 jetton_amount:Coins from_address:MsgAddress response_address:MsgAddress maybe_custom_payload:(Maybe ^Cell) = InternalMsgBody;
+    LP wallet to pool: LP tokens burned to withdraw liquidity.
+    """
+    def __init__(self,
+                 query_id: typing.Optional[int] = 0,
+                 jetton_amount: typing.Optional[int] = 0,
+                 from_address: typing.Optional[Address] = None,
+                 response_address: typing.Optional[Address] = None,
+                 custom_payload: typing.Optional[Cell] = None
+                 ):
+        if isinstance(from_address, str):
+            from_address = Address(from_address)
+        if isinstance(response_address, str):
+            response_address = Address(response_address)
+        self.query_id = query_id
+        self.jetton_amount = jetton_amount
+        self.from_address = from_address
+        self.response_address = response_address
+        self.custom_payload = custom_payload
+
+    def serialize(self) -> Cell:
+        builder = Builder()
+        builder \
+            .store_uint(0x297437cf, 32) \
+            .store_uint(self.query_id, 64) \
+            .store_coins(self.jetton_amount) \
+            .store_address(self.from_address) \
+            .store_address(self.response_address)
+        builder.store_bit(1).store_ref(_as_cell(self.custom_payload)) if self.custom_payload is not None else builder.store_bit(0)
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0x297437cf:
+            raise ValueError(f"Not a StonfiV2MessageBurnNotification, unknown operation: {op}")
+        return cls(query_id=cell_slice.load_uint(64),
+                   jetton_amount=cell_slice.load_coins(),
+                   from_address=cell_slice.load_address(),
+                   response_address=cell_slice.load_address(),
+                   custom_payload=cell_slice.load_ref().begin_parse() if cell_slice.load_bit() else None)
+
+    op = 0x297437cf
+
+    message_type = PayloadType.internal
+
+
+class StonfiV2MessageRefundMe(DefiTlbScheme):
+    """
+    refund_me#132b9a2c query_id:uint64 left_maybe_payload:(Maybe ^Cell) right_maybe_payload:(Maybe ^Cell) = InternalMsgBody;
+    LP account owner to LP account: return liquidity provided for only one side of the pool.
+    """
+    def __init__(self,
+                 query_id: typing.Optional[int] = 0,
+                 left_payload: typing.Optional[Cell] = None,
+                 right_payload: typing.Optional[Cell] = None
+                 ):
+        self.query_id = query_id
+        self.left_payload = left_payload
+        self.right_payload = right_payload
+
+    def serialize(self) -> Cell:
+        builder = Builder()
+        builder \
+            .store_uint(0x132b9a2c, 32) \
+            .store_uint(self.query_id, 64)
+        builder.store_bit(1).store_ref(_as_cell(self.left_payload)) if self.left_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.right_payload)) if self.right_payload is not None else builder.store_bit(0)
+        return builder.end_cell()
+
+    @classmethod
+    def deserialize(cls, cell_slice: Slice):
+        op = cell_slice.load_uint(32)
+        if not op == 0x132b9a2c:
+            raise ValueError(f"Not a StonfiV2MessageRefundMe, unknown operation: {op}")
+        return cls(query_id=cell_slice.load_uint(64),
+                   left_payload=cell_slice.load_ref().begin_parse() if cell_slice.load_bit() else None,
+                   right_payload=cell_slice.load_ref().begin_parse() if cell_slice.load_bit() else None)
+
+    op = 0x132b9a2c
+
+    message_type = PayloadType.internal
+
+
+class StonfiV2pTONTransfer(DefiTlbScheme):
     """
     ton_transfer#01f3835d query_id:uint64 ton_amount:Coins refund_address:MsgAddress forward_payload:(Either Cell ^Cell) = InternalMsgBody;
     """
@@ -1195,7 +1913,7 @@ class StonfiV2pTONTransfer(TlbScheme):
             .store_uint(self.query_id, 64) \
             .store_coins(self.ton_amount) \
             .store_address(self.refund_address)
-        builder.store_bit(1).store_ref(self.forward_payload) if self.forward_payload is not None else builder.store_bit(0)
+        builder.store_bit(1).store_ref(_as_cell(self.forward_payload)) if self.forward_payload is not None else builder.store_bit(0)
         return builder.end_cell()
 
     @classmethod
@@ -1206,13 +1924,13 @@ class StonfiV2pTONTransfer(TlbScheme):
         return cls(query_id=cell_slice.load_uint(64),
                    ton_amount=cell_slice.load_coins(),
                    refund_address=cell_slice.load_address(),
-                   forward_payload=cell_slice.load_cell() if cell_slice.load_bit() else None)
+                   forward_payload=cell_slice.load_ref().begin_parse() if cell_slice.load_bit() else None)
 
     op = 0x01f3835d
 
     message_type = PayloadType.internal
 ############################################################
-class TonstakersDeposit(TlbScheme):
+class TonstakersDeposit(DefiTlbScheme):
     """
     deposit#47d54391 query_id:uint64 = InternalMsgBody;
     """
@@ -1242,7 +1960,7 @@ class TonstakersDeposit(TlbScheme):
 
 
 ############################################################
-class TonstakersBurnPayload(TlbScheme):
+class TonstakersBurnPayload(DefiTlbScheme):
     """
     waitTillRoundEnd:(## 1) fillOrKill:(## 1) = JettonPayload;
     """
@@ -1271,7 +1989,7 @@ class TonstakersBurnPayload(TlbScheme):
                    fill_or_kill=fill_or_kill)
 
 ############################################################
-class ToncoV3Swap(TlbScheme):
+class ToncoV3Swap(DefiTlbScheme):
     """
     POOLV3_SWAP#a7fb58f8 
     query_id:uint64
@@ -1334,10 +2052,10 @@ class ToncoV3Swap(TlbScheme):
         builder_payloads \
             .store_address(self.target_address) \
             .store_coins(self.ok_forward_amount)
-        builder_payloads.store_bit(1).store_ref(self.ok_forward_payload) if self.ok_forward_payload is not None else builder_payloads.store_bit(0)
+        builder_payloads.store_bit(1).store_ref(_as_cell(self.ok_forward_payload)) if self.ok_forward_payload is not None else builder_payloads.store_bit(0)
         builder_payloads \
             .store_coins(self.ret_forward_amount)
-        builder_payloads.store_bit(1).store_ref(self.ret_forward_payload) if self.ret_forward_payload is not None else builder_payloads.store_bit(0)
+        builder_payloads.store_bit(1).store_ref(_as_cell(self.ret_forward_payload)) if self.ret_forward_payload is not None else builder_payloads.store_bit(0)
 
         builder \
             .store_uint(0xa7fb58f8, 32) \
@@ -1383,6 +2101,7 @@ class ToncoV3Swap(TlbScheme):
 ############################################################
 known_internal_opcodes = {}
 known_jetton_opcodes = {}
+known_external_opcodes = {}
 
 import inspect, sys
 
@@ -1397,6 +2116,33 @@ for name, obj in inspect.getmembers(sys.modules[__name__]):
             if obj.op in known_jetton_opcodes:
                 raise ValueError(f"Duplicate opcode for jetton payload {obj.op} found in {obj} and {known_jetton_opcodes[obj.op]}")
             known_jetton_opcodes[obj.op] = obj
+        elif obj.message_type == PayloadType.external:
+            if obj.op in known_external_opcodes:
+                raise ValueError(f"Duplicate opcode for external {obj.op} found in {obj} and {known_external_opcodes[obj.op]}")
+            known_external_opcodes[obj.op] = obj
+
+# registries are read-only after import, so they can be shared by threads without locks
+known_internal_opcodes = MappingProxyType(known_internal_opcodes)
+known_jetton_opcodes = MappingProxyType(known_jetton_opcodes)
+known_external_opcodes = MappingProxyType(known_external_opcodes)
+
+
+def deserialize_body(cell_slice: Slice, opcodes: typing.Optional[dict] = None):
+    """
+    Deserializes message body with the class registered for its opcode.
+    Looks up known_internal_opcodes and then known_jetton_opcodes unless opcodes is given.
+    Returns None if body is too short or opcode is unknown.
+    """
+    if cell_slice.remaining_bits < 32:
+        return None
+    op = cell_slice.preload_uint(32)
+    if opcodes is not None:
+        cls = opcodes.get(op)
+    else:
+        cls = known_internal_opcodes.get(op) or known_jetton_opcodes.get(op)
+    if cls is None:
+        return None
+    return cls.deserialize(cell_slice)
 
 
 ############################################################
@@ -1425,6 +2171,9 @@ Dedust.Payout = DedustMessagePayout
 Dedust.JettonPayloadSwap = DedustJettonPayloadSwap
 Dedust.JettonPayloadDepositLiquidity = DedustJettonPayloadDepositLiquidity
 Dedust.CancelDeposit = DedustMessageCancelDeposit
+Dedust.SwapEvent = DedustEventSwap
+Dedust.DepositEvent = DedustEventDeposit
+Dedust.WithdrawalEvent = DedustEventWithdrawal
 
 Stonfi = SimpleNamespace()
 Stonfi.Swap = StonfiMessageSwap
@@ -1436,6 +2185,12 @@ Stonfi.SwapErrorReserveError = StonfiMessageSwapErrorReserveError
 
 StonfiV2 = SimpleNamespace()
 StonfiV2.Swap = StonfiV2MessageSwap
+StonfiV2.CrossSwap = StonfiV2MessageCrossSwap
+StonfiV2.ProvideLiquidity = StonfiV2MessageProvideLiquidity
+StonfiV2.PayTo = StonfiV2MessagePayTo
+StonfiV2.BurnNotification = StonfiV2MessageBurnNotification
+StonfiV2.RefundMe = StonfiV2MessageRefundMe
+StonfiV2.EXIT_CODES = STONFI_V2_EXIT_CODES
 StonfiV2.pTON = SimpleNamespace()
 StonfiV2.pTON.Transfer = StonfiV2pTONTransfer
 
@@ -0,0 +1,156 @@
+import base64
+import functools
+import inspect
+import json
+import typing
+from enum import Enum
+
+from pytoniq_core import TlbScheme
+from pytoniq_core import Cell, Slice, Address
+
+from .defi import DedustAsset, known_jetton_opcodes, deserialize_body
+
+############################################################
+# dict / JSON lines export
+############################################################
+
+ADDRESS_FORMATS = ('raw', 'bounceable', 'non_bounceable')
+
+# Coins, VarUInteger and uint64+ fields, exported as strings with amounts_as_str (may not fit JSON numbers)
+AMOUNT_FIELDS = frozenset((
+    'query_id', 'amount', 'amount0', 'amount1', 'amount_in', 'amount_out', 'amount0_out', 'amount1_out',
+    'forward_ton_amount', 'fwd_ton_amount', 'fwd_amount', 'fwd_gas', 'refund_fwd_gas', 'ok_forward_amount',
+    'ret_forward_amount', 'jetton_amount', 'ton_amount', 'min_out', 'min_lp_out', 'min_lp_amount', 'limit',
+    'liquidity', 'reserve0', 'reserve1', 'asset0_target_balance', 'asset1_target_balance', 'tx_deadline',
+    'sqrtPriceLimitX96',
+))
+
+
+@functools.lru_cache(maxsize=65536)
+def _format_address(address: Address, address_format: str) -> str:
+    if address_format == 'raw':
+        return address.to_str(is_user_friendly=False)
+    return address.to_str(is_user_friendly=True, is_url_safe=True, is_bounceable=address_format == 'bounceable')
+
+
+@functools.lru_cache(maxsize=None)
+def _fields(cls) -> typing.Tuple[typing.Tuple[str, str], ...]:
+    # (key, attribute) pairs are taken once per class from __init__ signature, key drops trailing "_" (from_ -> from)
+    parameters = list(inspect.signature(cls.__init__).parameters)[1:]
+    return tuple((name.rstrip('_'), name) for name in parameters)
+
+
+@functools.lru_cache(maxsize=None)
+def _amount_attributes(cls) -> frozenset:
+    return frozenset(attribute for _, attribute in _fields(cls) if attribute in AMOUNT_FIELDS)
+
+
+@functools.lru_cache(maxsize=None)
+def _type_name(cls) -> str:
+    # frozen variants (see frozen.py) are exported under names of their mutable classes
+    return getattr(cls, 'mutable_class', cls).__name__
+
+
+_MISSING = object()
+
+
+class DictExporter:
+    """
+    Converts messages to plain dicts ready for JSON.
+    address_format: raw, bounceable or non_bounceable
+    amounts_as_str: integers of AMOUNT_FIELDS (amounts, query_ids) are exported as strings, other integers stay numbers
+    decode_payloads: cells with known jetton payload opcodes are exported as nested dicts, other cells as base64 BoC
+    """
+    def __init__(self, address_format: str = 'non_bounceable', amounts_as_str: bool = False, decode_payloads: bool = True):
+        if address_format not in ADDRESS_FORMATS:
+            raise ValueError(f"Unknown address format: {address_format}, expected one of {ADDRESS_FORMATS}")
+        self.address_format = address_format
+        self.amounts_as_str = amounts_as_str
+        self.decode_payloads = decode_payloads
+        # exporters are shared between threads (get_exporter): base converters are never changed,
+        # cache of converters by exact type is only read with get and written with single assignments
+        self._base_converters = (
+            (type(None), None),
+            (bool, None),
+            (str, None),
+            (int, None),
+            (Address, self._address),
+            (Cell, self._cell),
+            (Slice, self._slice),
+        )
+        self._converters = dict(self._base_converters)
+
+    def _address(self, address: Address) -> str:
+        return _format_address(address, self.address_format)
+
+    def _cell(self, cell: Cell):
+        if self.decode_payloads:
+            try:
+                payload = deserialize_body(cell.begin_parse(), known_jetton_opcodes)
+            except Exception:
+                payload = None
+            if payload is not None:
+                return self.to_dict(payload)
+        return base64.b64encode(cell.to_boc()).decode()
+
+    def _slice(self, cell_slice: Slice):
+        return self._cell(cell_slice.to_cell())
+
+    def _convert(self, value):
+        if isinstance(value, TlbScheme):
+            return self.to_dict(value)
+        if isinstance(value, Enum):
+            return value.name
+        for cls, converter in self._base_converters:
+            if isinstance(value, cls):
+                self._converters[type(value)] = converter
+                return value if converter is None else converter(value)
+        return str(value)
+
+    def to_dict(self, message: TlbScheme) -> dict:
+        cls = type(message)
+        result = {'@type': _type_name(cls)}
+        converters = self._converters
+        amounts = _amount_attributes(cls) if self.amounts_as_str else ()
+        asset = isinstance(message, DedustAsset)
+        for key, attribute in _fields(cls):
+            value = getattr(message, attribute)
+            if amounts and attribute in amounts and type(value) is int:
+                result[key] = str(value)
+                continue
+            if asset and attribute == 'address':
+                value = message.to_address()  # hash part of jetton minter address
+            converter = converters.get(type(value), _MISSING)
+            if converter is _MISSING:
+                result[key] = self._convert(value)
+            else:
+                result[key] = value if converter is None else converter(value)
+        return result
+
+
+@functools.lru_cache(maxsize=32)
+def get_exporter(address_format: str = 'non_bounceable', amounts_as_str: bool = False, decode_payloads: bool = True) -> DictExporter:
+    return DictExporter(address_format, amounts_as_str, decode_payloads)
+
+
+def to_dict(message: TlbScheme, address_format: str = 'non_bounceable', amounts_as_str: bool = False, decode_payloads: bool = True) -> dict:
+    return get_exporter(address_format, amounts_as_str, decode_payloads).to_dict(message)
+
+
+def write_jsonl(messages: typing.Iterable[TlbScheme],
+                fp: typing.TextIO,
+                address_format: str = 'non_bounceable',
+                amounts_as_str: bool = False,
+                decode_payloads: bool = True
+                ) -> int:
+    """
+    Writes one JSON object per line, returns number of written messages
+    """
+    exporter = get_exporter(address_format, amounts_as_str, decode_payloads)
+    encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    count = 0
+    for message in messages:
+        fp.write(encode(exporter.to_dict(message)))
+        fp.write('\n')
+        count += 1
+    return count
@@ -0,0 +1,129 @@
+import typing
+from collections import OrderedDict
+from enum import Enum
+
+from pytoniq_core import TlbScheme
+from pytoniq_core import Cell, Slice, Address
+from pytoniq_core.tlb.config import MsgForwardPrices
+
+############################################################
+# Cell footprint and forward fees
+############################################################
+"""
+msg_forward_prices#ea lump_price:uint64 bit_price:uint64 cell_price:uint64
+  ihr_price_factor:uint32 first_frac:uint16 next_frac:uint16 = MsgForwardPrices;
+
+fwd_fee = lump_price + ceil((bit_price * bits + cell_price * cells) / 2^16)
+"""
+
+
+class CellFootprint:
+    """
+    Unique cells count, their total data bits and refs, and depth of the cell tree
+    """
+    def __init__(self, cells: int = 0, bits: int = 0, refs: int = 0, depth: int = 0):
+        self.cells = cells
+        self.bits = bits
+        self.refs = refs
+        self.depth = depth
+
+    def __repr__(self):
+        return f'<CellFootprint cells: {self.cells} bits: {self.bits} refs: {self.refs} depth: {self.depth}>'
+
+
+def cell_footprint(cell: typing.Union[Cell, Slice]) -> CellFootprint:
+    """
+    Footprint of cell tree, cells with equal hashes are counted once (as in TON message size)
+    """
+    if isinstance(cell, Slice):
+        cell = cell.to_cell()
+    seen = {cell}
+    stack = [cell]
+    bits = refs = 0
+    while stack:
+        c = stack.pop()
+        bits += len(c.bits)
+        refs += len(c.refs)
+        for ref in c.refs:
+            if ref not in seen:
+                seen.add(ref)
+                stack.append(ref)
+    return CellFootprint(cells=len(seen), bits=bits, refs=refs, depth=cell.get_depth())
+
+
+def forward_fee(prices: MsgForwardPrices, cells: int, bits: int) -> int:
+    # integer ceil, float division loses precision above 2**53
+    return prices.lump_price + ((prices.bit_price * bits + prices.cell_price * cells + 0xffff) >> 16)
+
+
+_uncacheable = object()
+
+
+def _shape(value):
+    # everything serialized size depends on: lengths of integers (Coins), kinds of addresses, hashes of cells
+    if value is None or isinstance(value, (bool, Enum)):
+        return value
+    if isinstance(value, int):
+        return value.bit_length()
+    if isinstance(value, Address):
+        return Address
+    if isinstance(value, Cell):
+        return value.hash
+    if isinstance(value, Slice):
+        return value.to_cell().hash
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, TlbScheme):
+        shape = message_shape(value)
+        return _uncacheable if shape is None else shape
+    return _uncacheable
+
+
+def message_shape(message: TlbScheme) -> typing.Optional[tuple]:
+    """
+    Key of message serialized size, messages with equal shapes have equal footprints.
+    Returns None if message has fields of unknown types.
+    """
+    shape = [type(message)]
+    for value in message.__dict__.values():
+        value_shape = _shape(value)
+        if value_shape is _uncacheable:
+            return None
+        shape.append(value_shape)
+    return tuple(shape)
+
+
+class ForwardFeeEstimator:
+    """
+    Prices messages with forward fee formula from config param 24 (masterchain) or 25 (basechain).
+    Footprints are cached by message shape, so a batch of similar messages is serialized once per shape,
+    least recently used shape is evicted when cache is full.
+    Messages are priced as if body is stored in a ref of message cell, so all body cells are counted.
+    """
+    def __init__(self, prices: MsgForwardPrices, cache_size: int = 4096):
+        self.prices = prices
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def footprint(self, message: typing.Union[TlbScheme, Cell, Slice]) -> CellFootprint:
+        if isinstance(message, (Cell, Slice)):
+            return cell_footprint(message)
+        shape = message_shape(message)
+        if shape is None:
+            return cell_footprint(message.serialize())
+        result = self._cache.get(shape)
+        if result is None:
+            result = cell_footprint(message.serialize())
+            if len(self._cache) >= self.cache_size:
+                self._cache.popitem(last=False)
+            self._cache[shape] = result
+        else:
+            self._cache.move_to_end(shape)
+        return result
+
+    def forward_fee(self, message: typing.Union[TlbScheme, Cell, Slice]) -> int:
+        footprint = self.footprint(message)
+        return forward_fee(self.prices, footprint.cells, footprint.bits)
+
+    def forward_fees(self, messages: typing.Iterable[typing.Union[TlbScheme, Cell, Slice]]) -> typing.List[int]:
+        return [self.forward_fee(message) for message in messages]
@@ -0,0 +1,164 @@
+import typing
+
+from pytoniq_core import Cell, Slice
+
+from .defi import (JettonTransfer, StonfiV2MessageSwap, StonfiV2MessagePayTo, StonfiV2pTONTransfer,
+                   STONFI_V2_EXIT_CODES, deserialize_body, known_jetton_opcodes)
+from .transaction import TransactionRecord
+
+############################################################
+# Ston.fi v2 fills
+############################################################
+
+SWAP_OK_CODES = frozenset(code for code, name in STONFI_V2_EXIT_CODES.items() if name.startswith('swap_ok'))
+
+
+class StonfiV2Fill:
+    """
+    Swap joined with pay_to sent by pool for it.
+    filled is False for refunds, amount_out is the paid amount (of whichever token is paid),
+    amount_in is the amount of transfer that carried the swap (0 if swap was added without it).
+    """
+    __slots__ = ('query_id', 'swap', 'pay_to', 'context', 'amount_in')
+
+    def __init__(self, query_id: int, swap: StonfiV2MessageSwap, pay_to: StonfiV2MessagePayTo, context=None,
+                 amount_in: int = 0):
+        self.query_id = query_id
+        self.swap = swap
+        self.pay_to = pay_to
+        self.context = context
+        self.amount_in = amount_in
+
+    @property
+    def filled(self) -> bool:
+        return self.pay_to.exit_code in SWAP_OK_CODES
+
+    @property
+    def amount_out(self) -> int:
+        return self.pay_to.amount0_out or self.pay_to.amount1_out
+
+    @property
+    def status(self) -> str:
+        return STONFI_V2_EXIT_CODES.get(self.pay_to.exit_code, hex(self.pay_to.exit_code))
+
+    def __repr__(self):
+        return (f'<StonfiV2Fill query_id: {self.query_id} {self.status} amount_in: {self.amount_in} '
+                f'amount_out: {self.amount_out} context: {self.context}>')
+
+
+def _swap_payload(payload) -> typing.Optional[StonfiV2MessageSwap]:
+    if isinstance(payload, StonfiV2MessageSwap):
+        return payload
+    if isinstance(payload, Cell):
+        payload = payload.begin_parse()
+    elif isinstance(payload, Slice):
+        payload = payload.copy()
+    else:
+        return None
+    if payload.remaining_bits < 32 or payload.preload_uint(32) != StonfiV2MessageSwap.op:
+        return None
+    return deserialize_body(payload, known_jetton_opcodes)
+
+
+class StonfiV2FillTracker:
+    """
+    Joins Ston.fi v2 swaps with pay_to results by query_id.
+    Swaps are taken from JettonTransfer / pTON transfers with StonfiV2MessageSwap forward payload
+    (query_id of transfer is kept by jetton wallets and router up to pay_to).
+    pay_to seen before its swap is kept until the swap arrives, so traces may be processed in any order.
+    Swaps are dropped deadline_grace seconds after their tx_deadline (the refund for an expired swap
+    arrives after the deadline) and any entry after max_age seconds (see expire),
+    times are unixtimes passed as now (transaction time in process_transaction).
+    Query ids should be unique among tracked swaps, see QueryIdAllocator.
+    """
+    def __init__(self, max_age: float = 3600, expire_interval: float = 60, deadline_grace: float = 600):
+        self.max_age = max_age
+        self.deadline_grace = deadline_grace
+        self.expire_interval = expire_interval
+        self.pending = {}  # query_id -> (swap, context, seen at, amount_in)
+        self.unmatched = {}  # query_id -> (pay_to, seen at)
+        self._expired_at = None
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add_swap(self, query_id: int, swap: StonfiV2MessageSwap, context=None, now: float = 0, amount_in: int = 0
+                 ) -> typing.Optional[StonfiV2Fill]:
+        entry = self.unmatched.pop(query_id, None)
+        if entry is not None:
+            return StonfiV2Fill(query_id, swap, entry[0], context, amount_in)
+        self.pending[query_id] = (swap, context, now, amount_in)
+        return None
+
+    def add_transfer(self, transfer: typing.Union[JettonTransfer, StonfiV2pTONTransfer], context=None, now: float = 0
+                     ) -> typing.Optional[StonfiV2Fill]:
+        """
+        Tracks transfer if it carries Ston.fi v2 swap, returns fill if pay_to was already seen
+        """
+        swap = _swap_payload(transfer.forward_payload)
+        if swap is None:
+            return None
+        amount_in = transfer.ton_amount if isinstance(transfer, StonfiV2pTONTransfer) else transfer.amount
+        return self.add_swap(transfer.query_id, swap, context, now, amount_in)
+
+    def add_pay_to(self, pay_to: StonfiV2MessagePayTo, now: float = 0) -> typing.Optional[StonfiV2Fill]:
+        entry = self.pending.pop(pay_to.query_id, None)
+        if entry is None:
+            self.unmatched[pay_to.query_id] = (pay_to, now)
+            return None
+        return StonfiV2Fill(pay_to.query_id, entry[0], pay_to, entry[1], entry[3])
+
+    def process(self, body, context=None, now: float = 0) -> typing.Optional[StonfiV2Fill]:
+        """
+        Dispatches decoded message body, other bodies are ignored
+        """
+        if isinstance(body, StonfiV2MessagePayTo):
+            return self.add_pay_to(body, now)
+        if isinstance(body, (JettonTransfer, StonfiV2pTONTransfer)):
+            return self.add_transfer(body, context, now)
+        return None
+
+    def process_many(self, bodies: typing.Iterable[typing.Any], now: float = 0) -> typing.List[StonfiV2Fill]:
+        process = self.process
+        fills = []
+        for body in bodies:
+            fill = process(body, None, now)
+            if fill is not None:
+                fills.append(fill)
+        return fills
+
+    def process_transaction(self, record: TransactionRecord) -> typing.List[StonfiV2Fill]:
+        """
+        Processes in_msg of transaction: every message of a trace is in_msg of exactly one transaction,
+        while out_msgs would be seen again as in_msgs of their receivers.
+        Expires entries every expire_interval seconds of transaction time.
+        """
+        if self._expired_at is None or record.now - self._expired_at >= self.expire_interval:
+            self.expire(record.now)
+        if record.in_msg is None or record.in_msg.body is None:
+            return []
+        fill = self.process(record.in_msg.body, None, record.now)
+        return [fill] if fill is not None else []
+
+    def expire(self, now: float) -> int:
+        """
+        Drops swaps past tx_deadline + deadline_grace and entries seen more than max_age seconds before now,
+        returns number of dropped entries
+        """
+        self._expired_at = now
+        oldest = now - self.max_age
+        expired = [query_id for query_id, (swap, context, seen, amount_in) in self.pending.items()
+                   if seen < oldest or 0 < swap.tx_deadline < now - self.deadline_grace]
+        for query_id in expired:
+            del self.pending[query_id]
+        unmatched = [query_id for query_id, (pay_to, seen) in self.unmatched.items() if seen < oldest]
+        for query_id in unmatched:
+            del self.unmatched[query_id]
+        return len(expired) + len(unmatched)
+
+    def discard(self, query_id: int):
+        """
+        Stops tracking swap (e.g. expired by tx_deadline) and forgets its pay_to
+        """
+        self.pending.pop(query_id, None)
+        self.unmatched.pop(query_id, None)
@@ -0,0 +1,352 @@
+import hashlib
+import typing
+
+from bitarray import bitarray
+from pytoniq_core import Cell, Address
+from pytoniq_core.boc.tvm_bitarray import TvmBitarray
+from pytoniq_core.boc.slice import Slice
+from pytoniq_core.crypto.crc import crc32c
+
+from .defi import JettonTransfer, JettonTransferNotification, JettonExcesses, deserialize_body
+
+############################################################
+# Flat shape BoC decoding
+############################################################
+"""
+serialized_boc#b5ee9c72 has_idx:(## 1) has_crc32c:(## 1)
+  has_cache_bits:(## 1) flags:(## 2) { flags = 0 }
+  size:(## 3) { size <= 4 }
+  off_bytes:(## 8) { off_bytes <= 8 }
+  cells:(##(size * 8))
+  roots:(##(size * 8)) { roots >= 1 }
+  absent:(##(size * 8)) { roots + absent <= cells }
+  tot_cells_size:(##(off_bytes * 8))
+  root_list:(roots * ##(size * 8))
+  index:has_idx?(cells * ##(off_bytes * 8))
+  cell_data:(tot_cells_size * [ uint8 ])
+  crc32c:has_crc32c?uint32
+  = BagOfCells;
+"""
+
+BOC_MAGIC = b'\xb5\xee\x9c\x72'
+
+
+def parse_flat_boc(data: typing.Union[bytes, bytearray, memoryview], verify_crc: bool = False
+                   ) -> typing.Optional[typing.Tuple[bytes, int, list]]:
+    """
+    Parses single root BoC of ordinary root cell whose refs have no refs themselves.
+    Returns (root data, root bit length, [(ref data, ref bit length), ...]) or None for any other shape,
+    data is cut without completion tag bits.
+    crc32c is not verified by default: it is computed in pure python and costs more than the decoding itself.
+    """
+    view = memoryview(data)
+    if len(view) < 6 or view[:4] != BOC_MAGIC:
+        return None
+    flags = view[4]
+    size = flags & 7
+    off_bytes = view[5]
+    i = 6
+    if not size or len(view) < i + 3 * size + off_bytes:
+        return None
+    cells_num = int.from_bytes(view[i: i + size], 'big')
+    roots_num = int.from_bytes(view[i + size: i + 2 * size], 'big')
+    absent_num = int.from_bytes(view[i + 2 * size: i + 3 * size], 'big')
+    i += 3 * size
+    tot_cells_size = int.from_bytes(view[i: i + off_bytes], 'big')
+    i += off_bytes
+    if roots_num != 1 or absent_num or cells_num > 5:
+        return None
+    root_index = int.from_bytes(view[i: i + size], 'big')
+    i += size
+    if root_index:
+        return None
+    if flags & 128:
+        i += cells_num * off_bytes
+    end = i + tot_cells_size
+    if flags & 64:
+        if len(view) != end + 4:
+            return None
+        if verify_crc and crc32c(bytes(view[:end])) != view[end:]:
+            return None
+    elif len(view) != end:
+        return None
+    cells = []
+    for _ in range(cells_num):
+        if i + 2 > end:
+            return None
+        refs_descriptor = view[i]
+        bits_descriptor = view[i + 1]
+        if refs_descriptor & (8 | 16 | 0xe0):
+            return None  # exotic, with hashes or non-zero level
+        data_size = (bits_descriptor >> 1) + (bits_descriptor & 1)
+        i += 2
+        cell_data = bytes(view[i: i + data_size])
+        i += data_size
+        bit_length = data_size * 8
+        if bits_descriptor & 1:
+            if not cell_data or not cell_data[-1]:
+                return None
+            last = cell_data[-1]
+            bit_length -= (last & -last).bit_length()
+        refs_num = refs_descriptor & 7
+        refs = [int.from_bytes(view[i + r * size: i + (r + 1) * size], 'big') for r in range(refs_num)]
+        i += refs_num * size
+        cells.append((cell_data, bit_length, refs))
+    if i != end:
+        return None
+    root_data, root_bits, root_refs = cells[0]
+    if set(root_refs) != set(range(1, cells_num)):
+        return None  # same ref may be stored twice, e.g. equal custom and forward payloads
+    refs = []
+    for index in root_refs:
+        ref_data, ref_bits, ref_refs = cells[index]
+        if ref_refs:
+            return None
+        refs.append((ref_data, ref_bits))
+    return root_data, root_bits, refs
+
+
+def boc_root_data(data: typing.Union[bytes, bytearray, memoryview]) -> typing.Optional[typing.Tuple[bytes, int]]:
+    """
+    (data, bit length) of root of single root BoC whose root is an ordinary first cell, refs are not parsed.
+    None for other BoCs.
+    """
+    view = memoryview(data)
+    if len(view) < 6 or view[:4] != BOC_MAGIC:
+        return None
+    flags = view[4]
+    size = flags & 7
+    off_bytes = view[5]
+    i = 6 + 3 * size + off_bytes
+    if not size or len(view) < i + size + 2:
+        return None
+    if int.from_bytes(view[6 + size: 6 + 2 * size], 'big') != 1 or int.from_bytes(view[i: i + size], 'big'):
+        return None
+    i += size
+    if flags & 128:
+        i += int.from_bytes(view[6: 6 + size], 'big') * off_bytes
+    if len(view) < i + 2 or view[i] & (8 | 16 | 0xe0):
+        return None
+    bits_descriptor = view[i + 1]
+    data_size = (bits_descriptor >> 1) + (bits_descriptor & 1)
+    i += 2
+    if len(view) < i + data_size:
+        return None
+    cell_data = bytes(view[i: i + data_size])
+    bit_length = data_size * 8
+    if bits_descriptor & 1:
+        if not cell_data or not cell_data[-1]:
+            return None
+        last = cell_data[-1]
+        bit_length -= (last & -last).bit_length()
+    return cell_data, bit_length
+
+
+def boc_root_hash(data: typing.Union[bytes, bytearray, memoryview]) -> typing.Optional[bytes]:
+    """
+    Representation hash of root of single root BoC of ordinary cells, computed from cell bytes without building Cells.
+    None for other BoCs (several roots, exotic cells, stored hashes).
+    """
+    view = memoryview(data)
+    if len(view) < 6 or view[:4] != BOC_MAGIC:
+        return None
+    flags = view[4]
+    size = flags & 7
+    off_bytes = view[5]
+    i = 6 + 3 * size
+    if not size or len(view) < i + off_bytes:
+        return None
+    cells_num = int.from_bytes(view[6: 6 + size], 'big')
+    if int.from_bytes(view[6 + size: 6 + 2 * size], 'big') != 1:
+        return None
+    tot_cells_size = int.from_bytes(view[i: i + off_bytes], 'big')
+    i += off_bytes
+    if int.from_bytes(view[i: i + size], 'big'):
+        return None  # root is not the first cell
+    i += size
+    if flags & 128:
+        i += cells_num * off_bytes
+    end = i + tot_cells_size
+    if len(view) < end:
+        return None
+    cells = []
+    for _ in range(cells_num):
+        if i + 2 > end:
+            return None
+        refs_descriptor = view[i]
+        bits_descriptor = view[i + 1]
+        if refs_descriptor & (8 | 16 | 0xe0):
+            return None
+        data_size = (bits_descriptor >> 1) + (bits_descriptor & 1)
+        refs_num = refs_descriptor & 7
+        representation = bytes(view[i: i + 2 + data_size])
+        i += 2 + data_size
+        refs = [int.from_bytes(view[i + r * size: i + (r + 1) * size], 'big') for r in range(refs_num)]
+        i += refs_num * size
+        cells.append((representation, refs))
+    if i != end:
+        return None
+    # refs always point forward, so cells are hashed from the last one
+    hashes = [b''] * cells_num
+    depths = [0] * cells_num
+    for index in range(cells_num - 1, -1, -1):
+        representation, refs = cells[index]
+        depth = 0
+        for ref in refs:
+            if ref <= index:
+                return None
+            representation += depths[ref].to_bytes(2, 'big')
+            depth = max(depth, depths[ref] + 1)
+        for ref in refs:
+            representation += hashes[ref]
+        depths[index] = depth
+        hashes[index] = hashlib.sha256(representation).digest()
+    return hashes[0]
+
+
+def _bits(data: bytes, start: int, end: int) -> TvmBitarray:
+    bits = bitarray()
+    bits.frombytes(data)
+    return TvmBitarray(1023, bits[start: end])
+
+
+def _ref_slice(ref: typing.Tuple[bytes, int]) -> Slice:
+    return Slice(_bits(ref[0], 0, ref[1]), [])
+
+
+def _ref_cell(ref: typing.Tuple[bytes, int]) -> Cell:
+    return Cell(_bits(ref[0], 0, ref[1]), [])
+
+
+class _Reader:
+    """
+    Reads root cell fields from big int of its data, raises IndexError on anything not handled here
+    """
+    __slots__ = ('value', 'total', 'length', 'position')
+
+    def __init__(self, data: bytes, length: int):
+        self.value = int.from_bytes(data, 'big')
+        self.total = len(data) * 8
+        self.length = length
+        self.position = 32
+
+    def uint(self, bits: int) -> int:
+        self.position += bits
+        if self.position > self.length:
+            raise IndexError
+        return (self.value >> (self.total - self.position)) & ((1 << bits) - 1)
+
+    def coins(self) -> int:
+        return self.uint(self.uint(4) * 8)
+
+    def address_raw(self) -> typing.Optional[typing.Tuple[int, bytes]]:
+        """
+        (workchain, hash part) of addr_std, None for addr_none
+        """
+        tag = self.uint(2)
+        if tag == 0b00:
+            return None
+        if tag != 0b10 or self.uint(1):
+            raise IndexError  # addr_extern, addr_var and anycast are left to generic path
+        wc = self.uint(8)
+        hash_part = self.uint(256)
+        return wc - 256 if wc > 127 else wc, hash_part.to_bytes(32, 'big')
+
+    def address(self) -> typing.Optional[Address]:
+        raw = self.address_raw()
+        return Address(raw) if raw is not None else None
+
+
+def _decode_transfer(data: bytes, length: int, refs: list) -> JettonTransfer:
+    reader = _Reader(data, length)
+    query_id = reader.uint(64)
+    amount = reader.coins()
+    destination = reader.address()
+    response_destination = reader.address()
+    ref = 0
+    custom_payload = None
+    if reader.uint(1):
+        custom_payload = _ref_slice(refs[ref])
+        ref += 1
+    forward_ton_amount = reader.coins()
+    forward_payload = None
+    if reader.uint(1):
+        forward_payload = _ref_slice(refs[ref])
+    return JettonTransfer(query_id=query_id,
+                          amount=amount,
+                          destination=destination,
+                          response_destination=response_destination,
+                          custom_payload=custom_payload,
+                          forward_ton_amount=forward_ton_amount,
+                          forward_payload=forward_payload)
+
+
+def _decode_transfer_notification(data: bytes, length: int, refs: list) -> JettonTransferNotification:
+    reader = _Reader(data, length)
+    query_id = reader.uint(64)
+    amount = reader.coins()
+    sender = reader.address()
+    if reader.uint(1):
+        forward_payload = _ref_slice(refs[0])
+    else:
+        forward_payload = Slice(_bits(data, reader.position, length), [_ref_cell(ref) for ref in refs])
+    return JettonTransferNotification(query_id=query_id,
+                                      amount=amount,
+                                      sender=sender,
+                                      forward_payload=forward_payload)
+
+
+def _decode_excesses(data: bytes, length: int, refs: list) -> JettonExcesses:
+    return JettonExcesses(query_id=_Reader(data, length).uint(64))
+
+
+FLAT_DECODERS = {
+    JettonTransfer.op: (JettonTransfer, _decode_transfer),
+    JettonTransferNotification.op: (JettonTransferNotification, _decode_transfer_notification),
+    JettonExcesses.op: (JettonExcesses, _decode_excesses),
+}
+
+
+def decode_flat(data: typing.Union[bytes, bytearray, memoryview],
+                cls: typing.Optional[type] = None,
+                opcodes: typing.Optional[dict] = None,
+                verify_crc: bool = False):
+    """
+    Fast path of decode_boc only: None if body is not of flat shape, has no flat decoder or is not of cls
+    """
+    parsed = parse_flat_boc(data, verify_crc)
+    if parsed is None:
+        return None
+    root_data, root_bits, refs = parsed
+    if root_bits < 32:
+        return None
+    op = int.from_bytes(root_data[:4], 'big')
+    entry = FLAT_DECODERS.get(op)
+    if entry is None or (cls is not None and entry[0] is not cls) or (opcodes is not None and opcodes.get(op) is not entry[0]):
+        return None
+    try:
+        return entry[1](root_data, root_bits, refs)
+    except IndexError:
+        return None  # field layout not handled here, generic path decodes it or raises
+
+
+def decode_boc(data: typing.Union[bytes, bytearray, memoryview],
+               opcodes: typing.Optional[dict] = None,
+               verify_crc: bool = False):
+    """
+    Decodes message body BoC like deserialize_body(Cell.one_from_boc(data).begin_parse(), opcodes).
+    JettonTransfer, JettonTransferNotification and JettonExcesses of flat shape (root and leaf refs)
+    are read from BoC bytes directly, other bodies go through Cell graph.
+    """
+    message = decode_flat(data, opcodes=opcodes, verify_crc=verify_crc)
+    if message is not None:
+        return message
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    return deserialize_body(Cell.one_from_boc(data).begin_parse(), opcodes)
+
+
+def decode_bocs(items: typing.Iterable[typing.Union[bytes, bytearray, memoryview]],
+                opcodes: typing.Optional[dict] = None,
+                verify_crc: bool = False) -> list:
+    return [decode_boc(data, opcodes, verify_crc) for data in items]
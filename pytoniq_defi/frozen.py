@@ -0,0 +1,152 @@
+import functools
+import typing
+from types import MappingProxyType
+
+from pytoniq_core import Slice
+
+from . import defi
+from .boc_writer import FAST_WRITERS
+from .defi import DefiTlbScheme
+from .flat import boc_root_hash
+
+############################################################
+# Frozen messages
+############################################################
+
+
+class FrozenMessage:
+    """
+    Immutable message: attributes can't be set after construction, nested schemes are frozen too
+    and slice payloads are stored as cells. Equality and hash use representation hash of serialized
+    message (computed on first use and cached), so frozen messages can be set members and cache keys.
+    Classes with own key based equality (DedustAsset, DedustPoolParams) keep it, so frozen and mutable
+    instances stay interchangeable as dict keys.
+    """
+    __slots__ = ('_repr_hash',)
+
+    def __setattr__(self, name, value):
+        if '_thawed' not in self.__dict__:
+            raise AttributeError(f"'{type(self).__name__}' is frozen, use replace()")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' is frozen")
+
+    @property
+    def repr_hash(self) -> bytes:
+        try:
+            return _cached_repr_hash(self, FrozenMessage)  # not self._repr_hash: its miss would decode lazy message
+        except AttributeError:
+            # benign race: threads compute the same value
+            wire = self.__dict__.get('_wire')
+            repr_hash = boc_root_hash(wire) if wire is not None else None  # lazy message stays lazy
+            if repr_hash is None:
+                repr_hash = self.to_boc_with_hash()[1]
+            object.__setattr__(self, '_repr_hash', repr_hash)
+            return repr_hash
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenMessage):
+            return NotImplemented
+        return type(self) is type(other) and self.repr_hash == other.repr_hash
+
+    def __hash__(self):
+        return int.from_bytes(self.repr_hash[:8], 'little')
+
+    def thaw(self) -> DefiTlbScheme:
+        """
+        Mutable copy
+        """
+        return thaw(self)
+
+    def replace(self, **changes) -> "FrozenMessage":
+        """
+        Frozen copy with changed fields
+        """
+        message = thaw(self)
+        for name, value in changes.items():
+            setattr(message, name, value)
+        return freeze(message)
+
+    @classmethod
+    def from_message(cls, message: DefiTlbScheme) -> "FrozenMessage":
+        return freeze(message)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FrozenMessage":
+        return freeze(cls.mutable_class.from_bytes(data))  # fast paths are keyed by mutable classes
+
+
+_cached_repr_hash = FrozenMessage.__dict__['_repr_hash'].__get__
+
+
+def _frozen_init(init):
+    @functools.wraps(init)  # keeps signature, see export._fields
+    def __init__(self, *args, **kwargs):
+        self.__dict__['_thawed'] = True
+        init(self, *args, **kwargs)
+        del self.__dict__['_thawed']
+        _freeze_fields(self.__dict__)
+    return __init__
+
+
+def _freeze_fields(fields: dict):
+    for name, value in fields.items():
+        if isinstance(value, DefiTlbScheme) and not isinstance(value, FrozenMessage):
+            fields[name] = freeze(value)
+        elif isinstance(value, Slice):
+            fields[name] = value.to_cell()
+
+
+FROZEN_CLASSES = {}
+
+for _cls in list(vars(defi).values()):
+    if isinstance(_cls, type) and issubclass(_cls, DefiTlbScheme) and _cls is not DefiTlbScheme:
+        _namespace = {'__module__': __name__, '__init__': _frozen_init(_cls.__init__), 'mutable_class': _cls}
+        if _cls.__eq__ is not DefiTlbScheme.__eq__:
+            _namespace['__eq__'] = _cls.__eq__  # equal frozen and mutable instances must hash equally
+            _namespace['__hash__'] = _cls.__hash__
+        _frozen = type('Frozen' + _cls.__name__, (FrozenMessage, _cls), _namespace)
+        FROZEN_CLASSES[_cls] = _frozen
+        globals()[_frozen.__name__] = _frozen  # importable, so pickle finds it
+        if _cls in FAST_WRITERS:
+            FAST_WRITERS[_frozen] = FAST_WRITERS[_cls]
+
+FROZEN_CLASSES = MappingProxyType(FROZEN_CLASSES)
+
+
+def freeze(message: DefiTlbScheme) -> FrozenMessage:
+    """
+    Frozen copy of message (message itself if it is frozen), fields are shared, nested schemes are frozen.
+    Lazy messages (see DefiTlbScheme.from_wire) stay lazy.
+    """
+    if isinstance(message, FrozenMessage):
+        return message
+    frozen = FROZEN_CLASSES.get(type(message))
+    if frozen is None:
+        raise ValueError(f"No frozen variant of {type(message).__name__}")
+    result = frozen.__new__(frozen)
+    fields = dict(message.__dict__)
+    _freeze_fields(fields)
+    result.__dict__.update(fields)
+    return result
+
+
+def thaw(message: FrozenMessage) -> DefiTlbScheme:
+    """
+    Mutable copy of frozen message, nested schemes are thawed too
+    """
+    if not isinstance(message, FrozenMessage):
+        return message
+    result = message.mutable_class.__new__(message.mutable_class)
+    for name, value in message.__dict__.items():
+        result.__dict__[name] = thaw(value) if isinstance(value, FrozenMessage) else value
+    return result
+
+
+def frozen_opcodes(opcodes: typing.Mapping[int, type]) -> typing.Mapping[int, type]:
+    """
+    Registry with frozen variants, e.g. deserialize_body(body, frozen_opcodes(known_jetton_opcodes))
+    decodes to frozen messages
+    """
+    return MappingProxyType({op: FROZEN_CLASSES.get(cls, cls) for op, cls in opcodes.items()})
@@ -0,0 +1,321 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pytoniq_core import Cell
+
+from .archive import ArchiveWriter
+from .batch import BOC_MAGIC
+from .defi import known_internal_opcodes, known_jetton_opcodes, known_external_opcodes
+from .export import get_exporter, ADDRESS_FORMATS
+from .flat import decode_boc
+from .transaction import decode_body, decode_message, decode_transaction
+
+############################################################
+# Offline indexer
+############################################################
+"""
+python -m pytoniq_defi.indexer dumps/ -o out/ -j 8
+
+Inputs are files or directories (walked recursively) of
+    binary BoC, possibly multi-root (e.g. MessageBatchWriter output), or
+    text with one base64 or hex BoC per line (empty lines and lines starting with # are skipped).
+Every file (or chunk of a large text file) is a unit of work processed by one worker:
+decoded messages are written to OUTPUT/<class name>/<unit>.jsonl (jsonl format) or OUTPUT/<unit>.pda (archive format),
+with message and transaction context (@src, @dest, @lt, ...) as fields of rows or archive columns.
+Completed units are recorded in OUTPUT/_checkpoint.json, rerunning the same command skips them,
+outputs of interrupted units are rewritten.
+"""
+
+CHECKPOINT_FILE = '_checkpoint.json'
+CHECKPOINT_VERSION = 1
+
+KINDS = ('body', 'message', 'transaction')
+FORMATS = ('jsonl', 'archive')
+OPCODES = {
+    'default': None,  # internal and jetton payloads
+    'internal': known_internal_opcodes,
+    'jetton': known_jetton_opcodes,
+    'external': known_external_opcodes,
+}
+
+
+class IndexerOptions(typing.NamedTuple):
+    output: str
+    kind: str = 'body'
+    output_format: str = 'jsonl'
+    opcodes: str = 'default'
+    address_format: str = 'non_bounceable'
+    workchain: int = 0
+
+
+class UnitStats(typing.NamedTuple):
+    unit: str
+    path: str
+    roots: int
+    messages: int
+    unknown: int
+    errors: int
+    counts: dict
+
+
+def find_units(paths: typing.Iterable[str], chunk_size: int = 64 << 20) -> typing.List[typing.Tuple[str, str, int, int]]:
+    """
+    Units of work: (unit id, path, start, end) in sorted path order, text files larger than
+    chunk_size are split into byte ranges (a line belongs to the range its first byte is in).
+    Unit id depends on path, range, size and mtime, so changed files are processed again.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+                files.extend(os.path.join(root, name) for name in sorted(names) if not name.startswith('.'))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise ValueError(f"No such file or directory: {path}")
+    units = []
+    for path in files:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            is_binary = f.read(4) == BOC_MAGIC
+        ranges = [(0, stat.st_size)]
+        if not is_binary and stat.st_size > chunk_size:
+            ranges = [(start, min(start + chunk_size, stat.st_size)) for start in range(0, stat.st_size, chunk_size)]
+        for start, end in ranges:
+            key = f'{path}:{start}:{end}:{stat.st_size}:{stat.st_mtime_ns}'
+            units.append((hashlib.sha1(key.encode()).hexdigest()[:16], path, start, end))
+    return units
+
+
+def _read_lines(path: str, start: int, end: int) -> typing.Iterator[bytes]:
+    with open(path, 'rb') as f:
+        if start:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                f.readline()  # line started in previous range
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                return
+            line = line.strip()
+            if line and not line.startswith(b'#'):
+                yield line
+
+
+def _read_bocs(path: str, start: int, end: int) -> typing.Iterator[typing.Union[bytes, Cell, Exception]]:
+    # roots of unit, malformed input (a line or whole binary file) is yielded as its exception, so it is
+    # counted as error of unit instead of stopping the run
+    with open(path, 'rb') as f:
+        is_binary = f.read(4) == BOC_MAGIC
+    if is_binary:
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            roots = Cell.from_boc(data)
+        except Exception as e:
+            yield e
+            return
+        yield from roots
+        return
+    for line in _read_lines(path, start, end):
+        try:
+            if line[:8].lower() == b'b5ee9c72':
+                yield bytes.fromhex(line.decode())
+            else:
+                yield base64.b64decode(line)
+        except ValueError as e:  # binascii.Error, bad hex or non-ascii line
+            yield e
+
+
+def _decode(root: typing.Union[bytes, Cell], options: IndexerOptions) -> typing.Iterator[typing.Tuple[typing.Any, dict]]:
+    # (body, extra fields) of decoded messages, body is None for unknown opcodes
+    opcodes = OPCODES[options.opcodes]
+    if options.kind == 'body':
+        if isinstance(root, Cell):
+            yield decode_body(root, opcodes)[1], {}
+        else:
+            yield decode_boc(root, opcodes), {}
+        return
+    if not isinstance(root, Cell):
+        root = Cell.one_from_boc(root)
+    if options.kind == 'message':
+        message = decode_message(root, opcodes)
+        yield message.body, {'@src': message.src, '@dest': message.dest, '@created_lt': message.created_lt}
+        return
+    record = decode_transaction(root, options.workchain, opcodes)
+    for message in record.messages():
+        yield message.body, {'@account': record.account, '@lt': record.lt, '@now': record.now,
+                             '@src': message.src, '@dest': message.dest, '@created_lt': message.created_lt}
+
+
+def index_unit(unit: typing.Tuple[str, str, int, int], options: IndexerOptions) -> UnitStats:
+    """
+    Decodes one unit and writes its outputs, files appear under final names only when unit is complete
+    """
+    unit_id, path, start, end = unit
+    roots = messages = unknown = errors = 0
+    counts = {}
+    files = {}
+    archive = ArchiveWriter() if options.output_format == 'archive' else None
+    exporter = get_exporter(options.address_format)
+    encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    convert = exporter._convert
+    try:
+        for root in _read_bocs(path, start, end):
+            roots += 1
+            if isinstance(root, Exception):
+                errors += 1
+                continue
+            try:
+                decoded = list(_decode(root, options))
+            except Exception:
+                errors += 1
+                continue
+            for body, extra in decoded:
+                if body is None:
+                    unknown += 1
+                    continue
+                name = type(body).__name__
+                counts[name] = counts.get(name, 0) + 1
+                messages += 1
+                if archive is not None:
+                    archive.add(body, extra)
+                    continue
+                f = files.get(name)
+                if f is None:
+                    os.makedirs(os.path.join(options.output, name), exist_ok=True)
+                    f = files[name] = open(os.path.join(options.output, name, unit_id + '.jsonl.tmp'), 'w')
+                row = exporter.to_dict(body)
+                for key, value in extra.items():
+                    row[key] = convert(value)
+                f.write(encode(row))
+                f.write('\n')
+    finally:
+        for f in files.values():
+            f.close()
+    for name, f in files.items():
+        os.replace(f.name, f.name[:-len('.tmp')])
+    if archive is not None and len(archive):
+        os.makedirs(options.output, exist_ok=True)
+        target = os.path.join(options.output, unit_id + '.pda')
+        with open(target + '.tmp', 'wb') as f:
+            archive.write(f)
+        os.replace(target + '.tmp', target)
+    return UnitStats(unit_id, path, roots, messages, unknown, errors, counts)
+
+
+def load_checkpoint(output: str) -> dict:
+    try:
+        with open(os.path.join(output, CHECKPOINT_FILE)) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return {'version': CHECKPOINT_VERSION, 'done': {}}
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unknown checkpoint version: {checkpoint.get('version')}")
+    return checkpoint
+
+
+def save_checkpoint(output: str, checkpoint: dict):
+    path = os.path.join(output, CHECKPOINT_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
+
+
+def run_indexer(paths: typing.Iterable[str],
+                options: IndexerOptions,
+                processes: typing.Optional[int] = None,
+                chunk_size: int = 64 << 20,
+                resume: bool = True,
+                log: typing.Optional[typing.TextIO] = sys.stderr
+                ) -> dict:
+    """
+    Indexes units not completed in checkpoint with a process pool, returns checkpoint with totals
+    """
+    os.makedirs(options.output, exist_ok=True)
+    checkpoint = load_checkpoint(options.output) if resume else {'version': CHECKPOINT_VERSION, 'done': {}}
+    done = checkpoint['done']
+    units = [unit for unit in find_units(paths, chunk_size) if unit[0] not in done]
+    total = len(done) + len(units)
+    processes = processes or os.cpu_count() or 1
+    started = time.monotonic()
+    roots = messages = 0
+    saved = [started]
+    if log is not None:
+        print(f'{len(units)} units to index, {len(done)} already done, {processes} processes', file=log)
+
+    def completed(stats: UnitStats):
+        nonlocal roots, messages
+        roots += stats.roots
+        messages += stats.messages
+        done[stats.unit] = {'path': stats.path, 'roots': stats.roots, 'messages': stats.messages,
+                            'unknown': stats.unknown, 'errors': stats.errors, 'counts': stats.counts}
+        if time.monotonic() - saved[0] >= 1:  # units completed after last save are redone if process is killed
+            save_checkpoint(options.output, checkpoint)
+            saved[0] = time.monotonic()
+        if log is not None:
+            elapsed = max(time.monotonic() - started, 1e-9)
+            print(f'[{len(done)}/{total}] {stats.path}: {stats.messages} messages, '
+                  f'{stats.unknown} unknown, {stats.errors} errors | total {messages} messages, '
+                  f'{roots / elapsed:.0f} bocs/s, {messages / elapsed:.0f} messages/s', file=log)
+
+    try:
+        if processes == 1:
+            for unit in units:
+                completed(index_unit(unit, options))
+        else:
+            with ProcessPoolExecutor(processes) as executor:
+                futures = [executor.submit(index_unit, unit, options) for unit in units]
+                for future in as_completed(futures):
+                    completed(future.result())
+    finally:
+        save_checkpoint(options.output, checkpoint)  # also on interruption
+
+    totals = {}
+    for entry in done.values():
+        for name, count in entry['counts'].items():
+            totals[name] = totals.get(name, 0) + count
+    checkpoint['totals'] = totals
+    save_checkpoint(options.output, checkpoint)
+    if log is not None:
+        elapsed = time.monotonic() - started
+        print(f'indexed {roots} bocs, {messages} messages in {elapsed:.1f}s', file=log)
+    return checkpoint
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='pytoniq-defi-index',
+                                     description='Decodes BoC dumps with pytoniq_defi opcode registries into per op files')
+    parser.add_argument('paths', nargs='+', help='BoC dump files or directories')
+    parser.add_argument('-o', '--output', required=True, help='output directory, also keeps checkpoint')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='worker processes (default: cpu count)')
+    parser.add_argument('--kind', choices=KINDS, default='body', help='what BoCs contain (default: body)')
+    parser.add_argument('--format', dest='output_format', choices=FORMATS, default='jsonl', help='output format (default: jsonl)')
+    parser.add_argument('--opcodes', choices=tuple(OPCODES), default='default', help='opcode registry (default: internal and jetton)')
+    parser.add_argument('--address-format', choices=ADDRESS_FORMATS, default='non_bounceable')
+    parser.add_argument('--workchain', type=int, default=0, help='workchain of transactions accounts')
+    parser.add_argument('--chunk-size', type=int, default=64, help='MiB per unit of text dumps (default: 64)')
+    parser.add_argument('--restart', action='store_true', help='ignore checkpoint and index everything again')
+    parser.add_argument('-q', '--quiet', action='store_true')
+    args = parser.parse_args(argv)
+    options = IndexerOptions(args.output, args.kind, args.output_format, args.opcodes, args.address_format, args.workchain)
+    try:
+        run_indexer(args.paths, options, args.processes, args.chunk_size << 20, not args.restart,
+                    None if args.quiet else sys.stderr)
+    except (ValueError, OSError) as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
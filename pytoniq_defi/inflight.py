@@ -0,0 +1,153 @@
+import itertools
+import os
+import threading
+import time
+import typing
+
+from .defi import DedustMessageSwap, DedustJettonPayloadSwap, StonfiV2MessageSwap
+from .parallel import is_free_threaded
+
+############################################################
+# query_id allocation and in-flight messages tracking
+############################################################
+
+
+class QueryIdAllocator:
+    """
+    Allocates unique 64-bit query_ids without locks.
+    query_id = prefix (prefix_bits) | counter (64 - prefix_bits), prefix defaults to process id,
+    counter starts from current time in milliseconds so restarted process doesn't reuse recent ids.
+    Forked children get their own prefix. On free-threaded builds counter is guarded by a lock.
+    """
+    def __init__(self, prefix: typing.Optional[int] = None, prefix_bits: int = 22):
+        if not 0 < prefix_bits < 64:
+            raise ValueError(f"prefix_bits should be in range 1..63, got {prefix_bits}")
+        self.prefix_bits = prefix_bits
+        self.counter_bits = 64 - prefix_bits
+        self.fixed_prefix = prefix
+        self._lock = threading.Lock() if is_free_threaded() else None
+        self._reset()
+        if prefix is None and hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        prefix = self.fixed_prefix if self.fixed_prefix is not None else os.getpid()
+        self._base = (prefix & ((1 << self.prefix_bits) - 1)) << self.counter_bits
+        self._counter = itertools.count(time.time_ns() // 1000000)
+
+    def allocate(self) -> int:
+        if self._lock is not None:
+            with self._lock:
+                counter = next(self._counter)
+        else:
+            # next() on itertools.count is atomic under GIL
+            counter = next(self._counter)
+        return self._base | (counter & ((1 << self.counter_bits) - 1))
+
+    __call__ = allocate
+
+
+def message_deadline(message) -> typing.Optional[int]:
+    """
+    Deadline (unix time) carried by swap message, None if message has no deadline
+    """
+    if isinstance(message, (DedustMessageSwap, DedustJettonPayloadSwap)):
+        if message.swap_params is not None and message.swap_params.deadline:
+            return message.swap_params.deadline
+        return None
+    if isinstance(message, StonfiV2MessageSwap):
+        return message.tx_deadline or None
+    return None
+
+
+class InflightTracker:
+    """
+    Table of sent messages by query_id, matches decoded responses (JettonExcesses, DedustMessagePayout,
+    Ston.fi results carried in jetton transfers etc.) in O(1).
+    Entries expire at their deadline; expiration uses a timer wheel with one slot per resolution seconds,
+    so advance() visits only slots of passed time instead of scanning the table.
+    """
+    def __init__(self,
+                 default_ttl: int = 600,
+                 resolution: int = 1,
+                 wheel_size: int = 4096,
+                 now: typing.Optional[float] = None
+                 ):
+        self.default_ttl = default_ttl
+        self.resolution = resolution
+        self.wheel_size = wheel_size
+        self.entries = {}  # query_id -> (deadline, context)
+        self._wheel = [[] for _ in range(wheel_size)]
+        self._tick = int(time.time() if now is None else now) // resolution
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, query_id: int) -> bool:
+        return query_id in self.entries
+
+    def track(self, query_id: int, context: typing.Any = None, deadline: typing.Optional[int] = None):
+        """
+        Remembers sent message, deadline is unix time, defaults to now + default_ttl
+        """
+        if deadline is None:
+            deadline = int(time.time()) + self.default_ttl
+        self.entries[query_id] = (deadline, context)
+        tick = deadline // self.resolution
+        if tick < self._tick:
+            tick = self._tick
+        self._wheel[tick % self.wheel_size].append(query_id)
+
+    def track_message(self, message, context: typing.Any = None, deadline: typing.Optional[int] = None):
+        """
+        Remembers sent message by its query_id, deadline is taken from message if not given
+        """
+        if deadline is None:
+            deadline = message_deadline(message)
+        self.track(message.query_id, message if context is None else context, deadline)
+
+    def match(self, query_id: int) -> typing.Any:
+        """
+        Removes entry and returns its context, None if query_id is unknown or expired
+        """
+        entry = self.entries.pop(query_id, None)
+        return entry[1] if entry is not None else None
+
+    def match_message(self, message) -> typing.Any:
+        query_id = getattr(message, 'query_id', None)
+        if query_id is None:
+            return None
+        return self.match(query_id)
+
+    def advance(self, now: typing.Optional[float] = None) -> typing.List[typing.Tuple[int, typing.Any]]:
+        """
+        Expires entries with deadline < now, returns list of (query_id, context) of expired entries
+        """
+        if now is None:
+            now = time.time()
+        current = int(now) // self.resolution
+        expired = []
+        if current - self._tick >= self.wheel_size:
+            # whole wheel passed, every slot should be visited once
+            ticks = range(self._tick, self._tick + self.wheel_size)
+        else:
+            ticks = range(self._tick, current)
+        entries = self.entries
+        for tick in ticks:
+            slot_index = tick % self.wheel_size
+            slot = self._wheel[slot_index]
+            if not slot:
+                continue
+            keep = []
+            for query_id in slot:
+                entry = entries.get(query_id)
+                if entry is None:
+                    continue  # matched earlier
+                if entry[0] // self.resolution < current:
+                    del entries[query_id]
+                    expired.append((query_id, entry[1]))
+                elif entry[0] // self.resolution % self.wheel_size == slot_index:
+                    keep.append(query_id)  # deadline is one or more wheel turns ahead
+            self._wheel[slot_index] = keep
+        self._tick = current
+        return expired
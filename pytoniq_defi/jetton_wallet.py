@@ -0,0 +1,143 @@
+import functools
+import hashlib
+import typing
+from enum import Enum
+
+from pytoniq_core import Cell, Builder, Address
+from pytoniq_core.tlb.account import StateInit
+
+############################################################
+# Offline jetton wallet address derivation
+############################################################
+"""
+standard (TEP-74 reference wallet):
+    balance:Coins owner_address:MsgAddressInt jetton_master_address:MsgAddressInt jetton_wallet_code:^Cell = JettonWalletData;
+governed (stablecoin / notcoin wallets):
+    status:uint4 balance:Coins owner_address:MsgAddressInt jetton_master_address:MsgAddressInt = JettonWalletData;
+
+_ split_depth:(Maybe (## 5)) special:(Maybe TickTock) code:(Maybe ^Cell) data:(Maybe ^Cell) library:(Maybe ^Cell) = StateInit;
+"""
+
+
+class JettonWalletLayout(Enum):
+    """
+    Initial data layouts of jetton wallets (balance and status are zero)
+    """
+    standard = 0
+    governed = 1
+
+    def data_cell(self, owner: Address, minter: Address, wallet_code: Cell) -> Cell:
+        builder = Builder()
+        if self == JettonWalletLayout.governed:
+            builder.store_uint(0, 4)
+        builder \
+            .store_coins(0) \
+            .store_address(owner) \
+            .store_address(minter)
+        if self == JettonWalletLayout.standard:
+            builder.store_ref(wallet_code)
+        return builder.end_cell()
+
+
+def _address_bits(address: Address) -> int:
+    # addr_std$10 anycast:(Maybe Anycast) workchain_id:int8 address:bits256, 267 bits
+    return (0b100 << 264) | ((address.wc & 0xff) << 256) | int.from_bytes(address.hash_part, 'big')
+
+
+class JettonWalletDeriver:
+    """
+    Computes jetton wallet addresses of one jetton minter from its wallet code without get-method calls.
+    Wallet StateInit hash is computed directly from cell representations, results are kept in LRU cache.
+    """
+    def __init__(self,
+                 minter: Address,
+                 wallet_code: Cell,
+                 layout: JettonWalletLayout = JettonWalletLayout.standard,
+                 workchain: int = 0,
+                 cache_size: typing.Optional[int] = 65536
+                 ):
+        if isinstance(minter, str):
+            minter = Address(minter)
+        self.minter = minter
+        self.wallet_code = wallet_code
+        self.layout = layout
+        self.workchain = workchain
+
+        code_depth = wallet_code.get_depth().to_bytes(2, 'big')
+        self._minter_bits = _address_bits(minter)
+        if layout == JettonWalletLayout.standard:
+            # 4 + 267 + 267 = 538 bits and one ref
+            self._data_bits = 538
+            self._data_prefix = b'\x01' + bytes([538 // 8 + (538 + 7) // 8])
+            self._data_suffix = code_depth + wallet_code.hash
+            data_depth = wallet_code.get_depth() + 1
+        elif layout == JettonWalletLayout.governed:
+            # 4 + 4 + 267 + 267 = 542 bits and no refs
+            self._data_bits = 542
+            self._data_prefix = b'\x00' + bytes([542 // 8 + (542 + 7) // 8])
+            self._data_suffix = b''
+            data_depth = 0
+        else:
+            raise ValueError(f"Unknown jetton wallet layout: {layout}")
+        # state_init cell: bits 00110 (5 bits, completion tag appended) and refs code, data
+        self._state_init_prefix = b'\x02\x01\x34' + code_depth + data_depth.to_bytes(2, 'big') + wallet_code.hash
+
+        self.get_address = functools.lru_cache(maxsize=cache_size)(self._derive)
+
+    def _data_hash(self, owner: Address) -> bytes:
+        bits = self._data_bits
+        value = (_address_bits(owner) << 267) | self._minter_bits
+        # completion tag: single 1 bit and zeros up to byte boundary
+        pad = 8 - bits % 8
+        value = ((value << 1) | 1) << (pad - 1)
+        data = value.to_bytes((bits + 7) // 8, 'big')
+        return hashlib.sha256(self._data_prefix + data + self._data_suffix).digest()
+
+    def _derive(self, owner: Address) -> Address:
+        if isinstance(owner, str):
+            owner = Address(owner)
+        state_init_hash = hashlib.sha256(self._state_init_prefix + self._data_hash(owner)).digest()
+        return Address((self.workchain, state_init_hash))
+
+    def get_addresses(self, owners: typing.Iterable[typing.Union[Address, str]]) -> typing.List[Address]:
+        get_address = self.get_address
+        return [get_address(owner) for owner in owners]
+
+    def get_state_init(self, owner: Address) -> StateInit:
+        if isinstance(owner, str):
+            owner = Address(owner)
+        return StateInit(code=self.wallet_code, data=self.layout.data_cell(owner, self.minter, self.wallet_code))
+
+
+@functools.lru_cache(maxsize=256)
+def get_jetton_wallet_deriver(minter: Address,
+                              wallet_code: Cell,
+                              layout: JettonWalletLayout = JettonWalletLayout.standard,
+                              workchain: int = 0
+                              ) -> JettonWalletDeriver:
+    return JettonWalletDeriver(minter, wallet_code, layout, workchain)
+
+
+def get_jetton_wallet_address(minter: typing.Union[Address, str],
+                              owner: typing.Union[Address, str],
+                              wallet_code: Cell,
+                              layout: JettonWalletLayout = JettonWalletLayout.standard,
+                              workchain: int = 0
+                              ) -> Address:
+    if isinstance(minter, str):
+        minter = Address(minter)
+    if isinstance(owner, str):
+        owner = Address(owner)
+    return get_jetton_wallet_deriver(minter, wallet_code, layout, workchain).get_address(owner)
+
+
+def get_jetton_wallet_addresses(minter: typing.Union[Address, str],
+                                owners: typing.Iterable[typing.Union[Address, str]],
+                                wallet_code: Cell,
+                                layout: JettonWalletLayout = JettonWalletLayout.standard,
+                                workchain: int = 0
+                                ) -> typing.List[Address]:
+    if isinstance(minter, str):
+        minter = Address(minter)
+    deriver = get_jetton_wallet_deriver(minter, wallet_code, layout, workchain)
+    return deriver.get_addresses(Address(owner) if isinstance(owner, str) else owner for owner in owners)
@@ -0,0 +1,274 @@
+import struct
+import typing
+from types import MappingProxyType
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, needed only by JettonLedger
+    np = None
+
+from pytoniq_core import Address
+
+from .defi import JettonTransfer, JettonInternalTransfer, JettonBurn, JettonBurnNotification
+from .transaction import DecodedMessage, TransactionRecord
+
+############################################################
+# Jetton balance ledger
+############################################################
+
+LEDGER_MAGIC = b'JLG1'
+
+# magic, wallets count, table size, overflow entries
+_header = struct.Struct('<4sQQQ')
+_overflow_entry = struct.Struct('<QB')
+
+# balance marker of values kept in JettonLedger.overflow
+_OVERFLOW = -(1 << 63)
+
+
+def _grown(array: "np.ndarray", size: int) -> "np.ndarray":
+    grown = np.zeros((size,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class WalletIndex:
+    """
+    Interns addresses to dense int ids (0, 1, ...) in arrays: workchain, 32 bytes hash and
+    an open addressing table of ids keyed by first 8 bytes of hash (41-49 bytes per address).
+    """
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise ImportError("WalletIndex requires numpy")
+        capacity = max(capacity, 16)
+        self.count = 0
+        self.wc = np.zeros(capacity, dtype=np.int8)
+        self.hashes = np.zeros((capacity, 32), dtype=np.uint8)
+        self.table = np.full(1 << (2 * capacity - 1).bit_length(), -1, dtype=np.int32)
+
+    def __len__(self):
+        return self.count
+
+    def _probe(self, wc: int, hash_part: bytes) -> typing.Tuple[int, int]:
+        # (id or -1, table position of id or of empty entry)
+        table = self.table
+        mask = len(table) - 1
+        position = int.from_bytes(hash_part[:8], 'little') & mask
+        hashes = self.hashes
+        while True:
+            address_id = int(table[position])
+            if address_id < 0:
+                return -1, position
+            if hashes[address_id].tobytes() == hash_part and self.wc[address_id] == wc:
+                return address_id, position
+            position = (position + 1) & mask
+
+    def find(self, address: Address) -> int:
+        """
+        Id of address, -1 if not interned
+        """
+        return self._probe(address.wc, address.hash_part)[0]
+
+    def intern(self, address: Address) -> int:
+        return self.intern_raw(address.wc, address.hash_part)
+
+    def intern_raw(self, wc: int, hash_part: bytes) -> int:
+        """
+        intern() of std address given as workchain and 32 bytes hash
+        """
+        address_id, position = self._probe(wc, hash_part)
+        if address_id >= 0:
+            return address_id
+        address_id = self.count
+        if address_id == len(self.wc):
+            self.wc = _grown(self.wc, max(2 * address_id, 16))
+            self.hashes = _grown(self.hashes, len(self.wc))
+        self.wc[address_id] = wc
+        self.hashes[address_id] = np.frombuffer(hash_part, dtype=np.uint8)
+        self.count += 1
+        self.table[position] = address_id
+        if 2 * self.count > len(self.table):
+            self._rehash(2 * len(self.table))
+        return address_id
+
+    def _rehash(self, size: int):
+        count = self.count
+        table = np.full(size, -1, dtype=np.int32)
+        mask = size - 1
+        prefixes = np.ascontiguousarray(self.hashes[:count, :8]).view('<u8').ravel()
+        positions = (prefixes & np.uint64(mask)).astype(np.int64)
+        ids = np.arange(count, dtype=np.int32)
+        while len(ids):
+            # ids whose position is taken (by an earlier id in this round) retry at the next position
+            free = table[positions] < 0
+            candidates, first = np.unique(positions[free], return_index=True)
+            placed = np.flatnonzero(free)[first]
+            table[candidates] = ids[placed]
+            rest = np.ones(len(ids), dtype=bool)
+            rest[placed] = False
+            ids = ids[rest]
+            positions = (positions[rest] + 1) & mask
+        self.table = table
+
+    def address(self, address_id: int) -> Address:
+        return Address((int(self.wc[address_id]), self.hashes[address_id].tobytes()))
+
+
+class JettonLedger:
+    """
+    Balance deltas of jetton wallets (and total supply deltas of minters) from decoded messages,
+    applied on the account that receives message (its transaction in_msg):
+        JettonTransfer (owner -> wallet): -amount on wallet
+        JettonInternalTransfer (wallet -> wallet): +amount on receiving wallet
+        JettonBurn (owner -> wallet): -amount on wallet
+        JettonBurnNotification (wallet -> minter): -amount on minter
+    Bounced messages (body is not decoded) and failed transactions are not distinguished,
+    pass only messages of successful transactions.
+    Deltas are int64 with exact Python ints for larger values in overflow, last query_ids are uint64.
+    ShardedProcessor(JettonLedger) partitions messages by receiving wallet (see PARTITION_FIELDS)
+    and transactions by account.
+    """
+    # no body fields: DecodedMessage is partitioned by destination, see sharding.partition_address
+    PARTITION_FIELDS = MappingProxyType({})
+
+    DELTA_SIGNS = {
+        JettonTransfer: -1,
+        JettonInternalTransfer: 1,
+        JettonBurn: -1,
+        JettonBurnNotification: -1,
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self.index = WalletIndex(capacity)
+        self.balances = np.zeros(len(self.index.wc), dtype=np.int64)
+        self.query_ids = np.zeros(len(self.index.wc), dtype=np.uint64)
+        self.overflow = {}
+
+    def __len__(self):
+        return self.index.count
+
+    def __contains__(self, wallet: typing.Union[Address, str]) -> bool:
+        if isinstance(wallet, str):
+            wallet = Address(wallet)
+        return self.index.find(wallet) >= 0
+
+    def add(self, wallet: typing.Union[Address, str], delta: int, query_id: typing.Optional[int] = None):
+        if isinstance(wallet, str):
+            wallet = Address(wallet)
+        wallet_id = self.index.intern(wallet)
+        if wallet_id >= len(self.balances):
+            self.balances = _grown(self.balances, len(self.index.wc))
+            self.query_ids = _grown(self.query_ids, len(self.index.wc))
+        balance = int(self.balances[wallet_id])
+        balance = (self.overflow[wallet_id] if balance == _OVERFLOW else balance) + delta
+        if _OVERFLOW < balance < -_OVERFLOW:
+            self.balances[wallet_id] = balance
+            if self.overflow:
+                self.overflow.pop(wallet_id, None)
+        else:
+            self.balances[wallet_id] = _OVERFLOW
+            self.overflow[wallet_id] = balance
+        if query_id is not None:
+            self.query_ids[wallet_id] = query_id
+
+    def apply(self, wallet: typing.Union[Address, str], body) -> bool:
+        """
+        Applies decoded body received by wallet, returns False for bodies that don't change balances
+        """
+        sign = self.DELTA_SIGNS.get(type(body))
+        if sign is None:
+            return False
+        self.add(wallet, sign * body.amount, body.query_id)
+        return True
+
+    def apply_message(self, message: DecodedMessage) -> bool:
+        if message.body is None or message.bounced or not isinstance(message.dest, Address):
+            return False
+        return self.apply(message.dest, message.body)
+
+    def apply_transaction(self, record: TransactionRecord) -> bool:
+        """
+        Applies in_msg of transaction, out_msgs are applied by transactions of their receivers
+        """
+        return record.in_msg is not None and self.apply_message(record.in_msg)
+
+    def process(self, message) -> bool:
+        """
+        Applies DecodedMessage or TransactionRecord, so ledger can be a ShardedProcessor processor
+        """
+        if isinstance(message, TransactionRecord):
+            return self.apply_transaction(message)
+        return self.apply_message(message)
+
+    def _id(self, wallet: typing.Union[Address, str]) -> int:
+        if isinstance(wallet, str):
+            wallet = Address(wallet)
+        return self.index.find(wallet)
+
+    def balance(self, wallet: typing.Union[Address, str]) -> int:
+        wallet_id = self._id(wallet)
+        if wallet_id < 0:
+            return 0
+        balance = int(self.balances[wallet_id])
+        return self.overflow[wallet_id] if balance == _OVERFLOW else balance
+
+    def last_query_id(self, wallet: typing.Union[Address, str]) -> typing.Optional[int]:
+        wallet_id = self._id(wallet)
+        return int(self.query_ids[wallet_id]) if wallet_id >= 0 else None
+
+    def items(self) -> typing.Iterator[typing.Tuple[Address, int]]:
+        for wallet_id in range(len(self)):
+            balance = int(self.balances[wallet_id])
+            yield self.index.address(wallet_id), self.overflow[wallet_id] if balance == _OVERFLOW else balance
+
+    def snapshot(self, path: str):
+        """
+        Writes ledger arrays to file, see restore
+        """
+        count = len(self)
+        index = self.index
+        with open(path, 'wb') as f:
+            f.write(_header.pack(LEDGER_MAGIC, count, len(index.table), len(self.overflow)))
+            for array in (index.wc[:count], index.hashes[:count], self.balances[:count], self.query_ids[:count], index.table):
+                f.write(b'\x00' * (_aligned(f.tell()) - f.tell()))
+                f.write(array.tobytes())
+            for wallet_id, balance in self.overflow.items():
+                size = (balance.bit_length() + 8) // 8
+                f.write(_overflow_entry.pack(wallet_id, size))
+                f.write(balance.to_bytes(size, 'little', signed=True))
+
+    @classmethod
+    def restore(cls, path: str) -> "JettonLedger":
+        """
+        Maps snapshot file copy-on-write: restore doesn't read arrays, changes are not written back to file
+        """
+        with open(path, 'rb') as f:
+            magic, count, table_size, overflow_count = _header.unpack(f.read(_header.size))
+        if magic != LEDGER_MAGIC:
+            raise ValueError(f"Not a ledger snapshot, unknown magic: {magic}")
+        arrays = []
+        offset = _header.size
+        for dtype, shape in ((np.int8, (count,)), (np.uint8, (count, 32)), (np.int64, (count,)),
+                             (np.uint64, (count,)), (np.int32, (table_size,))):
+            offset = _aligned(offset)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            arrays.append(np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=shape) if size
+                          else np.zeros(shape, dtype=dtype))
+            offset += size
+        ledger = cls.__new__(cls)
+        index = ledger.index = WalletIndex.__new__(WalletIndex)
+        index.count = count
+        index.wc, index.hashes, ledger.balances, ledger.query_ids, index.table = arrays
+        ledger.overflow = {}
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for _ in range(overflow_count):
+                wallet_id, size = _overflow_entry.unpack(f.read(_overflow_entry.size))
+                ledger.overflow[wallet_id] = int.from_bytes(f.read(size), 'little', signed=True)
+            if f.read(1):
+                raise ValueError("Ledger snapshot has trailing bytes")
+        return ledger
@@ -0,0 +1,129 @@
+import typing
+
+from pytoniq_core import Cell, Slice
+
+from .defi import JettonTransferNotification
+
+############################################################
+# Deposit memo matching
+############################################################
+
+
+class MemoMatcher:
+    """
+    Matches JettonComment payloads (op 0 + snake string) against a compiled set of memos.
+    Comment bytes are compared with encoded memos directly, text is never decoded:
+    the returned str is the memo object given at compile time, so no str is allocated for misses or hits.
+    """
+    def __init__(self, memos: typing.Iterable[str]):
+        self.memos = {}
+        for memo in memos:
+            self.memos[memo.encode()] = memo
+        self.max_length = max(map(len, self.memos), default=0)
+        self._prefixes = {memo[:4] for memo in self.memos}
+
+    def __len__(self):
+        return len(self.memos)
+
+    def _match_text(self, text: bytes, refs: typing.List[Cell]) -> typing.Optional[str]:
+        if len(text) > self.max_length:
+            return None
+        if (len(text) >= 4 or not refs) and text[:4] not in self._prefixes:
+            return None
+        if refs:
+            # snake continuation is the first ref of every cell
+            parts = [text]
+            length = len(text)
+            while refs:
+                cell = refs[0]
+                if len(cell.bits) % 8:
+                    return None
+                data = cell.data
+                length += len(data)
+                if length > self.max_length:
+                    return None
+                parts.append(data)
+                refs = cell.refs
+            text = b''.join(parts)
+        return self.memos.get(text)
+
+    def match_payload(self, payload: typing.Union[Cell, Slice, None]) -> typing.Optional[str]:
+        """
+        Matches forward payload cell or slice, returns memo or None
+        """
+        if payload is None:
+            return None
+        if isinstance(payload, Cell):
+            if len(payload.bits) % 8:
+                return None
+            data = payload.data
+            refs = payload.refs
+        else:
+            if len(payload.bits) % 8:
+                return None
+            data = payload.bits.tobytes()
+            refs = payload.refs[payload.ref_offset:]
+        if len(data) < 4 or data[:4] != b'\x00\x00\x00\x00':
+            return None
+        return self._match_text(data[4:], refs)
+
+    def match_notification(self, body: typing.Union[Cell, JettonTransferNotification]) -> typing.Optional[str]:
+        """
+        Matches comment in JettonTransferNotification body cell without deserializing it, returns memo or None
+        """
+        if isinstance(body, JettonTransferNotification):
+            return self.match_payload(body.forward_payload)
+        length = len(body.bits)
+        if length < 32 + 64 + 4 + 2 + 1:
+            return None
+        data = body.data
+        total = len(data) * 8
+        value = int.from_bytes(data, 'big')
+        if value >> (total - 32) != JettonTransferNotification.op:
+            return None
+        # bounds are checked before every shift: truncated bodies don't match
+        position = 32 + 64 + 4
+        position += ((value >> (total - position)) & 0xf) * 8  # amount:Coins
+        position += 2
+        if position > length:
+            return None
+        tag = (value >> (total - position)) & 0b11
+        if tag == 0b10:
+            position += 265  # addr_std without anycast
+        elif tag == 0b01:
+            position += 9
+            if position > length:
+                return None
+            position += (value >> (total - position)) & 0x1ff
+        elif tag != 0b00:
+            return None
+        position += 1  # forward_payload either bit
+        if position > length:
+            return None
+        if (value >> (total - position)) & 1:
+            # forward_payload in a ref, it is the only ref of notification
+            return self.match_payload(body.refs[0]) if body.refs else None
+        rest = length - position
+        if rest < 32 or rest % 8:
+            return None
+        inline = (value >> (total - length)) & ((1 << rest) - 1)
+        payload = inline.to_bytes(rest // 8, 'big')
+        if payload[:4] != b'\x00\x00\x00\x00':
+            return None
+        return self._match_text(payload[4:], body.refs)
+
+    def match_many(self, bodies: typing.Iterable[typing.Union[Cell, JettonTransferNotification]]) -> typing.List[typing.Optional[str]]:
+        match = self.match_notification
+        return [match(body) for body in bodies]
+
+    def find(self, bodies: typing.Iterable[typing.Union[Cell, JettonTransferNotification]]) -> typing.List[typing.Tuple[int, str]]:
+        """
+        Returns (index, memo) of matched bodies only
+        """
+        match = self.match_notification
+        result = []
+        for i, body in enumerate(bodies):
+            memo = match(body)
+            if memo is not None:
+                result.append((i, memo))
+        return result
@@ -0,0 +1,80 @@
+import os
+import sys
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from pytoniq_core import Cell, Slice
+
+from .transaction import decode_body
+
+############################################################
+# Thread-parallel decoding
+############################################################
+
+
+def is_free_threaded() -> bool:
+    """
+    True on free-threaded builds (python3.13t and later) running with GIL disabled
+    """
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def _decode_chunk(bodies: typing.Sequence[typing.Union[Cell, Slice, bytes]], opcodes: typing.Optional[dict]) -> list:
+    result = []
+    for body in bodies:
+        if isinstance(body, (bytes, str)):
+            body = Cell.one_from_boc(body)
+        elif isinstance(body, Slice):
+            body = body.to_cell()
+        result.append(decode_body(body, opcodes)[1])
+    return result
+
+
+class ParallelDecoder:
+    """
+    Decodes message bodies (Cells, Slices or BoC bytes) in a thread pool, result order matches input.
+    Unknown or malformed bodies are decoded to None.
+    Module state shared by threads is read-only (opcode registries) or locked (interning, LRU caches),
+    so threads scale on free-threaded builds; with GIL use one thread or processes.
+    """
+    def __init__(self,
+                 threads: typing.Optional[int] = None,
+                 chunk_size: int = 512,
+                 opcodes: typing.Optional[dict] = None
+                 ):
+        if threads is None:
+            threads = (os.cpu_count() or 1) if is_free_threaded() else 1
+        self.threads = threads
+        self.chunk_size = chunk_size
+        self.opcodes = opcodes
+        self._executor = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+
+    def decode(self, bodies: typing.Sequence[typing.Union[Cell, Slice, bytes]]) -> list:
+        if self._executor is None or len(bodies) <= self.chunk_size:
+            return _decode_chunk(bodies, self.opcodes)
+        chunks = [bodies[i: i + self.chunk_size] for i in range(0, len(bodies), self.chunk_size)]
+        result = []
+        for decoded in self._executor.map(_decode_chunk, chunks, [self.opcodes] * len(chunks)):
+            result.extend(decoded)
+        return result
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def decode_parallel(bodies: typing.Sequence[typing.Union[Cell, Slice, bytes]],
+                    threads: typing.Optional[int] = None,
+                    chunk_size: int = 512,
+                    opcodes: typing.Optional[dict] = None
+                    ) -> list:
+    with ParallelDecoder(threads, chunk_size, opcodes) as decoder:
+        return decoder.decode(bodies)
@@ -0,0 +1,202 @@
+import math
+import typing
+
+from .defi import DedustEventSwap, DedustEventDeposit, DedustEventWithdrawal, ToncoV3Swap
+from .fills import StonfiV2Fill
+
+############################################################
+# Pool models
+############################################################
+
+Q96 = 1 << 96
+
+
+class PoolTrade:
+    """
+    Observed swap of amount_in of asset_in, for pools whose messages don't carry reserves
+    """
+    __slots__ = ('amount_in', 'asset_in')
+
+    def __init__(self, amount_in: int, asset_in):
+        self.amount_in = amount_in
+        self.asset_in = asset_in
+
+    def __repr__(self):
+        return f'<PoolTrade amount_in: {self.amount_in} asset_in: {self.asset_in}>'
+
+
+class PoolSync:
+    """
+    Full pool state, arguments of model sync(): (reserve0, reserve1) or (sqrt_price_x96, liquidity)
+    """
+    __slots__ = ('state',)
+
+    def __init__(self, *state: int):
+        self.state = state
+
+    def __repr__(self):
+        return f'<PoolSync state: {self.state}>'
+
+
+class ConstantProductPool:
+    """
+    x * y = k pool with fee taken from amount in: Dedust volatile and Ston.fi v2 constant product pools.
+    assets are the keys swaps are routed by (e.g. DedustAsset or jetton minter Address), None is native TON;
+    for Ston.fi v2 pools they are in pool token order (token0, token1).
+    """
+    __slots__ = ('reserve0', 'reserve1', 'fee_bps', 'assets')
+
+    def __init__(self, reserve0: int = 0, reserve1: int = 0, fee_bps: int = 30, assets: tuple = (None, None)):
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+        self.fee_bps = fee_bps
+        self.assets = tuple(assets)
+
+    def is_zero_for_one(self, asset_in) -> bool:
+        if asset_in == self.assets[0]:
+            return True
+        if asset_in == self.assets[1]:
+            return False
+        raise ValueError(f"Asset {asset_in} is not in pool {self.assets}")
+
+    def other(self, asset_in):
+        return self.assets[1] if self.is_zero_for_one(asset_in) else self.assets[0]
+
+    def amount_out(self, amount_in: int, asset_in) -> int:
+        if self.is_zero_for_one(asset_in):
+            reserve_in, reserve_out = self.reserve0, self.reserve1
+        else:
+            reserve_in, reserve_out = self.reserve1, self.reserve0
+        amount_in_with_fee = amount_in * (10000 - self.fee_bps)
+        if reserve_in <= 0 or reserve_out <= 0:
+            return 0
+        return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
+
+    def swap(self, amount_in: int, asset_in) -> int:
+        amount_out = self.amount_out(amount_in, asset_in)
+        if self.is_zero_for_one(asset_in):
+            self.reserve0 += amount_in
+            self.reserve1 -= amount_out
+        else:
+            self.reserve1 += amount_in
+            self.reserve0 -= amount_out
+        return amount_out
+
+    def sync(self, reserve0: int, reserve1: int):
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+
+    def price(self, asset_in=None) -> typing.Optional[float]:
+        """
+        Marginal price of asset_in (default asset0) in the other asset, fee excluded
+        """
+        if not self.reserve0 or not self.reserve1:
+            return None
+        if asset_in is None or self.is_zero_for_one(asset_in):
+            return self.reserve1 / self.reserve0
+        return self.reserve0 / self.reserve1
+
+    def apply(self, body) -> bool:
+        """
+        Updates state from observed message, returns False for messages model doesn't use.
+        Filled StonfiV2Fill is swapped by its amount_in, token in is the one not paid out by pay_to.
+        """
+        if isinstance(body, (DedustEventSwap, DedustEventDeposit, DedustEventWithdrawal)):
+            self.reserve0 = body.reserve0
+            self.reserve1 = body.reserve1
+        elif isinstance(body, StonfiV2Fill):
+            if not body.filled or body.amount_in <= 0:
+                return False
+            self.swap(body.amount_in, self.assets[1] if body.pay_to.amount0_out else self.assets[0])
+        elif isinstance(body, PoolTrade):
+            self.swap(body.amount_in, body.asset_in)
+        elif isinstance(body, PoolSync):
+            self.sync(*body.state)
+        else:
+            return False
+        return True
+
+    def copy(self) -> "ConstantProductPool":
+        return ConstantProductPool(self.reserve0, self.reserve1, self.fee_bps, self.assets)
+
+    def __repr__(self):
+        return f'<ConstantProductPool reserve0: {self.reserve0} reserve1: {self.reserve1} fee_bps: {self.fee_bps}>'
+
+
+class ConcentratedLiquidityPool:
+    """
+    Tonco v3 pool within current tick range: constant product over virtual reserves
+    x = L / sqrtP, y = L * sqrtP. Tick crossings are not modelled, so large swaps are
+    priced as if liquidity extended beyond the current range.
+    ToncoV3Swap is routed by its source_wallet, so assets should be router jetton wallets to apply them.
+    """
+    __slots__ = ('sqrt_price_x96', 'liquidity', 'fee_bps', 'assets')
+
+    def __init__(self, sqrt_price_x96: int = Q96, liquidity: int = 0, fee_bps: int = 30, assets: tuple = (None, None)):
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.liquidity = liquidity
+        self.fee_bps = fee_bps
+        self.assets = tuple(assets)
+
+    is_zero_for_one = ConstantProductPool.is_zero_for_one
+    other = ConstantProductPool.other
+
+    def _next(self, amount_in: int, asset_in) -> typing.Tuple[int, int, bool]:
+        zero_for_one = self.is_zero_for_one(asset_in)
+        liquidity = self.liquidity
+        sqrt_price = self.sqrt_price_x96
+        amount = amount_in * (10000 - self.fee_bps) // 10000
+        if not liquidity or not amount:
+            return sqrt_price, 0, zero_for_one
+        if zero_for_one:
+            numerator = liquidity * Q96
+            next_price = -(-numerator * sqrt_price // (numerator + amount * sqrt_price))  # rounded up
+            amount_out = liquidity * (sqrt_price - next_price) // Q96
+        else:
+            next_price = sqrt_price + amount * Q96 // liquidity
+            amount_out = liquidity * Q96 * (next_price - sqrt_price) // next_price // sqrt_price
+        return next_price, amount_out, zero_for_one
+
+    def amount_out(self, amount_in: int, asset_in) -> int:
+        return self._next(amount_in, asset_in)[1]
+
+    def swap(self, amount_in: int, asset_in) -> int:
+        self.sqrt_price_x96, amount_out, _ = self._next(amount_in, asset_in)
+        return amount_out
+
+    def sync(self, sqrt_price_x96: int, liquidity: int):
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.liquidity = liquidity
+
+    def price(self, asset_in=None) -> typing.Optional[float]:
+        price = (self.sqrt_price_x96 / Q96) ** 2
+        if asset_in is None or self.is_zero_for_one(asset_in):
+            return price
+        return 1 / price if price else None
+
+    def apply(self, body) -> bool:
+        """
+        Updates state from observed message, returns False for messages model doesn't use.
+        ToncoV3Swap received by pool is applied as filled (price limit is not checked).
+        """
+        if isinstance(body, PoolTrade):
+            self.swap(body.amount_in, body.asset_in)
+        elif isinstance(body, ToncoV3Swap):
+            if body.source_wallet not in self.assets:
+                return False
+            self.swap(body.amount_in, body.source_wallet)
+        elif isinstance(body, PoolSync):
+            self.sync(*body.state)
+        else:
+            return False
+        return True
+
+    def copy(self) -> "ConcentratedLiquidityPool":
+        return ConcentratedLiquidityPool(self.sqrt_price_x96, self.liquidity, self.fee_bps, self.assets)
+
+    @classmethod
+    def from_price(cls, price: float, liquidity: int, fee_bps: int = 30, assets: tuple = (None, None)):
+        return cls(int(math.sqrt(price) * Q96), liquidity, fee_bps, assets)
+
+    def __repr__(self):
+        return f'<ConcentratedLiquidityPool sqrt_price_x96: {self.sqrt_price_x96} liquidity: {self.liquidity} fee_bps: {self.fee_bps}>'
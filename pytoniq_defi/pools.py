@@ -0,0 +1,52 @@
+import typing
+
+from .defi import DedustAsset, DedustPoolParams, DedustPoolType
+
+############################################################
+# Pool indexes
+############################################################
+
+
+class DedustPoolIndex:
+    """
+    Maps (pool_type, asset0, asset1) to pool state in O(1), assets order doesn't matter.
+    """
+    def __init__(self):
+        self.pools = {}
+
+    @staticmethod
+    def key(pool_type: typing.Union[DedustPoolType, int], asset0: DedustAsset, asset1: DedustAsset) -> tuple:
+        return (DedustPoolType(pool_type), frozenset((asset0, asset1)))
+
+    @classmethod
+    def pool_params_key(cls, pool_params: DedustPoolParams) -> tuple:
+        return cls.key(pool_params.pool_type, pool_params.asset0, pool_params.asset1)
+
+    def add(self, pool_params: DedustPoolParams, state: typing.Any):
+        self.pools[self.pool_params_key(pool_params)] = state
+
+    def get(self,
+            pool_type: typing.Union[DedustPoolType, int],
+            asset0: DedustAsset,
+            asset1: DedustAsset,
+            default: typing.Any = None
+            ) -> typing.Any:
+        return self.pools.get(self.key(pool_type, asset0, asset1), default)
+
+    def remove(self, pool_params: DedustPoolParams):
+        self.pools.pop(self.pool_params_key(pool_params), None)
+
+    def __setitem__(self, pool_params: DedustPoolParams, state: typing.Any):
+        self.add(pool_params, state)
+
+    def __getitem__(self, pool_params: DedustPoolParams) -> typing.Any:
+        return self.pools[self.pool_params_key(pool_params)]
+
+    def __contains__(self, pool_params: DedustPoolParams) -> bool:
+        return self.pool_params_key(pool_params) in self.pools
+
+    def __len__(self):
+        return len(self.pools)
+
+    def values(self):
+        return self.pools.values()
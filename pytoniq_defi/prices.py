@@ -0,0 +1,262 @@
+import typing
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, needed only by PriceAggregator
+    np = None
+
+from .defi import DedustEventSwap, ToncoV3Swap
+from .fills import StonfiV2Fill
+
+############################################################
+# Streaming pool prices
+############################################################
+
+# rows of series float buffer: timestamp, price, cumulative price * time
+_TS, _PRICE, _CUM_PT = range(3)
+# rows of series amounts buffer (Python ints): amount_in, amount_out and their cumulative sums
+_IN, _OUT, _CUM_IN, _CUM_OUT = range(4)
+
+
+class PriceSeries:
+    """
+    Ring buffer of last capacity trades of one pool (direction) with running sums.
+    Every trade is stored twice, at i and i + capacity, so retained trades are always
+    a contiguous, time ordered slice of the buffer (no copies on query).
+    Price is amount_out / amount_in, price between trades is the price of the last trade.
+    Amounts and their running sums are Python ints (object array), so volumes are exact.
+    """
+    __slots__ = ('data', 'amounts', 'capacity', 'count', 'start')
+
+    def __init__(self, capacity: int):
+        self.data = np.zeros((3, 2 * capacity), dtype=np.float64)
+        self.amounts = np.zeros((4, 2 * capacity), dtype=object)
+        self.capacity = capacity
+        self.count = 0
+        self.start = 0  # first trade in aggregator window, see PriceAggregator.window
+
+    def add(self, timestamp: float, amount_in: int, amount_out: int):
+        if amount_in <= 0:
+            raise ValueError(f"Trade amount_in should be positive, got {amount_in}")
+        amount_in, amount_out = int(amount_in), int(amount_out)
+        data = self.data
+        amounts = self.amounts
+        capacity = self.capacity
+        position = self.count % capacity
+        price = amount_out / amount_in
+        if self.count:
+            last = (self.count - 1) % capacity
+            last_ts = data[_TS, last]
+            if timestamp < last_ts:
+                raise ValueError(f"Trades should be added in time order, got {timestamp} after {last_ts}")
+            cum_in = amounts[_CUM_IN, last] + amount_in
+            cum_out = amounts[_CUM_OUT, last] + amount_out
+            cum_pt = data[_CUM_PT, last] + data[_PRICE, last] * (timestamp - last_ts)
+        else:
+            cum_in, cum_out, cum_pt = amount_in, amount_out, 0.0
+        row = (timestamp, price, cum_pt)
+        data[:, position] = row
+        data[:, position + capacity] = row
+        row = (amount_in, amount_out, cum_in, cum_out)
+        amounts[:, position] = row
+        amounts[:, position + capacity] = row
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _offset(self) -> typing.Tuple[int, int]:
+        size = min(self.count, self.capacity)
+        return (self.count - size) % self.capacity, size
+
+    def view(self) -> "np.ndarray":
+        """
+        Retained trades, rows: timestamp, price, cum_price_time
+        """
+        offset, size = self._offset()
+        return self.data[:, offset: offset + size]
+
+    def amounts_view(self) -> "np.ndarray":
+        """
+        Retained trades (object array of ints), rows: amount_in, amount_out, cum_in, cum_out
+        """
+        offset, size = self._offset()
+        return self.amounts[:, offset: offset + size]
+
+    def _index(self, timestamp: float) -> int:
+        # last retained trade at or before timestamp, -1 if none
+        if not self.count:
+            return -1
+        return int(np.searchsorted(self.view()[_TS], timestamp, 'right')) - 1
+
+    def _window_start(self, since: float) -> int:
+        # monotonic pointer: O(1) amortized while since doesn't decrease
+        first = max(self.count - self.capacity, 0)
+        data = self.data
+        capacity = self.capacity
+        if self.start < first:
+            self.start = first
+        elif self.start > first and data[_TS, (self.start - 1) % capacity] > since:
+            return self._index(since)  # window moved back
+        while self.start < self.count and data[_TS, self.start % capacity] <= since:
+            self.start += 1
+        return self.start - first - 1
+
+    def _sums(self, since: float, now: float, start: typing.Optional[int] = None):
+        if start is None:
+            start = self._index(since)
+        end = self._index(now)
+        if end < 0 or end <= start:
+            return None
+        view = self.amounts_view()
+        if start >= 0:
+            return view[_CUM_IN, end] - view[_CUM_IN, start], view[_CUM_OUT, end] - view[_CUM_OUT, start]
+        # window starts before retained history
+        return (view[_CUM_IN, end] - view[_CUM_IN, 0] + view[_IN, 0],
+                view[_CUM_OUT, end] - view[_CUM_OUT, 0] + view[_OUT, 0])
+
+    def volume(self, since: float, now: float, start: typing.Optional[int] = None) -> typing.Tuple[int, int]:
+        """
+        (amount_in, amount_out) of trades in (since, now]
+        """
+        sums = self._sums(since, now, start)
+        return sums if sums is not None else (0, 0)
+
+    def vwap(self, since: float, now: float, start: typing.Optional[int] = None) -> typing.Optional[float]:
+        sums = self._sums(since, now, start)
+        if sums is None:
+            return None
+        return sums[1] / sums[0]
+
+    def _integral(self, view, timestamp: float) -> float:
+        index = self._index(timestamp)
+        return view[_CUM_PT, index] + view[_PRICE, index] * (timestamp - view[_TS, index])
+
+    def twap(self, since: float, now: float) -> typing.Optional[float]:
+        """
+        Time weighted price over [since, now], clipped to retained history
+        """
+        if not self.count:
+            return None
+        view = self.view()
+        since = max(since, view[_TS, 0])
+        end = self._index(now)
+        if end < 0:
+            return None
+        if now <= since:
+            return float(view[_PRICE, end])
+        return float(self._integral(view, now) - self._integral(view, since)) / (now - since)
+
+    def last_price(self) -> typing.Optional[float]:
+        if not self.count:
+            return None
+        last = (self.count - 1) % self.capacity
+        return float(self.data[_PRICE, last])
+
+    def last_timestamp(self) -> typing.Optional[float]:
+        if not self.count:
+            return None
+        return float(self.data[_TS, (self.count - 1) % self.capacity])
+
+
+class PriceAggregator:
+    """
+    Per pool TWAP/VWAP/volume over sliding windows from a stream of trades.
+    Memory is bounded: every pool keeps last capacity trades (3 * 2 * capacity float64
+    and 4 * 2 * capacity ints of amounts),
+    windows longer than retained history are clipped to it.
+    Queries with default window use a monotonic pointer per pool (O(1) amortized while time goes forward),
+    explicit windows use binary search over retained trades.
+    Amounts are kept as Python ints, so volumes are exact, prices are float64.
+    Pool key is any hashable, e.g. (pool address, asset in) to keep swap directions apart.
+    """
+    def __init__(self, window: float = 300, capacity: int = 256):
+        if np is None:
+            raise ImportError("PriceAggregator requires numpy")
+        self.window = window
+        self.capacity = capacity
+        self.series = {}
+
+    def __len__(self):
+        return len(self.series)
+
+    def __contains__(self, key) -> bool:
+        return key in self.series
+
+    def add(self, key, timestamp: float, amount_in: int, amount_out: int):
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = PriceSeries(self.capacity)
+        series.add(timestamp, amount_in, amount_out)
+
+    def add_dedust_event(self, pool, event: DedustEventSwap, timestamp: float):
+        """
+        Adds executed Dedust swap, key is (pool, asset_in)
+        """
+        self.add((pool, event.asset_in), timestamp, event.amount_in, event.amount_out)
+
+    def add_stonfi_fill(self, pool, fill: StonfiV2Fill, timestamp: float) -> bool:
+        """
+        Adds filled Ston.fi v2 swap (see StonfiV2FillTracker), key is (pool, router wallet of token in).
+        Refunds and fills without amount_in are skipped, returns whether trade was added.
+        """
+        pay_to = fill.pay_to
+        if not fill.filled or fill.amount_in <= 0:
+            return False
+        asset_in = pay_to.token1_address if pay_to.amount0_out else pay_to.token0_address
+        self.add((pool, asset_in), timestamp, fill.amount_in, fill.amount_out)
+        return True
+
+    def add_tonco_swap(self, pool, swap: ToncoV3Swap, amount_out: int, timestamp: float):
+        """
+        Adds executed Tonco v3 swap, amount_out is the amount of pay out jetton transfer of the swap,
+        key is (pool, router wallet of token in)
+        """
+        self.add((pool, swap.source_wallet), timestamp, swap.amount_in, amount_out)
+
+    def _bounds(self, series: PriceSeries, window: typing.Optional[float], now: typing.Optional[float]):
+        if now is None:
+            now = series.last_timestamp()
+        if window is None:
+            return now - self.window, now, series._window_start(now - self.window)
+        return now - window, now, None
+
+    def volume(self, key, window: typing.Optional[float] = None, now: typing.Optional[float] = None
+               ) -> typing.Tuple[int, int]:
+        """
+        (amount_in, amount_out) of trades in window ending at now (default: last trade of pool)
+        """
+        series = self.series.get(key)
+        if series is None or not series.count:
+            return 0, 0
+        return series.volume(*self._bounds(series, window, now))
+
+    def vwap(self, key, window: typing.Optional[float] = None, now: typing.Optional[float] = None) -> typing.Optional[float]:
+        series = self.series.get(key)
+        if series is None or not series.count:
+            return None
+        return series.vwap(*self._bounds(series, window, now))
+
+    def twap(self, key, window: typing.Optional[float] = None, now: typing.Optional[float] = None) -> typing.Optional[float]:
+        series = self.series.get(key)
+        if series is None or not series.count:
+            return None
+        if now is None:
+            now = series.last_timestamp()
+        return series.twap(now - (self.window if window is None else window), now)
+
+    def last_price(self, key) -> typing.Optional[float]:
+        series = self.series.get(key)
+        return series.last_price() if series is not None else None
+
+    def vwaps(self, window: typing.Optional[float] = None, now: typing.Optional[float] = None) -> dict:
+        """
+        VWAP of every pool with trades in window
+        """
+        result = {}
+        for key, series in self.series.items():
+            if series.count:
+                price = series.vwap(*self._bounds(series, window, now))
+                if price is not None:
+                    result[key] = price
+        return result
@@ -0,0 +1,216 @@
+import math
+import typing
+
+from pytoniq_core import Cell, Slice, Address
+
+from .defi import (JettonTransfer, JettonTransferNotification, JettonBurn, JettonInternalTransfer,
+                   JettonBurnNotification, JettonExcesses, DedustMessageSwap, DedustMessagePayoutFromPool, DedustJettonPayloadSwap,
+                   StonfiMessageSwap, StonfiMessageProvideLiquidity, StonfiV2MessageSwap, StonfiV2pTONTransfer)
+
+############################################################
+# Raw bits predicates
+############################################################
+
+COINS = -1
+ADDRESS = -2
+
+# leading root cell fields after 32-bit op, positive kind is uint bit length, None name is skipped bits
+# (e.g. Maybe bit of ref payload). Also read by columns.MessageColumns.
+RAW_LAYOUTS = {
+    JettonTransfer.op: (('query_id', 64), ('amount', COINS), ('destination', ADDRESS), ('response_destination', ADDRESS),
+                        (None, 1), ('forward_ton_amount', COINS)),
+    JettonTransferNotification.op: (('query_id', 64), ('amount', COINS), ('sender', ADDRESS)),
+    JettonBurn.op: (('query_id', 64), ('amount', COINS), ('response_destination', ADDRESS)),
+    JettonInternalTransfer.op: (('query_id', 64), ('amount', COINS), ('from_', ADDRESS), ('response_address', ADDRESS),
+                                ('forward_ton_amount', COINS)),
+    JettonBurnNotification.op: (('query_id', 64), ('amount', COINS), ('sender', ADDRESS), ('response_destination', ADDRESS)),
+    JettonExcesses.op: (('query_id', 64),),
+    DedustMessageSwap.op: (('query_id', 64), ('amount', COINS), ('pool_addr', ADDRESS)),
+    DedustMessagePayoutFromPool.op: (('query_id', 64), ('amount', COINS), ('recipient_addr', ADDRESS)),  # proof is a ref
+    DedustJettonPayloadSwap.op: (('pool_addr', ADDRESS),),
+    StonfiMessageSwap.op: (('token_wallet', ADDRESS), ('min_out', COINS), ('to_address', ADDRESS)),
+    StonfiMessageProvideLiquidity.op: (('token_wallet', ADDRESS), ('min_lp_out', COINS)),
+    StonfiV2MessageSwap.op: (('token_wallet1', ADDRESS), ('refund_address', ADDRESS), ('excesses_address', ADDRESS)),
+    StonfiV2pTONTransfer.op: (('query_id', 64), ('ton_amount', COINS), ('refund_address', ADDRESS)),
+    0xa7fb58f8: (('query_id', 64), ('owner_address', ADDRESS), ('source_wallet', ADDRESS)),  # Tonco v3 swap
+}
+
+
+def address_key(address: typing.Union[Address, str]) -> int:
+    """
+    workchain (as uint8) and hash part packed in one int, the form addresses are compared in raw filters
+    """
+    if isinstance(address, str):
+        address = Address(address)
+    return ((address.wc & 0xff) << 256) | int.from_bytes(address.hash_part, 'big')
+
+
+class AddressBloomFilter:
+    """
+    Bloom filter of address keys. Address hash part is already uniformly distributed,
+    so bit positions are taken from its 32-bit chunks instead of computing extra hashes.
+    """
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = min(max(int(round(size / capacity * math.log(2))), 1), 8)
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: int):
+        size = self.size
+        wc = key >> 256
+        for i in range(self.hashes):
+            yield (((key >> (32 * i)) & 0xffffffff) ^ (wc * 0x9e3779b1)) % size
+
+    def add(self, key: typing.Union[int, Address, str]):
+        if not isinstance(key, int):
+            key = address_key(key)
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys: typing.Iterable[typing.Union[int, Address, str]]):
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: typing.Union[int, Address, str]) -> bool:
+        if not isinstance(key, int):
+            key = address_key(key)
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+
+def watched_addresses(addresses: typing.Iterable[typing.Union[Address, str]],
+                      bloom_threshold: int = 1000000,
+                      error_rate: float = 0.001
+                      ) -> typing.Union[typing.Set[int], AddressBloomFilter]:
+    """
+    Set of address keys for RawFilter, Bloom filter if there are more than bloom_threshold addresses
+    """
+    keys = [address_key(address) for address in addresses]
+    if len(keys) <= bloom_threshold:
+        return set(keys)
+    bloom = AddressBloomFilter(len(keys), error_rate)
+    bloom.update(keys)
+    return bloom
+
+
+class RawFilter:
+    """
+    Message bodies predicates evaluated on root cell bits before deserialization, all given predicates should hold:
+    ops: body op is in set
+    addresses: any of address_fields (default all address fields of layout) is in addresses
+        (set of address_key values or AddressBloomFilter, see watched_addresses)
+    min_amount: amount_field (default "amount") >= min_amount
+    Bodies of ops without layout in RAW_LAYOUTS pass only if no address or amount predicate is given.
+    """
+    def __init__(self,
+                 ops: typing.Optional[typing.Iterable[int]] = None,
+                 addresses: typing.Optional[typing.Container[int]] = None,
+                 address_fields: typing.Optional[typing.Iterable[str]] = None,
+                 min_amount: typing.Optional[int] = None,
+                 amount_field: str = 'amount',
+                 layouts: typing.Optional[dict] = None
+                 ):
+        self.ops = frozenset(ops) if ops is not None else None
+        self.addresses = addresses
+        self.min_amount = min_amount
+        address_fields = frozenset(address_fields) if address_fields is not None else None
+        # per op: fields to read up to last needed one, (kind, check) where check is 'a', 'm' or None
+        self._programs = {}
+        for op, layout in (layouts or RAW_LAYOUTS).items():
+            if self.ops is not None and op not in self.ops:
+                continue
+            program = []
+            has_address = has_amount = False
+            for name, kind in layout:
+                check = None
+                if addresses is not None and kind == ADDRESS and (address_fields is None or name in address_fields):
+                    check = 'a'
+                    has_address = True
+                elif min_amount is not None and name == amount_field:
+                    check = 'm'
+                    has_amount = True
+                program.append((kind, check))
+            if (addresses is not None and not has_address) or (min_amount is not None and not has_amount):
+                continue  # predicate can't be evaluated for this op
+            while program and program[-1][1] is None:
+                program.pop()
+            self._programs[op] = (tuple(program), has_address)
+
+    def match(self, body: typing.Union[Cell, Slice]) -> bool:
+        if isinstance(body, Cell):
+            data = body.data
+            length = len(body.bits)
+        else:
+            data = body.bits.tobytes()
+            length = len(body.bits)
+        if length < 32:
+            return False
+        total = len(data) * 8
+        value = int.from_bytes(data, 'big')
+        op = value >> (total - 32)
+        if self.ops is not None and op not in self.ops:
+            return False
+        entry = self._programs.get(op)
+        if entry is None:
+            return self.addresses is None and self.min_amount is None
+        program, need_address = entry
+        address_hit = False
+        position = 32
+        for kind, check in program:
+            # bounds are checked before every shift: truncated bodies don't match
+            if kind > 0:
+                position += kind
+                if position > length:
+                    return False
+                field = (value >> (total - position)) & ((1 << kind) - 1)
+            elif kind == COINS:
+                position += 4
+                if position > length:
+                    return False
+                size = ((value >> (total - position)) & 0xf) * 8
+                position += size
+                if position > length:
+                    return False
+                field = (value >> (total - position)) & ((1 << size) - 1)
+            else:
+                position += 2
+                if position > length:
+                    return False
+                tag = (value >> (total - position)) & 0b11
+                if tag == 0b10:
+                    if position + 265 > length or (value >> (total - position - 1)) & 1:
+                        return False  # truncated or anycast, not used by watched contracts
+                    position += 265
+                    field = (value >> (total - position)) & ((1 << 264) - 1)
+                elif tag == 0b00:
+                    field = None
+                elif tag == 0b01:
+                    position += 9
+                    if position > length:
+                        return False
+                    position += (value >> (total - position)) & 0x1ff
+                    if position > length:
+                        return False
+                    field = None
+                else:
+                    return False  # addr_var is not supported
+            if check == 'a':
+                if not address_hit and field is not None and field in self.addresses:
+                    address_hit = True
+            elif check == 'm':
+                if field < self.min_amount:
+                    return False
+        return address_hit or not need_address
+
+    def filter(self, bodies: typing.Iterable[typing.Union[Cell, Slice]]) -> typing.List[typing.Union[Cell, Slice]]:
+        match = self.match
+        return [body for body in bodies if match(body)]
@@ -0,0 +1,304 @@
+import multiprocessing
+import os
+import pickle
+import typing
+
+from .defi import (DedustAsset, DedustMessageSwap, DedustJettonPayloadSwap, StonfiV2MessageSwap, StonfiV2MessagePayTo,
+                   ToncoV3Swap, SwapKind, DedustEventSwap, DedustEventDeposit, DedustEventWithdrawal, _dumps_state)
+from .fills import StonfiV2FillTracker
+from .transaction import TransactionRecord
+
+############################################################
+# Historical replay
+############################################################
+
+DEDUST_EVENTS = (DedustEventSwap, DedustEventDeposit, DedustEventWithdrawal)
+
+
+class Order:
+    """
+    Hypothetical order emitted by strategy.
+    DedustMessageSwap needs nothing else (native TON in, pools and limits are in steps),
+    DedustJettonPayloadSwap needs asset_in and amount_in (jetton transfer amount),
+    StonfiV2MessageSwap and ToncoV3Swap need pool, asset_in and amount_in (taken from ToncoV3Swap if not given).
+    """
+    __slots__ = ('message', 'pool', 'amount_in', 'asset_in')
+
+    def __init__(self, message, pool=None, amount_in: typing.Optional[int] = None, asset_in=None):
+        self.message = message
+        self.pool = pool
+        self.amount_in = amount_in
+        self.asset_in = asset_in
+
+
+class Fill:
+    __slots__ = ('lt', 'pool', 'asset_in', 'amount_in', 'asset_out', 'amount_out', 'message')
+
+    def __init__(self, lt, pool, asset_in, amount_in, asset_out, amount_out, message):
+        self.lt = lt
+        self.pool = pool
+        self.asset_in = asset_in
+        self.amount_in = amount_in
+        self.asset_out = asset_out
+        self.amount_out = amount_out
+        self.message = message
+
+    def __repr__(self):
+        return f'<Fill lt: {self.lt} pool: {self.pool} {self.amount_in} {self.asset_in} -> {self.amount_out} {self.asset_out}>'
+
+
+class ReplayResult:
+    """
+    Counters, fills and asset balance changes of strategy, see value() for PnL
+    """
+    def __init__(self):
+        self.events = 0
+        self.applied = 0
+        self.orders = 0
+        self.rejected = 0
+        self.fills = []
+        self.balances = {}
+
+    def merge(self, other: "ReplayResult") -> "ReplayResult":
+        self.events += other.events
+        self.applied += other.applied
+        self.orders += other.orders
+        self.rejected += other.rejected
+        self.fills.extend(other.fills)
+        for asset, amount in other.balances.items():
+            self.balances[asset] = self.balances.get(asset, 0) + amount
+        return self
+
+    def value(self, prices: dict) -> float:
+        """
+        PnL in numeraire, prices maps asset to its price in numeraire (numeraire itself maps to 1)
+        """
+        return sum(amount * prices[asset] for asset, amount in self.balances.items() if amount)
+
+    def __repr__(self):
+        return (f'<ReplayResult events: {self.events} applied: {self.applied} orders: {self.orders} '
+                f'rejected: {self.rejected} balances: {self.balances}>')
+
+
+class ReplayEngine:
+    """
+    Streams archived (lt, pool, body) events in chain order into pool models
+    (see pool_models: each model updates itself from bodies it understands),
+    after every applied event calls strategy(engine, lt, pool, body), which may return orders.
+    Orders are executed against models at once; with impact=True fills move model state,
+    until the next observed event overwrites it.
+    """
+    def __init__(self,
+                 pools: dict,
+                 strategy: typing.Optional[typing.Callable] = None,
+                 impact: bool = True,
+                 keep_fills: bool = True
+                 ):
+        self.pools = pools
+        self.strategy = strategy
+        self.impact = impact
+        self.keep_fills = keep_fills
+        self.result = ReplayResult()
+        self.lt = 0
+
+    def _route(self, order: Order) -> typing.Optional[list]:
+        # [(pool key, model, asset_in, amount_in, asset_out, amount_out)] or None if order can't be filled
+        message = order.message
+        hops = []
+        if isinstance(message, (DedustMessageSwap, DedustJettonPayloadSwap)):
+            if isinstance(message, DedustMessageSwap):
+                asset, amount = order.asset_in, message.amount
+                model = self.pools.get(message.step.pool_addr)
+                if asset is None and model is not None and None not in model.assets:
+                    asset = DedustAsset.native()  # pool assets are DedustAssets
+            else:
+                asset, amount = order.asset_in, order.amount_in
+            step = message.step
+            while step is not None:
+                params = step.step_params
+                model = self.pools.get(step.pool_addr)
+                if model is None or params.kind != SwapKind.given_in:
+                    return None
+                amount_out = model.amount_out(amount, asset)
+                if amount_out < params.limit or amount_out <= 0:
+                    return None
+                asset_out = model.other(asset)
+                hops.append((step.pool_addr, model, asset, amount, asset_out, amount_out))
+                asset, amount, step = asset_out, amount_out, params.next
+            return hops
+        if isinstance(message, (StonfiV2MessageSwap, ToncoV3Swap)):
+            model = self.pools.get(order.pool)
+            amount = order.amount_in
+            if amount is None and isinstance(message, ToncoV3Swap):
+                amount = message.amount_in
+            if model is None or amount is None:
+                return None
+            amount_out = model.amount_out(amount, order.asset_in)
+            if amount_out < message.min_out or amount_out <= 0:
+                return None
+            return [(order.pool, model, order.asset_in, amount, model.other(order.asset_in), amount_out)]
+        return None
+
+    def execute(self, order: typing.Union[Order, DedustMessageSwap]) -> typing.Optional[list]:
+        """
+        Fills order against current models, returns list of fills (one per hop) or None if rejected
+        """
+        if not isinstance(order, Order):
+            order = Order(order)
+        result = self.result
+        result.orders += 1
+        try:
+            hops = self._route(order)
+        except ValueError:
+            hops = None  # asset is not in pool
+        if not hops:
+            result.rejected += 1
+            return None
+        fills = []
+        balances = result.balances
+        for pool, model, asset_in, amount_in, asset_out, amount_out in hops:
+            if self.impact:
+                model.swap(amount_in, asset_in)
+            fills.append(Fill(self.lt, pool, asset_in, amount_in, asset_out, amount_out, order.message))
+        first, last = hops[0], hops[-1]
+        balances[first[2]] = balances.get(first[2], 0) - first[3]
+        balances[last[4]] = balances.get(last[4], 0) + last[5]
+        if self.keep_fills:
+            result.fills.extend(fills)
+        return fills
+
+    def run(self, events: typing.Iterable[typing.Tuple[int, typing.Any, typing.Any]]) -> ReplayResult:
+        pools = self.pools
+        strategy = self.strategy
+        result = self.result
+        execute = self.execute
+        for lt, pool, body in events:
+            result.events += 1
+            model = pools.get(pool)
+            if model is None or not model.apply(body):
+                continue
+            result.applied += 1
+            self.lt = lt
+            if strategy is not None:
+                orders = strategy(self, lt, pool, body)
+                if orders:
+                    for order in orders:
+                        execute(order)
+        return result
+
+
+def events_from_transactions(records: typing.Iterable[TransactionRecord],
+                             stonfi: typing.Optional[StonfiV2FillTracker] = None
+                             ) -> typing.Iterator[typing.Tuple[int, typing.Any, typing.Any]]:
+    """
+    (lt, pool, event) of pool events found in transactions, in given (chain) order:
+    Dedust events sent by pools, Ston.fi v2 fills (swap transfer joined with pay_to sent by pool, see stonfi tracker)
+    and ToncoV3Swap received by pools, all applied by pool_models.
+    """
+    if stonfi is None:
+        stonfi = StonfiV2FillTracker()
+    for record in records:
+        for message in record.out_msgs:
+            if isinstance(message.body, DEDUST_EVENTS):
+                yield message.created_lt or record.lt, message.src, message.body
+        fills = stonfi.process_transaction(record)
+        in_msg = record.in_msg
+        if in_msg is None:
+            continue
+        if isinstance(in_msg.body, ToncoV3Swap):
+            yield record.lt, record.account, in_msg.body
+        elif isinstance(in_msg.body, StonfiV2MessagePayTo):
+            for fill in fills:  # pay_to sent by pool to router
+                if fill.filled:
+                    yield in_msg.created_lt or record.lt, in_msg.src, fill
+
+
+def _replay_shard(pools: dict, strategy_factory, events: typing.Iterable, impact: bool, keep_fills: bool) -> ReplayResult:
+    strategy = strategy_factory() if strategy_factory is not None else None
+    return ReplayEngine(pools, strategy, impact, keep_fills).run(events)
+
+
+def _queued_events(queue) -> typing.Iterator:
+    while True:
+        batch = queue.get()
+        if batch is None:
+            return
+        yield from pickle.loads(batch)
+
+
+def _replay_queued_shard(index: int, pools: dict, strategy_factory, queue, results, impact: bool, keep_fills: bool):
+    events = _queued_events(queue)
+    try:
+        results.put((index, _replay_shard(pools, strategy_factory, events, impact, keep_fills)))
+    except BaseException as e:
+        results.put((index, e))
+        for _ in events:  # drain, so producer is not blocked
+            pass
+
+
+def replay_sharded(events: typing.Iterable[typing.Tuple[int, typing.Any, typing.Any]],
+                   pools: dict,
+                   strategy_factory: typing.Optional[typing.Callable] = None,
+                   processes: typing.Optional[int] = None,
+                   impact: bool = True,
+                   keep_fills: bool = True,
+                   batch_size: int = 1024,
+                   queue_size: int = 8
+                   ) -> ReplayResult:
+    """
+    Replays events in processes, each owning a subset of pools; chain order is kept within every shard.
+    Events are streamed to workers in batches of batch_size through queues of queue_size batches,
+    so memory is bounded whatever the length of events.
+    Where fork is available workers inherit pools instead of receiving pickled copies.
+    strategy_factory (picklable, e.g. module level function) creates strategy in each process.
+    Orders touching pools of another shard are rejected, so strategies should be per pool.
+    Events of pools not in pools are dropped; with processes > 1 models are
+    updated in worker copies, pools passed here keep their initial state.
+    """
+    processes = max(min(processes or os.cpu_count() or 1, len(pools)), 1)
+    result = ReplayResult()
+    if processes == 1:
+        events = (event for event in events if event[1] in pools)
+        return result.merge(_replay_shard(pools, strategy_factory, events, impact, keep_fills))
+    shard_of = {pool: i % processes for i, pool in enumerate(pools)}
+    shard_pools = [{} for _ in range(processes)]
+    for pool, model in pools.items():
+        shard_pools[shard_of[pool]][pool] = model
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    results = context.Queue()
+    queues = [context.Queue(queue_size) for _ in range(processes)]
+    workers = [context.Process(target=_replay_queued_shard, daemon=True,
+                               args=(i, shard_pools[i], strategy_factory, queues[i], results, impact, keep_fills))
+               for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        batches = [[] for _ in range(processes)]
+        for event in events:
+            shard = shard_of.get(event[1])
+            if shard is None:
+                continue
+            batch = batches[shard]
+            batch.append(event)
+            if len(batch) >= batch_size:
+                queues[shard].put(_dumps_state(batch))
+                batches[shard] = []
+        for queue, batch in zip(queues, batches):
+            if batch:
+                queue.put(_dumps_state(batch))
+            queue.put(None)
+        shard_results = dict(results.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+    for i in range(processes):
+        if isinstance(shard_results[i], BaseException):
+            raise shard_results[i]
+        result.merge(shard_results[i])
+    return result
@@ -0,0 +1,137 @@
+import struct
+import typing
+
+from pytoniq_core import Address
+
+from .defi import DedustEventSwap, DedustEventDeposit, DedustEventWithdrawal
+from .transaction import DecodedMessage, TransactionRecord
+
+############################################################
+# Dedust pool reserves from events
+############################################################
+
+SNAPSHOT_MAGIC = b'DRS1'
+
+_entry_header = struct.Struct('>b32sQ')
+
+DEDUST_EVENTS = (DedustEventSwap, DedustEventDeposit, DedustEventWithdrawal)
+
+
+class PoolReserves:
+    """
+    Reserves of pool after event with logical time lt (0 if unknown)
+    """
+    __slots__ = ('reserve0', 'reserve1', 'lt')
+
+    def __init__(self, reserve0: int, reserve1: int, lt: int = 0):
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+        self.lt = lt
+
+    def __eq__(self, other):
+        if not isinstance(other, PoolReserves):
+            return NotImplemented
+        return (self.reserve0, self.reserve1, self.lt) == (other.reserve0, other.reserve1, other.lt)
+
+    def __repr__(self):
+        return f'<PoolReserves reserve0: {self.reserve0} reserve1: {self.reserve1} lt: {self.lt}>'
+
+
+class DedustReserveTracker:
+    """
+    In-memory reserves of Dedust pools updated from pool events (external out messages of pools).
+    Every event carries reserves after it, so an update is O(1) and doesn't depend on previous state.
+    Events with lt not greater than the stored one are skipped, so replaying a stream from before
+    a snapshot is harmless.
+    """
+    def __init__(self):
+        self.pools = {}
+
+    def apply(self, pool: typing.Union[Address, str], event, lt: int = 0) -> bool:
+        """
+        Updates reserves of pool with decoded event, returns False if event is not a pool event or is stale
+        """
+        if not isinstance(event, DEDUST_EVENTS):
+            return False
+        if isinstance(pool, str):
+            pool = Address(pool)
+        reserves = self.pools.get(pool)
+        if reserves is None:
+            self.pools[pool] = PoolReserves(event.reserve0, event.reserve1, lt)
+            return True
+        if lt and lt <= reserves.lt:
+            return False
+        reserves.reserve0 = event.reserve0
+        reserves.reserve1 = event.reserve1
+        if lt:
+            reserves.lt = lt  # unknown lt (0) keeps stale replay guard of the last known one
+        return True
+
+    def apply_message(self, message: DecodedMessage) -> bool:
+        """
+        Applies external out message decoded by decode_message, pool is message source
+        """
+        if message.body is None or message.src is None:
+            return False
+        return self.apply(message.src, message.body, message.created_lt or 0)
+
+    def apply_transaction(self, record: TransactionRecord) -> int:
+        """
+        Applies pool events of transaction out messages, returns number of applied events
+        """
+        applied = 0
+        for message in record.out_msgs:
+            if isinstance(message.body, DEDUST_EVENTS):
+                applied += self.apply_message(message)
+        return applied
+
+    def get(self, pool: typing.Union[Address, str]) -> typing.Optional[PoolReserves]:
+        if isinstance(pool, str):
+            pool = Address(pool)
+        return self.pools.get(pool)
+
+    def __getitem__(self, pool: typing.Union[Address, str]) -> PoolReserves:
+        reserves = self.get(pool)
+        if reserves is None:
+            raise KeyError(pool)
+        return reserves
+
+    def __contains__(self, pool: typing.Union[Address, str]) -> bool:
+        return self.get(pool) is not None
+
+    def __len__(self):
+        return len(self.pools)
+
+    def snapshot(self) -> bytes:
+        """
+        Compact binary snapshot of all pools reserves, see restore
+        """
+        result = bytearray(SNAPSHOT_MAGIC)
+        result += len(self.pools).to_bytes(4, 'big')
+        for pool, reserves in self.pools.items():
+            result += _entry_header.pack(pool.wc, pool.hash_part, reserves.lt)
+            for reserve in (reserves.reserve0, reserves.reserve1):
+                size = (reserve.bit_length() + 7) // 8
+                result.append(size)
+                result += reserve.to_bytes(size, 'big')
+        return bytes(result)
+
+    @classmethod
+    def restore(cls, data: bytes) -> "DedustReserveTracker":
+        if data[:4] != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a reserves snapshot, unknown magic: {data[:4]}")
+        tracker = cls()
+        count = int.from_bytes(data[4:8], 'big')
+        i = 8
+        for _ in range(count):
+            wc, hash_part, lt = _entry_header.unpack_from(data, i)
+            i += _entry_header.size
+            values = []
+            for _ in range(2):
+                size = data[i]
+                values.append(int.from_bytes(data[i + 1: i + 1 + size], 'big'))
+                i += 1 + size
+            tracker.pools[Address((wc, hash_part))] = PoolReserves(values[0], values[1], lt)
+        if i != len(data):
+            raise ValueError("Reserves snapshot has trailing bytes")
+        return tracker
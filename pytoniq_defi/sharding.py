@@ -0,0 +1,318 @@
+import multiprocessing
+import os
+import pickle
+import typing
+from types import MappingProxyType
+
+from pytoniq_core import Address
+
+from .defi import (JettonTransfer, JettonTransferNotification, JettonInternalTransfer, JettonBurn, JettonBurnNotification,
+                   DedustMessageSwap, DedustJettonPayloadSwap, DedustMessagePayoutFromPool,
+                   StonfiMessageSwap, StonfiMessageProvideLiquidity, StonfiV2MessageSwap, StonfiV2MessageCrossSwap,
+                   StonfiV2MessageProvideLiquidity, StonfiV2MessagePayTo, StonfiV2MessageBurnNotification,
+                   StonfiV2pTONTransfer, ToncoV3Swap, _dumps_state)
+from .transaction import DecodedMessage, TransactionRecord
+
+############################################################
+# Account partitioned processing
+############################################################
+
+CHECKPOINT_VERSION = 1
+
+# attribute path to the account whose state message changes
+PARTITION_FIELDS = MappingProxyType({
+    JettonTransfer: ('destination',),
+    JettonTransferNotification: ('sender',),
+    JettonInternalTransfer: ('from_',),
+    JettonBurn: ('response_destination',),
+    JettonBurnNotification: ('sender',),
+    DedustMessageSwap: ('step', 'pool_addr'),
+    DedustJettonPayloadSwap: ('step', 'pool_addr'),
+    DedustMessagePayoutFromPool: ('recipient_addr',),
+    StonfiMessageSwap: ('to_address',),
+    StonfiMessageProvideLiquidity: ('token_wallet',),
+    StonfiV2MessageSwap: ('receiver',),
+    StonfiV2MessageCrossSwap: ('receiver',),
+    StonfiV2MessageProvideLiquidity: ('to_address',),
+    StonfiV2MessagePayTo: ('to_address',),
+    StonfiV2MessageBurnNotification: ('from_address',),
+    StonfiV2pTONTransfer: ('refund_address',),
+    ToncoV3Swap: ('owner_address',),
+})
+
+
+def partition_address(message, fields: typing.Mapping = PARTITION_FIELDS) -> typing.Optional[Address]:
+    """
+    Account of decoded body by fields of its class.
+    For DecodedMessage bodies without such address (e.g. excesses, Dedust pool events) falls back
+    to destination of internal messages and source of external out messages (pool of pool events).
+    TransactionRecord is partitioned by its account.
+    """
+    if isinstance(message, TransactionRecord):
+        return message.account
+    if isinstance(message, DecodedMessage):
+        address = partition_address(message.body, fields) if message.body is not None else None
+        if address is not None:
+            return address
+        return message.dest if isinstance(message.dest, Address) else message.src
+    path = fields.get(type(message))
+    if path is None:
+        return None
+    for attribute in path:
+        message = getattr(message, attribute, None)
+        if message is None:
+            return None
+    return message
+
+
+class Partitioner:
+    """
+    Maps accounts to partitions through a fixed number of slots: slot is taken from address hash
+    (stable across processes and runs), slots are assigned to partitions.
+    Rebalancing moves whole slots, so state of an account always lives in one slot.
+    Messages without account go to slot 0.
+    """
+    def __init__(self, partitions: int, slots: int = 256, fields: typing.Optional[typing.Mapping] = None):
+        if not 0 < partitions <= slots:
+            raise ValueError(f"Partitions should be in [1, {slots}], got {partitions}")
+        self.partitions = partitions
+        self.slots = slots
+        self.fields = PARTITION_FIELDS if fields is None else fields
+        self.assignment = [slot % partitions for slot in range(slots)]
+
+    def slot(self, message) -> int:
+        address = partition_address(message, self.fields)
+        if address is None:
+            return 0
+        return int.from_bytes(address.hash_part[:4], 'big') % self.slots
+
+    def partition(self, message) -> int:
+        return self.assignment[self.slot(message)]
+
+    def rebalance(self, partitions: int) -> typing.Dict[int, typing.Tuple[int, int]]:
+        """
+        Reassigns slots evenly to new number of partitions moving as few slots as possible,
+        returns moved slots: {slot: (old partition, new partition)}
+        """
+        if not 0 < partitions <= self.slots:
+            raise ValueError(f"Partitions should be in [1, {self.slots}], got {partitions}")
+        quota = [self.slots // partitions + (i < self.slots % partitions) for i in range(partitions)]
+        counts = [0] * partitions
+        free = []
+        for slot, partition in enumerate(self.assignment):
+            if partition < partitions and counts[partition] < quota[partition]:
+                counts[partition] += 1
+            else:
+                free.append(slot)
+        targets = [partition for partition in range(partitions) for _ in range(quota[partition] - counts[partition])]
+        moves = {}
+        for slot, partition in zip(free, targets):
+            moves[slot] = (self.assignment[slot], partition)
+            self.assignment[slot] = partition
+        self.partitions = partitions
+        return moves
+
+
+def _process_batch(processors: dict, factory: typing.Callable, batch: list):
+    for slot, item in batch:
+        processor = processors.get(slot)
+        if processor is None:
+            processor = processors[slot] = factory()
+        processor.process(item)
+
+
+def _worker(connection, factory: typing.Callable):
+    processors = {}
+    while True:
+        command, argument = connection.recv()
+        if command == 'batch':
+            _process_batch(processors, factory, pickle.loads(argument))
+        elif command == 'give':
+            processors.update(argument)
+        elif command == 'take':
+            connection.send({slot: processors.pop(slot) for slot in argument if slot in processors})
+        elif command == 'snapshot':
+            connection.send(processors)
+        elif command == 'stop':
+            connection.send(processors)
+            connection.close()
+            return
+
+
+class ShardedProcessor:
+    """
+    Runs stateful processors (objects with process(message), e.g. StonfiV2FillTracker) in worker processes,
+    one processor per slot of Partitioner created by factory (picklable, e.g. a class).
+    Messages of an account are processed in stream order by the same processor; order across slots is not kept.
+    Accounts are found by fields (see partition_address), by default by PARTITION_FIELDS attribute of factory
+    if it has one (e.g. JettonLedger partitions messages by receiving wallet), else by module PARTITION_FIELDS.
+    Messages are sent to workers in batches of batch_size, so workers should get enough work per message
+    to outweigh pickling. With processes=1 everything runs in this process.
+
+    checkpoint() returns processed stream position and processors state, ShardedProcessor(..., checkpoint=data)
+    continues from it: feed the stream from position on. rebalance() changes number of processes on the fly.
+    """
+    def __init__(self,
+                 factory: typing.Callable,
+                 processes: typing.Optional[int] = None,
+                 slots: int = 256,
+                 fields: typing.Optional[typing.Mapping] = None,
+                 batch_size: int = 1024,
+                 checkpoint: typing.Optional[bytes] = None
+                 ):
+        self.factory = factory
+        self.batch_size = batch_size
+        self.position = 0
+        processors = {}
+        if checkpoint is not None:
+            state = pickle.loads(checkpoint)
+            if state.get('version') != CHECKPOINT_VERSION:
+                raise ValueError(f"Unknown checkpoint version: {state.get('version')}")
+            slots = state['slots']
+            self.position = state['position']
+            processors = state['processors']
+        processes = processes or os.cpu_count() or 1
+        if fields is None:
+            fields = getattr(factory, 'PARTITION_FIELDS', PARTITION_FIELDS)
+        self.partitioner = Partitioner(processes, slots, fields)
+        self.processors = {}  # processes == 1
+        self.workers = []  # (process, connection)
+        self.batches = []
+        self._context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+        self._resize(processes)
+        self._give(processors)
+
+    def _resize(self, processes: int):
+        if processes == 1:
+            self.batches = [[]]
+            return
+        while len(self.workers) < processes:
+            connection, child = self._context.Pipe()
+            process = self._context.Process(target=_worker, args=(child, self.factory), daemon=True)
+            process.start()
+            child.close()
+            self.workers.append((process, connection))
+        self.batches = [[] for _ in range(processes)]
+
+    def _give(self, processors: dict):
+        if not self.workers:
+            self.processors.update(processors)
+            return
+        assignment = self.partitioner.assignment
+        parts = [{} for _ in self.workers]
+        for slot, processor in processors.items():
+            parts[assignment[slot]][slot] = processor
+        for (_, connection), part in zip(self.workers, parts):
+            if part:
+                connection.send(('give', part))
+
+    def process(self, message):
+        slot = self.partitioner.slot(message)
+        if not self.workers:
+            _process_batch(self.processors, self.factory, ((slot, message),))
+        else:
+            partition = self.partitioner.assignment[slot]
+            batch = self.batches[partition]
+            batch.append((slot, message))
+            if len(batch) >= self.batch_size:
+                self.workers[partition][1].send(('batch', _dumps_state(batch)))
+                self.batches[partition] = []
+        self.position += 1
+
+    def run(self, messages: typing.Iterable[typing.Any]) -> int:
+        """
+        Processes messages, returns stream position
+        """
+        process = self.process
+        for message in messages:
+            process(message)
+        self.flush()
+        return self.position
+
+    def flush(self):
+        for partition, batch in enumerate(self.batches):
+            if batch and self.workers:
+                self.workers[partition][1].send(('batch', _dumps_state(batch)))
+                self.batches[partition] = []
+
+    def _collect(self, command: str) -> dict:
+        self.flush()
+        if not self.workers:
+            return dict(self.processors)
+        for _, connection in self.workers:
+            connection.send((command, None))
+        processors = {}
+        for _, connection in self.workers:
+            processors.update(connection.recv())
+        return processors
+
+    def snapshot(self) -> dict:
+        """
+        Copy of processors state: {slot: processor}
+        """
+        return self._collect('snapshot')
+
+    def checkpoint(self) -> bytes:
+        return pickle.dumps({
+            'version': CHECKPOINT_VERSION,
+            'slots': self.partitioner.slots,
+            'position': self.position,
+            'processors': self.snapshot(),
+        })
+
+    def rebalance(self, processes: int) -> int:
+        """
+        Changes number of processes moving processors of reassigned slots only, returns number of moved slots
+        """
+        self.flush()
+        old = len(self.workers) or 1
+        if processes == old:
+            return 0
+        if processes == 1 or old == 1:
+            processors = self.close()
+            moves = self.partitioner.rebalance(processes)
+            self._resize(processes)
+            self._give(processors)
+            return len(moves)
+        moves = self.partitioner.rebalance(processes)
+        taken = [[] for _ in self.workers]
+        for slot, (source, _) in moves.items():
+            taken[source].append(slot)
+        moved = {}
+        for (_, connection), slots in zip(self.workers, taken):
+            if slots:
+                connection.send(('take', slots))
+                moved.update(connection.recv())
+        if processes < old:
+            for process, connection in self.workers[processes:]:
+                connection.send(('stop', None))
+                connection.recv()  # processors of removed workers were all moved
+                process.join()
+            del self.workers[processes:]
+        self._resize(processes)
+        self._give(moved)
+        return len(moves)
+
+    def close(self) -> dict:
+        """
+        Stops workers, returns processors: {slot: processor}
+        """
+        self.flush()
+        if not self.workers:
+            processors, self.processors = self.processors, {}
+            return processors
+        for _, connection in self.workers:
+            connection.send(('stop', None))
+        processors = {}
+        for process, connection in self.workers:
+            processors.update(connection.recv())
+            process.join()
+        self.workers = []
+        return processors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.workers:
+            self.close()
@@ -0,0 +1,191 @@
+import typing
+
+from pytoniq_core import Cell, Slice
+
+from .defi import JettonBurn, TonstakersDeposit, TonstakersBurnPayload
+from .transaction import DecodedMessage, TransactionRecord
+
+############################################################
+# Tonstakers round flows
+############################################################
+
+# withdrawal kinds by burn payload
+WITHDRAWAL_INSTANT = 'instant'  # fill_or_kill: paid now or burn fails
+WITHDRAWAL_ROUND_END = 'round_end'  # wait_till_round_end: paid after round ends
+WITHDRAWAL_BEST_EFFORT = 'best_effort'  # paid now if pool has liquidity, else after round ends
+
+WITHDRAWAL_KINDS = (WITHDRAWAL_INSTANT, WITHDRAWAL_ROUND_END, WITHDRAWAL_BEST_EFFORT)
+
+# validation round of elector (validators_elected_for of config param 15 on mainnet)
+ROUND_DURATION = 65536
+
+
+def burn_payload(payload) -> typing.Optional[TonstakersBurnPayload]:
+    """
+    TonstakersBurnPayload from JettonBurn custom_payload, None if payload is not of its shape (2 bits, no refs)
+    """
+    if isinstance(payload, TonstakersBurnPayload):
+        return payload
+    if isinstance(payload, Slice):
+        bits, refs = payload.remaining_bits, payload.remaining_refs
+        if bits == 2 and not refs:
+            payload = payload.copy()
+    elif isinstance(payload, Cell):
+        bits, refs = len(payload.bits), len(payload.refs)
+        if bits == 2 and not refs:
+            payload = payload.begin_parse()
+    else:
+        return None
+    if bits != 2 or refs:
+        return None
+    return TonstakersBurnPayload.deserialize(payload)
+
+
+def withdrawal_kind(payload: TonstakersBurnPayload) -> str:
+    if payload.fill_or_kill:
+        return WITHDRAWAL_INSTANT
+    if payload.wait_till_round_end:
+        return WITHDRAWAL_ROUND_END
+    return WITHDRAWAL_BEST_EFFORT
+
+
+class TonstakersRound:
+    """
+    Running sums of one round: deposited TON (message values, pool fees included) and burned tsTON by withdrawal kind
+    """
+    __slots__ = ('round_id', 'deposits', 'deposit_count', 'withdrawals', 'withdrawal_counts')
+
+    def __init__(self, round_id: int):
+        self.round_id = round_id
+        self.deposits = 0
+        self.deposit_count = 0
+        self.withdrawals = dict.fromkeys(WITHDRAWAL_KINDS, 0)
+        self.withdrawal_counts = dict.fromkeys(WITHDRAWAL_KINDS, 0)
+
+    @property
+    def pending_withdrawals(self) -> int:
+        """
+        tsTON that may be paid out at round end: round_end and best_effort burns
+        """
+        return self.withdrawals[WITHDRAWAL_ROUND_END] + self.withdrawals[WITHDRAWAL_BEST_EFFORT]
+
+    def to_dict(self) -> dict:
+        return {
+            'round_id': self.round_id,
+            'deposits': self.deposits,
+            'deposit_count': self.deposit_count,
+            'withdrawals': dict(self.withdrawals),
+            'withdrawal_counts': dict(self.withdrawal_counts),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TonstakersRound":
+        result = cls(data['round_id'])
+        result.deposits = data['deposits']
+        result.deposit_count = data['deposit_count']
+        result.withdrawals.update(data['withdrawals'])
+        result.withdrawal_counts.update(data['withdrawal_counts'])
+        return result
+
+    def __repr__(self):
+        return (f'<TonstakersRound {self.round_id} deposits: {self.deposits} ({self.deposit_count}) '
+                f'withdrawals: {self.withdrawals}>')
+
+
+class TonstakersAggregator:
+    """
+    Per round totals of Tonstakers deposits (TonstakersDeposit to pool, amount is message value)
+    and withdrawals (JettonBurn of tsTON), O(1) per message.
+    Burn without custom_payload is the default best effort withdrawal, burns with payload of other shape
+    are not counted; only tsTON wallets' burns should be fed, as burns of other jettons look the same.
+    round_origin is start unixtime of any validation round, e.g. utime_since of config param 34
+    (see from_validator_set); round of message is (now - round_origin) // round_duration.
+    """
+    def __init__(self, round_origin: int, round_duration: int = ROUND_DURATION):
+        self.round_duration = round_duration
+        self.round_origin = round_origin
+        self.rounds = {}
+
+    @classmethod
+    def from_validator_set(cls, validator_set) -> "TonstakersAggregator":
+        """
+        Aggregator with rounds of elector validation: origin and duration from current validator set
+        (config param 34, e.g. ValidatorSet of pytoniq_core with utime_since and utime_until)
+        """
+        return cls(validator_set.utime_since, validator_set.utime_until - validator_set.utime_since)
+
+    def __len__(self):
+        return len(self.rounds)
+
+    def round_of(self, now: int) -> int:
+        return (now - self.round_origin) // self.round_duration
+
+    def get(self, round_id: int) -> TonstakersRound:
+        result = self.rounds.get(round_id)
+        if result is None:
+            result = self.rounds[round_id] = TonstakersRound(round_id)
+        return result
+
+    def add_deposit(self, now: int, amount: int):
+        result = self.get(self.round_of(now))
+        result.deposits += amount
+        result.deposit_count += 1
+
+    def add_withdrawal(self, now: int, amount: int, kind: str):
+        result = self.get(self.round_of(now))
+        result.withdrawals[kind] += amount
+        result.withdrawal_counts[kind] += 1
+
+    def process(self, body, now: int, value: typing.Optional[int] = None) -> typing.Optional[str]:
+        """
+        Counts decoded body, value is TON attached to deposit.
+        Returns 'deposit', withdrawal kind or None for bodies that are not Tonstakers flows
+        """
+        if isinstance(body, TonstakersDeposit):
+            if value is None:
+                raise ValueError("Deposit amount is message value, got None")
+            self.add_deposit(now, value)
+            return 'deposit'
+        if isinstance(body, JettonBurn):
+            if body.custom_payload is None:
+                kind = WITHDRAWAL_BEST_EFFORT
+            else:
+                payload = burn_payload(body.custom_payload)
+                if payload is None:
+                    return None
+                kind = withdrawal_kind(payload)
+            self.add_withdrawal(now, body.amount, kind)
+            return kind
+        return None
+
+    def apply_message(self, message: DecodedMessage, now: int) -> typing.Optional[str]:
+        if message.body is None or message.bounced:
+            return None
+        return self.process(message.body, now, message.value)
+
+    def apply_transaction(self, record: TransactionRecord) -> typing.Optional[str]:
+        """
+        Counts in_msg of transaction (deposit to pool or burn to tsTON wallet) in round of transaction time
+        """
+        if record.in_msg is None:
+            return None
+        return self.apply_message(record.in_msg, record.now)
+
+    def pending_withdrawals(self, round_id: int) -> int:
+        result = self.rounds.get(round_id)
+        return result.pending_withdrawals if result is not None else 0
+
+    def snapshot(self) -> typing.List[dict]:
+        """
+        Rounds as plain dicts ordered by round, ready for JSON, see restore
+        """
+        return [self.rounds[round_id].to_dict() for round_id in sorted(self.rounds)]
+
+    @classmethod
+    def restore(cls, data: typing.Iterable[dict], round_origin: int, round_duration: int = ROUND_DURATION
+                ) -> "TonstakersAggregator":
+        aggregator = cls(round_origin, round_duration)
+        for item in data:
+            result = TonstakersRound.from_dict(item)
+            aggregator.rounds[result.round_id] = result
+        return aggregator
@@ -0,0 +1,160 @@
+import typing
+
+from pytoniq_core import Cell, Slice, Address
+from pytoniq_core.tlb.transaction import Transaction, MessageAny, InternalMsgInfo, ExternalOutMsgInfo
+
+from .defi import deserialize_body, known_external_opcodes
+
+############################################################
+# Transaction level decoding
+############################################################
+"""
+transaction$0111 account_addr:bits256 lt:uint64
+  prev_trans_hash:bits256 prev_trans_lt:uint64 now:uint32
+  outmsg_cnt:uint15
+  orig_status:AccountStatus end_status:AccountStatus
+  ^[ in_msg:(Maybe ^(Message Any)) out_msgs:(HashmapE 15 ^(Message Any)) ]
+  total_fees:CurrencyCollection state_update:^(HASH_UPDATE Account)
+  description:^TransactionDescr = Transaction;
+
+message$_ {X:Type} info:CommonMsgInfo
+  init:(Maybe (Either StateInit ^StateInit))
+  body:(Either X ^X) = Message X;
+"""
+
+
+class DecodedMessage:
+    """
+    Message info fields needed to interpret body and body decoded with opcode registries.
+    body is None if body opcode is unknown or body is malformed, raw body is kept in body_cell.
+    """
+    __slots__ = ('src', 'dest', 'value', 'bounced', 'created_lt', 'op', 'body', 'body_cell')
+
+    def __init__(self, src, dest, value, bounced, created_lt, op, body, body_cell):
+        self.src = src
+        self.dest = dest
+        self.value = value
+        self.bounced = bounced
+        self.created_lt = created_lt
+        self.op = op
+        self.body = body
+        self.body_cell = body_cell
+
+    def __repr__(self):
+        return f'<DecodedMessage op: {self.op} src: {self.src} dest: {self.dest} value: {self.value} body: {self.body}>'
+
+
+class TransactionRecord:
+    """
+    Compact per-transaction result of decode_transaction
+    """
+    __slots__ = ('account', 'lt', 'now', 'hash', 'in_msg', 'out_msgs')
+
+    def __init__(self, account, lt, now, hash, in_msg, out_msgs):
+        self.account = account
+        self.lt = lt
+        self.now = now
+        self.hash = hash
+        self.in_msg = in_msg
+        self.out_msgs = out_msgs
+
+    def messages(self) -> typing.List[DecodedMessage]:
+        return ([self.in_msg] if self.in_msg is not None else []) + self.out_msgs
+
+    def __repr__(self):
+        return f'<TransactionRecord account: {self.account} lt: {self.lt} in_msg: {self.in_msg} out_msgs: {self.out_msgs}>'
+
+
+def decode_body(body: Cell, opcodes: typing.Optional[dict] = None) -> typing.Tuple[typing.Optional[int], typing.Any]:
+    """
+    Returns (op, decoded body), op is None for bodies shorter than 32 bits
+    """
+    body_slice = body.begin_parse()
+    if body_slice.remaining_bits < 32:
+        return None, None
+    op = body_slice.preload_uint(32)
+    try:
+        return op, deserialize_body(body_slice, opcodes)
+    except Exception:
+        # opcode collision with unknown contract or malformed body
+        return op, None
+
+
+def decode_message(message: typing.Union[MessageAny, Cell, Slice], opcodes: typing.Optional[dict] = None) -> DecodedMessage:
+    """
+    Decodes Message Any, body may be inline or in a ref.
+    External out bodies (pool events) are decoded with known_external_opcodes unless opcodes is given.
+    """
+    if isinstance(message, Cell):
+        message = message.begin_parse()
+    if isinstance(message, Slice):
+        message = MessageAny.deserialize(message)
+    info = message.info
+    if isinstance(info, InternalMsgInfo):
+        value, bounced, created_lt = info.value_coins, info.bounced, info.created_lt
+    elif isinstance(info, ExternalOutMsgInfo):
+        value, bounced, created_lt = None, False, info.created_lt
+        if opcodes is None:
+            opcodes = known_external_opcodes
+    else:
+        value, bounced, created_lt = None, False, None
+    op, body = decode_body(message.body, opcodes)
+    return DecodedMessage(info.src, info.dest, value, bounced, created_lt, op, body, message.body)
+
+
+def _load_out_msg(cell_slice: Slice) -> MessageAny:
+    return MessageAny.deserialize(cell_slice.load_ref().begin_parse())
+
+
+def decode_transaction(transaction: typing.Union[Transaction, Cell, bytes, str],
+                       workchain: int = 0,
+                       opcodes: typing.Optional[dict] = None
+                       ) -> TransactionRecord:
+    """
+    Decodes in_msg and out_msgs bodies of transaction.
+    Only transaction header and messages are parsed from cells, phases description is skipped.
+    """
+    if isinstance(transaction, Transaction):
+        in_msg = transaction.in_msg
+        out_msgs = transaction.out_msgs
+        account = Address((workchain, transaction.account_addr))
+        lt, now, tx_hash = transaction.lt, transaction.now, transaction.cell.hash
+    else:
+        if not isinstance(transaction, Cell):
+            transaction = Cell.one_from_boc(transaction)
+        tx_hash = transaction.hash
+        cell_slice = transaction.begin_parse()
+        tag = cell_slice.load_uint(4)
+        if tag != 0b0111:
+            raise ValueError(f"Not a Transaction, unknown tag: {tag}")
+        account = Address((workchain, cell_slice.load_bytes(32)))
+        lt = cell_slice.load_uint(64)
+        cell_slice.skip_bits(256 + 64)  # prev_trans_hash, prev_trans_lt
+        now = cell_slice.load_uint(32)
+        messages = cell_slice.load_ref().begin_parse()
+        in_msg = MessageAny.deserialize(messages.load_ref().begin_parse()) if messages.load_bit() else None
+        out_msgs = messages.load_dict(15, value_deserializer=_load_out_msg)
+        out_msgs = [out_msgs[i] for i in sorted(out_msgs)] if out_msgs else []
+    return TransactionRecord(account=account,
+                             lt=lt,
+                             now=now,
+                             hash=tx_hash,
+                             in_msg=decode_message(in_msg, opcodes) if in_msg is not None else None,
+                             out_msgs=[decode_message(m, opcodes) for m in out_msgs])
+
+
+def decode_transactions(transactions: typing.Iterable[typing.Union[Transaction, Cell, bytes, str]],
+                        workchain: int = 0,
+                        opcodes: typing.Optional[dict] = None
+                        ) -> typing.List[TransactionRecord]:
+    """
+    Batch version of decode_transaction, bytes items may be multi-root BoCs of several transactions
+    """
+    result = []
+    for transaction in transactions:
+        if isinstance(transaction, (bytes, str)):
+            for cell in Cell.from_boc(transaction):
+                result.append(decode_transaction(cell, workchain, opcodes))
+        else:
+            result.append(decode_transaction(transaction, workchain, opcodes))
+    return result
@@ -25,5 +25,11 @@ setuptools.setup(
     install_requires=[
         "pytoniq_core>=0.1.36",
         "setuptools>=65.5.1"
-    ]
+    ],
+    extras_require={
+        "numpy": ["numpy>=1.21"]
+    },
+    entry_points={
+        "console_scripts": ["pytoniq-defi-index=pytoniq_defi.indexer:main"]
+    }
 )
@@ -0,0 +1,74 @@
+import pytest
+from pytoniq_core import Address
+
+from pytoniq_defi import (ArbitrageGraph, ConstantProductPool, DedustAsset, DedustJettonPayloadSwap, DedustMessageSwap,
+                          PoolSync, StonfiV2MessageSwap, DEX_STONFI)
+
+TON = DedustAsset.native()
+A = DedustAsset.from_address(Address((0, bytes([1]) * 32)))
+B = DedustAsset.from_address(Address((0, bytes([2]) * 32)))
+POOLS = [Address((0, bytes([i]) * 32)) for i in range(10, 16)]
+USER = Address((0, bytes(32)))
+R = 10 ** 12
+
+
+def triangle(**kwargs) -> ArbitrageGraph:
+    graph = ArbitrageGraph(base_assets=[TON], **kwargs)
+    assert graph.add_pool(POOLS[0], ConstantProductPool(R, R, 30, (TON, A))) == 0
+    assert graph.add_pool(POOLS[1], ConstantProductPool(R, R, 30, (A, B))) == 0
+    assert graph.add_pool(POOLS[2], ConstantProductPool(R, R, 30, (B, TON))) == 1
+    return graph
+
+
+def test_reserve_update_finds_exactly_quoted_cycle():
+    graph = triangle()
+    assert graph.scan() == []
+    found = graph.apply(POOLS[0], PoolSync(R, 2 * R))  # A is cheap in TON/A pool
+    assert len(found) == 1
+    opportunity = found[0]
+    assert opportunity.assets[0] == opportunity.assets[-1] == TON
+    assert opportunity.pools == (POOLS[0], POOLS[1], POOLS[2]) and opportunity.profit > 0
+    amount = opportunity.amount_in
+    for pool, asset in zip(opportunity.pools, opportunity.assets):
+        amount = graph.pools[pool].copy().swap(amount, asset)
+    assert amount == opportunity.amount_out
+    # reverse direction is found too, and the cycle disappears when price is restored
+    assert graph.apply(POOLS[0], PoolSync(2 * R, R))[0].pools == (POOLS[2], POOLS[1], POOLS[0])
+    assert graph.apply(POOLS[0], PoolSync(R, R)) == []
+    assert graph.apply(POOLS[5], PoolSync(R, R)) == []  # unknown pool
+
+
+def test_update_checks_cycles_through_pool_only():
+    graph = triangle()
+    assert graph.add_pool(POOLS[3], ConstantProductPool(R, R, 30, (TON, A))) == 2  # 2 hops with POOLS[0], 3 hops
+    assert len(graph.cycles) == 3
+    assert len(graph.pool_cycles[POOLS[1]]) == 2 and len(graph.pool_cycles[POOLS[3]]) == 2
+    graph.remove_pool(POOLS[3])
+    assert len(graph.cycles) == 1 and POOLS[3] not in graph.pool_cycles
+    with pytest.raises(ValueError):
+        graph.add_pool(POOLS[0], ConstantProductPool(R, R, 30, (TON, A)))
+
+
+def test_min_profit_and_max_amount_in():
+    assert triangle(min_profit=10 ** 15).apply(POOLS[0], PoolSync(R, 2 * R)) == []
+    assert triangle(max_amount_in=1000).apply(POOLS[0], PoolSync(R, 2 * R))[0].amount_in == 1000
+
+
+def test_orders():
+    graph = triangle()
+    opportunity = graph.apply(POOLS[0], PoolSync(R, 2 * R))[0]
+    [order] = graph.orders(opportunity, USER, query_id=7, slippage_bps=100)
+    message = order.message
+    assert isinstance(message, DedustMessageSwap) and message.amount == opportunity.amount_in
+    step, limits = message.step, []
+    while step is not None:
+        limits.append(step.step_params.limit)
+        step = step.step_params.next
+    assert limits == [amount * 9900 // 10000 for amount in opportunity.amounts[1:]]
+
+    graph.add_pool(POOLS[4], ConstantProductPool(R, R, 30, (A, B)), DEX_STONFI, (POOLS[4], POOLS[5]))
+    graph.remove_pool(POOLS[1])
+    opportunity = graph.apply(POOLS[0], PoolSync(R, 2 * R))[0]
+    orders = graph.orders(opportunity, USER)
+    assert [type(order.message) for order in orders] == [DedustMessageSwap, StonfiV2MessageSwap, DedustJettonPayloadSwap]
+    assert orders[1].message.token_wallet1 == POOLS[5] and orders[1].amount_in == opportunity.amounts[1]
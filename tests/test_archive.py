@@ -0,0 +1,64 @@
+import os
+
+import pytest
+from pytoniq_core import Address
+from pytoniq_core.tlb.block import CurrencyCollection
+from pytoniq_core.tlb.transaction import InternalMsgInfo, MessageAny
+
+from pytoniq_defi import JettonComment, JettonExcesses, JettonTransfer
+from pytoniq_defi.archive import ArchiveReader, ArchiveWriter
+from pytoniq_defi.indexer import IndexerOptions, index_unit
+
+np = pytest.importorskip('numpy')
+
+SRC = Address((0, bytes(range(32))))
+DEST = Address((-1, bytes([7]) * 32))
+
+
+def transfer(i: int) -> JettonTransfer:
+    return JettonTransfer(i, 10 ** 9 * i, DEST, SRC if i % 2 else None, None, 1,
+                          JettonComment(f'{i}').serialize())
+
+
+def test_round_trip():
+    writer = ArchiveWriter(block_rows=3)
+    messages = [transfer(i) for i in range(1, 8)] + [JettonExcesses(5), JettonExcesses(2 ** 64 - 1)]
+    writer.extend(messages)
+    reader = ArchiveReader(writer.to_bytes())
+    assert len(reader) == len(messages)
+    assert [block.rows for block in reader.blocks_of(JettonTransfer)] == [3, 3, 1]
+    assert reader.column(JettonTransfer, 'query_id').tolist() == list(range(1, 8))
+    assert reader.column(JettonTransfer, 'amount').tolist() == [10 ** 9 * i for i in range(1, 8)]
+    assert reader.column(JettonExcesses, 'query_id').tolist() == [5, 2 ** 64 - 1]
+    assert reader.column(JettonExcesses, '@seq').tolist() == [7, 8]
+    ids = reader.column(JettonTransfer, 'response_destination')
+    assert [reader.address(i) for i in ids] == [SRC if i % 2 else None for i in range(1, 8)]
+    assert reader.address(reader.column(JettonTransfer, 'destination')[0]) == DEST
+
+
+def test_extra_columns():
+    writer = ArchiveWriter()
+    writer.add(JettonExcesses(1), {'@src': SRC, '@lt': 10})
+    writer.add(JettonExcesses(2), {'@src': DEST, '@lt': 12, '@now': 5})
+    writer.add(JettonExcesses(3))
+    block = ArchiveReader(writer.to_bytes()).blocks[0]
+    assert [block.reader.address(i) for i in block['@src']] == [SRC, DEST, None]
+    assert block['@lt'].tolist() == [10, 12, None]
+    assert block['@now'].tolist() == [None, 5, None]
+
+
+def test_indexer_archive_keeps_message_context(tmp_path):
+    bodies = [JettonExcesses(1), JettonExcesses(2)]
+    path = tmp_path / 'messages.boc'
+    with open(path, 'w') as f:
+        for i, body in enumerate(bodies):
+            info = InternalMsgInfo(True, False, False, SRC, DEST, CurrencyCollection(10, None), 0, 0, 100 + i, 0)
+            f.write(MessageAny(info, None, body.serialize()).serialize().to_boc().hex() + '\n')
+    output = tmp_path / 'out'
+    options = IndexerOptions(str(output), kind='message', output_format='archive')
+    stats = index_unit(('unit', str(path), 0, os.path.getsize(path)), options)
+    assert (stats.messages, stats.errors) == (2, 0)
+    reader = ArchiveReader.open(str(output / 'unit.pda'))
+    assert reader.column(JettonExcesses, '@created_lt').tolist() == [100, 101]
+    assert {reader.address(i) for i in reader.column(JettonExcesses, '@src')} == {SRC}
+    assert {reader.address(i) for i in reader.column(JettonExcesses, '@dest')} == {DEST}
@@ -0,0 +1,36 @@
+from pytoniq_core import Address, Cell
+
+from pytoniq_defi import (JettonComment, JettonExcesses, JettonTransfer, MessageBatchWriter, deserialize_batch,
+                          serialize_batch)
+
+WALLET = Address((0, bytes(range(32))))
+PAYLOAD = JettonComment('shared').serialize()
+
+
+def test_round_trip():
+    messages = [JettonTransfer(i, i * 10, WALLET, WALLET, None, 1, PAYLOAD) for i in range(5)] + [JettonExcesses(9)]
+    unknown = Cell.empty().to_builder().store_uint(0xdeadbeef, 32).end_cell()
+    writer = MessageBatchWriter().extend(messages)
+    assert writer.add(unknown) == 6
+    reader = deserialize_batch(writer.to_boc())
+    assert len(reader) == 7
+    assert [message.query_id for message in list(reader)[:6]] == [0, 1, 2, 3, 4, 9]
+    assert reader[3].amount == 30 and reader[3].destination == WALLET
+    assert reader[6] is reader.cell(6) and reader[6].hash == unknown.hash
+    assert [reader.cell(i).hash for i in range(6)] == [message.serialize().hash for message in messages]
+
+
+def test_shared_cells_are_stored_once():
+    messages = [JettonTransfer(i, 1, WALLET, WALLET, None, 1, PAYLOAD) for i in range(100)]
+    batch = serialize_batch(messages, has_idx=True)
+    cells_num = batch[6]  # size of 1 byte: 100 roots and one shared payload
+    assert cells_num == 101
+    assert len(batch) < sum(len(message.serialize().to_boc()) for message in messages)
+    assert [root.hash for root in Cell.from_boc(batch)] == [message.serialize().hash for message in messages]
+
+
+def test_reader_is_lazy():
+    reader = deserialize_batch(serialize_batch([JettonExcesses(i) for i in range(3)]))
+    assert reader._messages == [None] * 3
+    assert reader[1].query_id == 1
+    assert reader._messages[0] is None and reader._messages[2] is None
@@ -0,0 +1,54 @@
+import pytest
+from pytoniq_core import Address, Builder
+
+from pytoniq_defi import (DedustJettonPayloadSwap, DedustMessageSwap, DedustSwapParams, DedustSwapStep,
+                          DedustSwapStepParams, JettonBurn, JettonComment, JettonExcesses, JettonTransfer,
+                          JettonTransferNotification, StonfiMessageSwap, SwapKind)
+from pytoniq_defi.boc_writer import FAST_WRITERS, write_message
+
+A = Address((0, bytes(range(32))))
+B = Address((-1, bytes([9]) * 32))
+COMMENT = JettonComment('memo').serialize()
+SHARED = Builder().store_uint(7, 8).store_ref(COMMENT).end_cell()  # referenced from several cells
+
+
+def two_hops() -> DedustSwapStep:
+    last = DedustSwapStep(B, DedustSwapStepParams(SwapKind.given_out, 5, None))
+    return DedustSwapStep(A, DedustSwapStepParams(SwapKind.given_in, 10 ** 9, last))
+
+
+def messages() -> list:
+    params = DedustSwapParams(1700000000, A, B, SHARED, SHARED)
+    return [
+        JettonTransfer(1, 10 ** 9, A, B, None, 1, COMMENT),
+        JettonTransfer(2, 2 ** 120 - 1, B, None, SHARED, 0, SHARED),
+        JettonTransfer(3, 0, A, A, None, 0, None),
+        JettonExcesses(2 ** 64 - 1),
+        JettonBurn(4, 5, A, None),
+        JettonBurn(4, 5, None, COMMENT),
+        DedustMessageSwap(5, 6, two_hops(), params),
+        DedustMessageSwap(5, 6, DedustSwapStep(A, DedustSwapStepParams(SwapKind.given_in, 0, None)),
+                          DedustSwapParams(0, A, None, None, None)),
+        DedustJettonPayloadSwap(two_hops(), params),
+        StonfiMessageSwap(A, 7, B, None),
+        StonfiMessageSwap(A, 7, B, A),
+        JettonTransferNotification(8, 9, A, COMMENT),  # no fast writer
+    ]
+
+
+@pytest.mark.parametrize('has_idx', [False, True])
+@pytest.mark.parametrize('hash_crc32', [False, True])
+def test_written_boc_matches_serialize(has_idx, hash_crc32):
+    for message in messages():
+        cell = message.serialize()
+        assert write_message(message, has_idx, hash_crc32) == (cell.to_boc(has_idx=has_idx, hash_crc32=hash_crc32),
+                                                               cell.hash)
+        assert message.to_boc(has_idx, hash_crc32) == cell.to_boc(has_idx=has_idx, hash_crc32=hash_crc32)
+
+
+def test_fast_writers_cover_outgoing_messages():
+    assert set(type(message) for message in messages()) - set(FAST_WRITERS) == {JettonTransferNotification}
+    for message in messages():
+        writer = FAST_WRITERS.get(type(message))
+        if writer is not None:  # written directly, not through the serialize() fallback
+            assert writer(message).end().hash == message.serialize().hash
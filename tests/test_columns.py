@@ -0,0 +1,66 @@
+import pytest
+from pytoniq_core import Address, Cell
+
+from pytoniq_defi import (COINS_OVERFLOW, JettonBurn, JettonBurnNotification, JettonComment, JettonExcesses,
+                          JettonInternalTransfer, JettonTransfer, JettonTransferNotification, deserialize_body,
+                          extract_columns)
+from pytoniq_defi.columns import COLUMN_LAYOUTS
+
+np = pytest.importorskip('numpy')
+
+A = Address((0, bytes(range(32))))
+B = Address((-1, bytes([9]) * 32))
+PAYLOAD = JettonComment('memo').serialize()
+
+
+def bodies(cls, count: int) -> list:
+    result = []
+    for i in range(count):
+        amount = [0, 1, 10 ** 9 + i, 2 ** 64 - 1, 2 ** 100 + i][i % 5]
+        address = [A, B, None][i % 3]
+        if cls is JettonTransfer:
+            message = cls(i, amount, A, address, PAYLOAD if i % 2 else None, i * 7, PAYLOAD)
+        elif cls is JettonTransferNotification:
+            message = cls(i, amount, address, PAYLOAD)
+        elif cls is JettonInternalTransfer:
+            message = cls(i, amount, address, B, i * 7, PAYLOAD)
+        elif cls is JettonBurn:
+            message = cls(i, amount, address)
+        elif cls is JettonBurnNotification:
+            message = cls(i, amount, A, address)
+        else:
+            message = cls(2 ** 64 - 1 - i)
+        result.append(message.serialize())
+    return result
+
+
+@pytest.mark.parametrize('cls', list(COLUMN_LAYOUTS))
+def test_columns_match_generic_decoder(cls):
+    cells = bodies(cls, 12)
+    columns = extract_columns([cell.to_boc() for cell in cells[:6]] + cells[6:], cls)
+    assert len(columns) == 12 and columns.valid[:12].all()
+    for row, cell in enumerate(cells):
+        message = deserialize_body(cell.begin_parse())
+        for name, kind in COLUMN_LAYOUTS[cls]:
+            if name is None:
+                continue
+            expected = getattr(message, name)
+            if name in columns.overflow:
+                assert columns.coins(name, row) == expected
+            elif isinstance(expected, Address) or expected is None:
+                assert columns.address(name, row) == expected
+            else:
+                assert int(columns[name][row]) == expected
+
+
+def test_large_coins_overflow():
+    columns = extract_columns(bodies(JettonBurn, 5), JettonBurn)
+    assert columns['amount'][4] == COINS_OVERFLOW and columns.coins('amount', 4) == 2 ** 100 + 4
+    assert columns['amount'][3] == COINS_OVERFLOW and columns.coins('amount', 3) == 2 ** 64 - 1
+
+
+def test_rows_of_other_ops_or_truncated_bodies_are_not_valid():
+    truncated = Cell.empty().to_builder().store_uint(JettonBurn.op, 32).store_uint(1, 64).end_cell()
+    columns = extract_columns([truncated, JettonExcesses(1).serialize(), bodies(JettonBurn, 1)[0]], JettonBurn)
+    assert columns.valid[:3].tolist() == [False, False, True]
+    assert columns['query_id'].tolist() == [0, 0, 0]
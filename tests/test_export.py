@@ -0,0 +1,31 @@
+import json
+
+from pytoniq_core import Address
+
+from pytoniq_defi import (DedustAsset, JettonComment, JettonTransfer, StonfiV2MessagePayTo, TonstakersBurnPayload,
+                          to_dict)
+from pytoniq_defi.frozen import freeze
+
+MINTER = Address((0, bytes(range(32))))
+
+
+def test_dedust_asset_address_is_formatted():
+    asset = DedustAsset.from_address(MINTER)
+    for address_format in ('raw', 'bounceable', 'non_bounceable'):
+        expected = to_dict(JettonTransfer(destination=MINTER), address_format)['destination']
+        assert to_dict(asset, address_format)['address'] == expected
+    assert to_dict(DedustAsset(type=1, workchain_id=0, address=5), 'raw')['address'] == '0:' + '0' * 63 + '5'
+    assert to_dict(DedustAsset.native())['address'] is None
+    assert to_dict(freeze(asset)) == to_dict(asset)
+
+
+def test_amounts_as_str_only_for_amount_fields():
+    pay_to = StonfiV2MessagePayTo(2 ** 64 - 1, MINTER, MINTER, MINTER, 0xc64370e5, None, 1, 10 ** 20, MINTER, 0, MINTER)
+    row = to_dict(pay_to, amounts_as_str=True)
+    assert (row['query_id'], row['amount0_out'], row['amount1_out']) == (str(2 ** 64 - 1), str(10 ** 20), '0')
+    assert row['exit_code'] == 0xc64370e5
+    assert to_dict(TonstakersBurnPayload(fill_or_kill=1), amounts_as_str=True)['fill_or_kill'] == 1
+    transfer = to_dict(JettonTransfer(1, 5, MINTER, None, None, 2, JettonComment('x').serialize()), amounts_as_str=True)
+    assert (transfer['amount'], transfer['forward_ton_amount']) == ('5', '2')
+    assert json.loads(json.dumps(row)) == row
+    assert to_dict(pay_to)['amount0_out'] == 10 ** 20
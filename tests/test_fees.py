@@ -0,0 +1,57 @@
+from pytoniq_core import Address, Cell
+from pytoniq_core.tlb.config import MsgForwardPrices
+
+from pytoniq_defi import (JettonTransfer, JettonComment, ForwardFeeEstimator, cell_footprint, forward_fee,
+                          message_shape)
+
+# config param 25 (basechain)
+BASECHAIN = MsgForwardPrices(lump_price=400000, bit_price=26214400, cell_price=2621440000,
+                             ihr_price_factor=98304, first_frac=21845, next_frac=21845)
+WALLET = Address((0, bytes(range(32))))
+
+
+def transfer(amount: int) -> JettonTransfer:
+    return JettonTransfer(query_id=1, amount=amount, destination=WALLET, response_destination=WALLET,
+                          forward_ton_amount=1, forward_payload=JettonComment('x').serialize())
+
+
+def test_forward_fee_known_values():
+    assert forward_fee(BASECHAIN, 0, 0) == 400000
+    # 400 per bit, 40000 per cell
+    assert forward_fee(BASECHAIN, 1, 0) == 440000
+    assert forward_fee(BASECHAIN, 3, 1000) == 400000 + 3 * 40000 + 1000 * 400
+    # rounding up of fractional part
+    prices = MsgForwardPrices(0, 1, 0, 0, 0, 0)
+    assert forward_fee(prices, 0, 1) == 1
+    assert forward_fee(prices, 0, 65536) == 1
+    assert forward_fee(prices, 0, 65537) == 2
+
+
+def test_forward_fee_is_exact_for_large_prices():
+    prices = MsgForwardPrices(0, (1 << 64) - 1, (1 << 64) - 1, 0, 0, 0)
+    expected = -(-((1 << 64) - 1) * (1 << 20) // 65536)
+    assert forward_fee(prices, 1 << 19, 1 << 19) == expected
+
+
+def test_footprint_counts_equal_cells_once():
+    leaf = JettonComment('x').serialize()
+    root = Cell.empty().to_builder().store_ref(leaf).store_ref(leaf).end_cell()
+    footprint = cell_footprint(root)
+    assert (footprint.cells, footprint.bits, footprint.refs) == (2, len(leaf.bits), 2)
+
+
+def test_estimator_matches_serialized_message():
+    estimator = ForwardFeeEstimator(BASECHAIN)
+    for amount in (1, 1000, 10 ** 12):
+        footprint = cell_footprint(transfer(amount).serialize())
+        assert estimator.forward_fee(transfer(amount)) == forward_fee(BASECHAIN, footprint.cells, footprint.bits)
+
+
+def test_estimator_cache_evicts_least_recently_used():
+    estimator = ForwardFeeEstimator(BASECHAIN, cache_size=2)
+    small, middle, large = transfer(1), transfer(1 << 20), transfer(1 << 40)
+    estimator.footprint(small)
+    estimator.footprint(middle)
+    estimator.footprint(small)
+    estimator.footprint(large)
+    assert list(estimator._cache) == [message_shape(small), message_shape(large)]
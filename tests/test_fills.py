@@ -0,0 +1,58 @@
+from pytoniq_core import Address
+
+from pytoniq_defi import (JettonComment, JettonTransfer, StonfiV2FillTracker, StonfiV2MessagePayTo,
+                          StonfiV2MessageSwap)
+from pytoniq_defi.transaction import DecodedMessage, TransactionRecord
+
+USER = Address((0, bytes(32)))
+ROUTER = Address((0, bytes(range(32))))
+SWAP_OK = 0xc64370e5
+TX_EXPIRED = 0x1ec28412
+
+
+def message(body) -> DecodedMessage:
+    return DecodedMessage(USER, ROUTER, 10 ** 8, False, 1, body.op, body, None)
+
+
+def transaction(now: int, in_body=None, out_bodies=()) -> TransactionRecord:
+    return TransactionRecord(ROUTER, now, now, b'', message(in_body) if in_body is not None else None,
+                             [message(body) for body in out_bodies])
+
+
+def swap(query_id: int, deadline: int = 0) -> JettonTransfer:
+    payload = StonfiV2MessageSwap(USER, USER, USER, deadline, 5, USER).serialize()
+    return JettonTransfer(query_id, 100, ROUTER, USER, None, 1, payload)
+
+
+def pay_to(query_id: int, exit_code: int = SWAP_OK) -> StonfiV2MessagePayTo:
+    return StonfiV2MessagePayTo(query_id, USER, USER, USER, exit_code, None, 1, 7, USER, 0, None)
+
+
+def test_trace_messages_are_processed_once():
+    tracker = StonfiV2FillTracker()
+    fills = tracker.process_transaction(transaction(1000, swap(1), [JettonComment('x')]))
+    fills += tracker.process_transaction(transaction(1001, None, [pay_to(1)]))  # pool sends pay_to
+    fills += tracker.process_transaction(transaction(1002, pay_to(1)))  # router receives it
+    assert len(fills) == 1 and fills[0].filled and fills[0].amount_out == 7
+    assert not tracker.pending and not tracker.unmatched
+
+
+def test_expired_deadline_refund_is_joined():
+    tracker = StonfiV2FillTracker(max_age=3600, expire_interval=1, deadline_grace=600)
+    tracker.process_transaction(transaction(1000, swap(2, deadline=1010)))
+    tracker.process_transaction(transaction(1020, None))  # expire runs after deadline
+    fills = tracker.process_transaction(transaction(1030, pay_to(2, TX_EXPIRED)))
+    assert len(fills) == 1
+    assert fills[0].status == 'swap_refund_tx_expired' and not fills[0].filled
+    assert not tracker.unmatched
+
+
+def test_stale_entries_expire():
+    tracker = StonfiV2FillTracker(max_age=100, expire_interval=1, deadline_grace=10)
+    tracker.process_transaction(transaction(1000, swap(3, deadline=1005)))
+    tracker.process_transaction(transaction(1000, swap(4)))
+    tracker.process_transaction(transaction(1000, pay_to(5)))
+    tracker.process_transaction(transaction(1020, None))
+    assert set(tracker.pending) == {4} and set(tracker.unmatched) == {5}
+    tracker.process_transaction(transaction(1200, None))
+    assert not tracker.pending and not tracker.unmatched
@@ -0,0 +1,63 @@
+import pytest
+from pytoniq_core import Address, Builder, Cell, Slice
+
+from pytoniq_defi import (JettonComment, JettonExcesses, JettonTransfer, JettonTransferNotification, deserialize_body)
+from pytoniq_defi.flat import FLAT_DECODERS, boc_root_data, boc_root_hash, decode_boc, decode_flat
+
+A = Address((0, bytes(range(32))))
+B = Address((-1, bytes([9]) * 32))
+COMMENT = JettonComment('memo').serialize()
+
+
+def inline_notification() -> Cell:
+    # forward_payload stored in root cell (Either left)
+    return Builder().store_uint(JettonTransferNotification.op, 32).store_uint(3, 64).store_coins(5) \
+        .store_address(A).store_bit(0).store_uint(0, 32).store_bytes(b'inline').end_cell()
+
+
+def bodies() -> list:
+    return [
+        JettonTransfer(1, 10 ** 9, A, B, None, 1, COMMENT).serialize(),
+        JettonTransfer(2, 2 ** 100, B, None, COMMENT, 0, JettonComment('other').serialize()).serialize(),
+        JettonTransferNotification(3, 7, A, COMMENT).serialize(),
+        inline_notification(),
+        JettonExcesses(2 ** 64 - 1).serialize(),
+    ]
+
+
+def fields(message) -> dict:
+    result = {}
+    for key, value in message.__dict__.items():
+        if isinstance(value, Slice):
+            value = value.to_cell()
+        result[key] = value.hash if isinstance(value, Cell) else value
+    return result
+
+
+@pytest.mark.parametrize('has_idx', [False, True])
+@pytest.mark.parametrize('hash_crc32', [False, True])
+def test_flat_decoder_matches_generic_decoder(has_idx, hash_crc32):
+    for cell in bodies():
+        boc = cell.to_boc(has_idx=has_idx, hash_crc32=hash_crc32)
+        expected = deserialize_body(cell.begin_parse())
+        message = decode_flat(boc, verify_crc=True)
+        assert message is not None and type(message) is type(expected)
+        assert fields(message) == fields(expected)
+        assert message.serialize().hash == expected.serialize().hash
+        assert boc_root_hash(boc) == cell.hash
+        data, length = boc_root_data(boc)
+        assert length == len(cell.bits)
+        assert int.from_bytes(data, 'big') >> (8 * len(data) - length) == int(cell.bits.to01() or '0', 2)
+
+
+def test_other_shapes_fall_back_to_generic_path():
+    nested = Builder().store_uint(0, 32).store_ref(COMMENT).end_cell()  # payload with its own ref
+    transfer = JettonTransfer(1, 1, A, B, None, 1, nested).serialize()
+    assert decode_flat(transfer.to_boc()) is None
+    assert decode_boc(transfer.to_boc()).forward_payload.to_cell().hash == nested.hash
+    # address of unsupported kind in flat shape
+    var = Builder().store_uint(JettonExcesses.op, 32).end_cell()
+    assert decode_flat(var.to_boc()) is None  # truncated query_id
+    assert decode_flat(COMMENT.to_boc()) is None  # no flat decoder
+    assert decode_flat(bodies()[0].to_boc(), cls=JettonExcesses) is None
+    assert set(cls for cls, _ in FLAT_DECODERS.values()) == {JettonTransfer, JettonTransferNotification, JettonExcesses}
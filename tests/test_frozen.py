@@ -0,0 +1,46 @@
+from pytoniq_core import Address
+
+from pytoniq_defi import (DedustAsset, DedustPoolParams, DedustPoolType, JettonTransfer,
+                          freeze, thaw)
+
+A = Address((0, bytes(range(32))))
+
+
+def test_key_based_equality_is_kept():
+    asset = DedustAsset(type=1, workchain_id=0, address=5)
+    params = DedustPoolParams(DedustPoolType.volatile, DedustAsset.native(), asset)
+    for message in (asset, params, DedustAsset.native()):
+        frozen = freeze(message)
+        assert frozen == message and message == frozen
+        assert hash(freeze(message)) == hash(message)
+        assert frozen in {message} and message in {frozen}
+        assert thaw(frozen) == frozen
+
+
+def test_frozen_assets_as_dict_keys():
+    asset = DedustAsset(type=1, workchain_id=0, address=5)
+    balances = {asset: 1}
+    assert balances[freeze(asset)] == 1
+    pools = {DedustPoolParams(DedustPoolType.volatile, DedustAsset.native(), asset): A}
+    assert pools[freeze(DedustPoolParams(DedustPoolType.volatile, DedustAsset.native(), asset))] == A
+
+
+def test_messages_compare_by_representation_hash():
+    transfer = JettonTransfer(1, 10, A, A, None, 0, None)
+    frozen = freeze(transfer)
+    assert frozen == freeze(JettonTransfer(1, 10, A, A, None, 0, None))
+    assert frozen != freeze(JettonTransfer(2, 10, A, A, None, 0, None))
+    assert hash(frozen) == hash(freeze(JettonTransfer(1, 10, A, A, None, 0, None)))
+    assert len({frozen, freeze(transfer)}) == 1
+
+
+def test_frozen_asset_address_cache():
+    minter = Address((0, bytes(range(1, 33))))
+    frozen = freeze(DedustAsset(type=1, workchain_id=0, address=int.from_bytes(minter.hash_part, 'big')))
+    assert frozen.to_address() == minter
+    assert frozen.to_address() == minter  # cached
+    interned = DedustAsset.intern(frozen)
+    assert interned is frozen
+    assert DedustAsset.from_address(minter) is frozen
+    assert DedustAsset.from_address(minter).to_address() == minter
+    assert freeze(DedustAsset.native()).to_address() is None
@@ -0,0 +1,52 @@
+from pytoniq_core import Address
+
+from pytoniq_defi import InflightTracker, JettonExcesses, QueryIdAllocator, StonfiV2MessageSwap, message_deadline
+
+USER = Address((0, bytes(32)))
+
+
+def test_allocator_ids_are_unique_and_prefixed():
+    allocator = QueryIdAllocator(prefix=5, prefix_bits=8)
+    ids = [allocator() for _ in range(1000)]
+    assert len(set(ids)) == 1000
+    assert all(query_id >> 56 == 5 for query_id in ids)
+
+
+def test_entries_expire_at_deadline():
+    tracker = InflightTracker(resolution=1, wheel_size=16, now=1000)
+    tracker.track(1, 'a', deadline=1005)
+    tracker.track(2, 'b', deadline=1003)
+    tracker.track(3, 'c', deadline=1003)
+    tracker.track(4, 'd', deadline=990)  # already past
+    assert tracker.advance(1003) == [(4, 'd')]
+    assert tracker.match(3) == 'c' and tracker.match(3) is None
+    assert tracker.advance(1004) == [(2, 'b')]
+    assert tracker.advance(1005) == []
+    assert tracker.advance(1006) == [(1, 'a')]
+    assert len(tracker) == 0
+
+
+def test_deadlines_beyond_one_wheel_turn():
+    tracker = InflightTracker(resolution=1, wheel_size=8, now=0)
+    tracker.track(1, deadline=3)
+    tracker.track(2, deadline=3 + 8 * 3)  # same slot, three turns later
+    assert [query_id for query_id, _ in tracker.advance(10)] == [1]
+    assert 2 in tracker
+    assert tracker.advance(27) == []
+    assert [query_id for query_id, _ in tracker.advance(28)] == [2]
+
+
+def test_advance_after_long_pause_visits_every_slot():
+    tracker = InflightTracker(resolution=10, wheel_size=4, now=0)
+    for query_id in range(20):
+        tracker.track(query_id, deadline=query_id * 10)
+    assert sorted(query_id for query_id, _ in tracker.advance(10 ** 6)) == list(range(20))
+
+
+def test_message_deadline_and_match_message():
+    swap = StonfiV2MessageSwap(USER, USER, USER, 1234, 1, USER)
+    assert message_deadline(swap) == 1234
+    assert message_deadline(StonfiV2MessageSwap(USER, USER, USER, 0, 1, USER)) is None
+    tracker = InflightTracker(now=0)
+    tracker.track_message(JettonExcesses(7), deadline=100)
+    assert isinstance(tracker.match_message(JettonExcesses(7)), JettonExcesses)
@@ -0,0 +1,36 @@
+import pytest
+from pytoniq_core import Address, Builder
+from pytoniq_core.tlb.account import StateInit
+
+from pytoniq_defi import JettonWalletDeriver, JettonWalletLayout, get_jetton_wallet_address
+
+MINTER = Address((0, bytes(range(32))))
+OWNERS = [Address((0, bytes([i]) * 32)) for i in range(4)] + [Address((-1, bytes(range(32, 64))))]
+
+
+def wallet_code():
+    library = Builder().store_uint(0xabcdef, 24).end_cell()
+    return Builder().store_uint(0xff00f4a4, 32).store_ref(library).store_ref(library).end_cell()
+
+
+def state_init_address(owner: Address, layout: JettonWalletLayout, code, workchain: int = 0) -> Address:
+    state_init = StateInit(code=code, data=layout.data_cell(owner, MINTER, code))
+    return Address((workchain, state_init.serialize().hash))
+
+
+@pytest.mark.parametrize('layout', list(JettonWalletLayout))
+def test_derived_address_matches_state_init(layout):
+    code = wallet_code()
+    deriver = JettonWalletDeriver(MINTER, code, layout)
+    for owner in OWNERS:
+        expected = state_init_address(owner, layout, code)
+        assert deriver.get_address(owner) == expected
+        assert deriver.get_state_init(owner).serialize().hash == expected.hash_part
+    assert deriver.get_addresses(OWNERS) == [state_init_address(owner, layout, code) for owner in OWNERS]
+
+
+def test_workchain_and_string_arguments():
+    code = wallet_code()
+    owner = OWNERS[1]
+    address = get_jetton_wallet_address(MINTER.to_str(), owner.to_str(), code, workchain=-1)
+    assert address == state_init_address(owner, JettonWalletLayout.standard, code, -1)
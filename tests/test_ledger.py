@@ -0,0 +1,55 @@
+import pytest
+from pytoniq_core import Address
+
+from pytoniq_defi import (JettonBurn, JettonBurnNotification, JettonComment, JettonInternalTransfer, JettonLedger,
+                          JettonTransfer, WalletIndex)
+from pytoniq_defi.transaction import DecodedMessage
+
+pytest.importorskip('numpy')
+
+OWNER = Address((0, bytes(32)))
+WALLETS = [Address((0, bytes([i]) * 32)) for i in range(1, 40)]
+MINTER = Address((-1, bytes([7]) * 32))
+COMMENT = JettonComment('x').serialize()
+
+
+def incoming(wallet: Address, body, bounced: bool = False) -> DecodedMessage:
+    return DecodedMessage(OWNER, wallet, 10 ** 8, bounced, 1, body.op, body, None)
+
+
+def test_deltas_of_jetton_messages():
+    ledger = JettonLedger(capacity=4)
+    assert ledger.process(incoming(WALLETS[0], JettonInternalTransfer(1, 100, OWNER, None, 0, COMMENT)))
+    assert ledger.process(incoming(WALLETS[0], JettonTransfer(2, 30, OWNER, None, None, 0, COMMENT)))
+    assert ledger.process(incoming(WALLETS[0], JettonBurn(3, 20, OWNER)))
+    assert ledger.process(incoming(MINTER, JettonBurnNotification(4, 20, OWNER, OWNER)))
+    assert not ledger.process(incoming(WALLETS[1], JettonTransfer(5, 1, OWNER, None, None, 0, COMMENT), True))
+    assert not ledger.process(incoming(WALLETS[1], JettonComment('y')))
+    assert ledger.balance(WALLETS[0]) == 50 and ledger.balance(MINTER) == -20 and ledger.balance(WALLETS[1]) == 0
+    assert ledger.last_query_id(WALLETS[0]) == 3 and ledger.last_query_id(WALLETS[1]) is None
+    assert len(ledger) == 2
+
+
+def test_index_grows_and_keeps_ids():
+    index = WalletIndex(capacity=4)
+    ids = [index.intern(wallet) for wallet in WALLETS]
+    assert ids == list(range(len(WALLETS)))
+    assert [index.find(wallet) for wallet in WALLETS] == ids
+    assert [index.address(i) for i in ids] == WALLETS
+    assert index.find(OWNER) == -1
+
+
+def test_snapshot_restore(tmp_path):
+    ledger = JettonLedger()
+    for i, wallet in enumerate(WALLETS):
+        ledger.add(wallet, i - 10, query_id=i)
+    ledger.add(WALLETS[3], 2 ** 70)  # kept in overflow
+    path = str(tmp_path / 'ledger.bin')
+    ledger.snapshot(path)
+    restored = JettonLedger.restore(path)
+    assert dict(restored.items()) == dict(ledger.items())
+    assert restored.balance(WALLETS[3]) == 2 ** 70 - 7 and restored.last_query_id(WALLETS[5]) == 5
+    restored.add(OWNER, 1)  # restored ledger keeps growing, file is not changed
+    restored.add(WALLETS[3], -2 ** 70)
+    assert restored.balance(OWNER) == 1 and restored.balance(WALLETS[3]) == -7
+    assert dict(JettonLedger.restore(path).items()) == dict(ledger.items())
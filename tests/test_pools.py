@@ -0,0 +1,35 @@
+from pytoniq_core import Address
+
+from pytoniq_defi import DedustAsset, DedustPoolIndex, DedustPoolParams, DedustPoolType
+
+MINTER = Address((0, bytes(range(32))))
+
+
+def jetton(i: int) -> DedustAsset:
+    return DedustAsset(type=1, workchain_id=0, address=i)
+
+
+def test_lookup_ignores_asset_order_and_type_form():
+    index = DedustPoolIndex()
+    params = DedustPoolParams(DedustPoolType.volatile, DedustAsset.native(), jetton(1))
+    index[params] = 'ton/1'
+    index.add(DedustPoolParams(DedustPoolType.stable, DedustAsset.native(), jetton(1)), 'ton/1 stable')
+    assert index.get(0, jetton(1), DedustAsset(type=0)) == 'ton/1'
+    assert index.get(DedustPoolType.stable, jetton(1), DedustAsset.native()) == 'ton/1 stable'
+    assert index[DedustPoolParams(0, jetton(1), DedustAsset.native())] == 'ton/1'
+    assert index.get(0, jetton(2), DedustAsset.native(), 'missing') == 'missing'
+    assert DedustPoolParams(1, DedustAsset.native(), jetton(1)) in index and len(index) == 2
+    index.remove(DedustPoolParams(0, jetton(1), DedustAsset.native()))
+    assert len(index) == 1 and list(index.values()) == ['ton/1 stable']
+
+
+def test_assets_and_params_are_hashable_and_interned():
+    asset = DedustAsset.from_address(MINTER)
+    assert asset == DedustAsset(type=1, workchain_id=0, address=int.from_bytes(MINTER.hash_part, 'big'))
+    assert asset is DedustAsset.from_address(MINTER.to_str())
+    assert asset.to_address() == MINTER
+    assert DedustAsset.from_address(None) is DedustAsset.native()
+    params = DedustPoolParams.intern(DedustPoolParams(0, DedustAsset(type=0), jetton(3)))
+    assert params is DedustPoolParams.intern(DedustPoolParams(DedustPoolType.volatile, DedustAsset.native(), jetton(3)))
+    assert params.asset0 is DedustAsset.native()
+    assert len({params, DedustPoolParams(0, DedustAsset.native(), jetton(3))}) == 1
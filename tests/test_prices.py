@@ -0,0 +1,54 @@
+import pytest
+from pytoniq_core import Address
+
+from pytoniq_defi import (PriceAggregator, StonfiV2FillTracker, StonfiV2MessagePayTo, StonfiV2MessageSwap,
+                          JettonTransfer, ToncoV3Swap)
+
+pytest.importorskip('numpy')
+
+POOL = Address((0, bytes(range(32))))
+WALLET0 = Address((0, bytes([1]) * 32))
+WALLET1 = Address((0, bytes([2]) * 32))
+SWAP_OK = 0xc64370e5
+
+
+def test_volume_is_exact_above_float_precision():
+    prices = PriceAggregator(window=100, capacity=4)
+    amount = 2 ** 60 + 1
+    for timestamp in range(10):
+        prices.add('pool', timestamp, amount, 3)
+    volume = prices.volume('pool')
+    assert volume == (4 * amount, 12)  # capacity trades retained
+    assert all(isinstance(value, int) for value in volume)
+    assert prices.volume('pool', window=2) == (2 * amount, 6)
+    assert prices.volume('other') == (0, 0)
+
+
+def test_prices():
+    prices = PriceAggregator(window=10)
+    prices.add('pool', 0, 100, 200)
+    prices.add('pool', 5, 100, 400)
+    assert prices.last_price('pool') == 4
+    assert prices.vwap('pool', window=10, now=5) == 3
+    assert prices.twap('pool', window=5, now=5) == 2
+    assert prices.twap('pool', window=5, now=10) == 4
+
+
+def test_stonfi_fill_is_added():
+    tracker = StonfiV2FillTracker()
+    payload = StonfiV2MessageSwap(WALLET1, POOL, POOL, 0, 5, POOL).serialize()
+    tracker.process(JettonTransfer(1, 100, POOL, POOL, None, 1, payload))
+    fill = tracker.process(StonfiV2MessagePayTo(1, POOL, POOL, POOL, SWAP_OK, None, 1, 0, WALLET0, 250, WALLET1))
+    assert fill.amount_in == 100
+    prices = PriceAggregator()
+    assert prices.add_stonfi_fill(POOL, fill, 10)
+    assert prices.last_price((POOL, WALLET0)) == 2.5
+    refund = tracker.add_swap(2, StonfiV2MessageSwap(), amount_in=100) or tracker.add_pay_to(
+        StonfiV2MessagePayTo(2, POOL, POOL, POOL, 0x39603190, None, 1, 100, WALLET0, 0, WALLET1))
+    assert not prices.add_stonfi_fill(POOL, refund, 11)
+
+
+def test_tonco_swap_is_added():
+    prices = PriceAggregator()
+    prices.add_tonco_swap(POOL, ToncoV3Swap(1, POOL, WALLET1, amount_in=50), 10, 3)
+    assert prices.volume((POOL, WALLET1)) == (50, 10)
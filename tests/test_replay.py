@@ -0,0 +1,64 @@
+from pytoniq_core import Address
+
+from pytoniq_defi import (ConcentratedLiquidityPool, ConstantProductPool, DedustAsset, DedustEventSwap, JettonTransfer,
+                          PoolTrade, ReplayEngine, StonfiV2MessagePayTo, StonfiV2MessageSwap, ToncoV3Swap, events_from_transactions,
+                          replay_sharded)
+from pytoniq_defi.transaction import DecodedMessage, TransactionRecord
+
+USER = Address((0, bytes(32)))
+ROUTER = Address((0, bytes([1]) * 32))
+POOL = Address((0, bytes([2]) * 32))
+WALLET0 = Address((0, bytes([3]) * 32))
+WALLET1 = Address((0, bytes([4]) * 32))
+SWAP_OK = 0xc64370e5
+
+
+def transaction(account: Address, lt: int, src: Address, body) -> TransactionRecord:
+    return TransactionRecord(account, lt, lt, b'', DecodedMessage(src, account, 10 ** 8, False, lt, getattr(body, 'op', None), body, None), [])
+
+
+def test_stonfi_and_tonco_messages_update_models():
+    stonfi = ConstantProductPool(10 ** 6, 2 * 10 ** 6, 30, (WALLET0, WALLET1))
+    tonco = ConcentratedLiquidityPool.from_price(1.0, 10 ** 9, 30, (WALLET0, WALLET1))
+    tonco_pool = Address((0, bytes([5]) * 32))
+    expected_stonfi, expected_tonco = stonfi.copy(), tonco.copy()
+    expected_stonfi.swap(1000, WALLET0)
+    expected_tonco.swap(500, WALLET1)
+    payload = StonfiV2MessageSwap(WALLET1, USER, USER, 0, 1, USER).serialize()
+    records = [
+        transaction(USER, 1, USER, JettonTransfer(7, 1000, ROUTER, USER, None, 1, payload)),
+        transaction(ROUTER, 2, POOL, StonfiV2MessagePayTo(7, USER, USER, USER, SWAP_OK, None, 1, 0, WALLET0, 1990, WALLET1)),
+        transaction(tonco_pool, 3, ROUTER, ToncoV3Swap(8, USER, WALLET1, amount_in=500)),
+    ]
+    events = list(events_from_transactions(records))
+    assert [(lt, pool) for lt, pool, body in events] == [(2, POOL), (3, tonco_pool)]
+    engine = ReplayEngine({POOL: stonfi, tonco_pool: tonco})
+    result = engine.run(events)
+    assert result.applied == 2
+    assert (stonfi.reserve0, stonfi.reserve1) == (expected_stonfi.reserve0, expected_stonfi.reserve1)
+    assert tonco.sqrt_price_x96 == expected_tonco.sqrt_price_x96
+
+
+def _events(pools, count):
+    for i in range(count):
+        pool = pools[i % len(pools)]
+        yield i, pool, PoolTrade(1000 + i, 'a' if i % 3 else 'b')
+
+
+def test_sharded_replay_streams_and_matches_single_process():
+    pools = [Address((0, bytes([i]) * 32)) for i in range(6)]
+    models = lambda: {pool: ConstantProductPool(10 ** 9, 10 ** 9, 30, ('a', 'b')) for pool in pools}
+    single = ReplayEngine(models()).run(_events(pools, 500))
+    sharded = replay_sharded(_events(pools, 500), models(), processes=3, batch_size=7, queue_size=2)
+    assert (sharded.events, sharded.applied) == (single.events, single.applied) == (500, 500)
+    assert replay_sharded(_events(pools, 10), models(), processes=1).applied == 10
+
+
+def test_sharded_replay_of_dedust_events():
+    pools = [Address((0, bytes([i]) * 32)) for i in range(4)]
+    native, jetton = DedustAsset.native(), DedustAsset.from_address(WALLET0)
+    models = lambda: {pool: ConstantProductPool(10, 10, 30, (native, jetton)) for pool in pools}
+    events = [(i, pools[i % 4], DedustEventSwap(native, jetton, 1, 1, USER, None, 100 + i, 200 + i)) for i in range(40)]
+    single = ReplayEngine(models()).run(events)
+    sharded = replay_sharded(iter(events), models(), processes=2, batch_size=3)
+    assert (sharded.events, sharded.applied) == (single.events, single.applied) == (40, 40)
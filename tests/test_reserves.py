@@ -0,0 +1,27 @@
+from pytoniq_core import Address
+
+from pytoniq_defi import DedustAsset, DedustEventSwap, DedustReserveTracker
+
+POOL = Address((0, bytes(range(32))))
+
+
+def swap_event(reserve0: int, reserve1: int) -> DedustEventSwap:
+    return DedustEventSwap(DedustAsset.native(), DedustAsset(type=1, workchain_id=0, address=5),
+                           10, 20, POOL, None, reserve0, reserve1)
+
+
+def test_stale_event_is_skipped():
+    tracker = DedustReserveTracker()
+    assert tracker.apply(POOL, swap_event(100, 200), lt=10)
+    assert not tracker.apply(POOL, swap_event(1, 2), lt=10)
+    assert (tracker[POOL].reserve0, tracker[POOL].reserve1, tracker[POOL].lt) == (100, 200, 10)
+
+
+def test_unknown_lt_keeps_stored_lt():
+    tracker = DedustReserveTracker()
+    tracker.apply(POOL, swap_event(100, 200), lt=10)
+    assert tracker.apply(POOL, swap_event(110, 190))
+    assert (tracker[POOL].reserve0, tracker[POOL].reserve1, tracker[POOL].lt) == (110, 190, 10)
+    # replay from before lt 10 is still skipped
+    assert not tracker.apply(POOL, swap_event(1, 2), lt=5)
+    assert tracker[POOL].reserve0 == 110
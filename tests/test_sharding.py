@@ -0,0 +1,78 @@
+import pickle
+import random
+
+from pytoniq_core import Address
+
+from pytoniq_defi import (JettonComment, JettonInternalTransfer, JettonTransfer, JettonLedger, Partitioner, ShardedProcessor,
+                          partition_address, PARTITION_FIELDS)
+from pytoniq_defi.defi import _dumps_state
+from pytoniq_defi.transaction import DecodedMessage, TransactionRecord
+
+OWNERS = [Address((0, bytes([i]) * 32)) for i in range(1, 9)]
+WALLETS = [Address((0, bytes([i]) * 32)) for i in range(100, 132)]
+COMMENT = JettonComment('x').serialize()
+
+
+def incoming(wallet: Address, body) -> DecodedMessage:
+    return DecodedMessage(OWNERS[0], wallet, 10 ** 8, False, 1, body.op, body, None)
+
+
+def transaction(wallet: Address, body, lt: int) -> TransactionRecord:
+    return TransactionRecord(wallet, lt, 1700000000, b'', incoming(wallet, body), [])
+
+
+def stream(count: int = 2000) -> list:
+    rnd = random.Random(1)
+    result = []
+    for i in range(count):
+        wallet = rnd.choice(WALLETS)
+        if rnd.random() < 0.6:
+            body = JettonInternalTransfer(i, rnd.randrange(1, 10 ** 6), rnd.choice(OWNERS), None, 0, COMMENT)
+        else:
+            body = JettonTransfer(i, rnd.randrange(1, 10 ** 5), rnd.choice(OWNERS), None, None, 0, COMMENT)
+        result.append(transaction(wallet, body, i + 1) if i % 2 else incoming(wallet, body))
+    return result
+
+
+def test_transaction_is_partitioned_by_account():
+    record = transaction(WALLETS[3], JettonTransfer(1, 1, OWNERS[1], None, None, 0, COMMENT), 1)
+    assert partition_address(record) == WALLETS[3]
+    partitioner = Partitioner(4)
+    slots = {partitioner.slot(transaction(wallet, JettonTransfer(1, 1, OWNERS[1], None, None, 0, COMMENT), 1))
+             for wallet in WALLETS}
+    assert len(slots) > 1
+
+
+def test_ledger_partitions_messages_by_receiving_wallet():
+    message = incoming(WALLETS[0], JettonTransfer(1, 1, OWNERS[1], None, None, 0, COMMENT))
+    assert partition_address(message) == OWNERS[1]  # module default: body field
+    assert partition_address(message, JettonLedger.PARTITION_FIELDS) == WALLETS[0]
+    with ShardedProcessor(JettonLedger, processes=1) as sharded:
+        assert sharded.partitioner.fields is JettonLedger.PARTITION_FIELDS
+
+
+def test_sharded_ledger_matches_single_ledger():
+    messages = stream()
+    single = JettonLedger()
+    for message in messages:
+        single.process(message)
+    for processes in (1, 3):
+        sharded = ShardedProcessor(JettonLedger, processes=processes, slots=16, batch_size=64)
+        sharded.run(messages)
+        processors = sharded.close()
+        balances = {}
+        for ledger in processors.values():
+            for wallet, balance in ledger.items():
+                assert wallet not in balances  # every wallet lives in one slot
+                balances[wallet] = balance
+        assert balances == dict(single.items())
+    assert PARTITION_FIELDS[JettonTransfer] == ('destination',)
+
+
+def test_batches_are_pickled_as_objects():
+    messages = stream(10)
+    loaded = pickle.loads(_dumps_state(messages))
+    for message, copy in zip(messages, loaded):
+        body = message.in_msg.body if isinstance(message, TransactionRecord) else message.body
+        copied = copy.in_msg.body if isinstance(copy, TransactionRecord) else copy.body
+        assert '_wire' not in copied.__dict__ and copied.amount == body.amount and copied.query_id == body.query_id
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from pytoniq_core import Address
+
+from pytoniq_defi import (JettonBurn, JettonComment, TonstakersAggregator, TonstakersBurnPayload, TonstakersDeposit,
+                          WITHDRAWAL_BEST_EFFORT, WITHDRAWAL_INSTANT, WITHDRAWAL_ROUND_END)
+
+USER = Address((0, bytes(32)))
+ORIGIN = 1_700_000_000
+
+
+def burn(amount: int, payload=None) -> JettonBurn:
+    return JettonBurn(1, amount, USER, payload)
+
+
+def test_burn_without_payload_is_best_effort_withdrawal():
+    aggregator = TonstakersAggregator(ORIGIN)
+    assert aggregator.process(burn(5), ORIGIN) == WITHDRAWAL_BEST_EFFORT
+    assert aggregator.process(burn(7, TonstakersBurnPayload(fill_or_kill=True).serialize()), ORIGIN) == WITHDRAWAL_INSTANT
+    assert aggregator.process(burn(11, TonstakersBurnPayload(wait_till_round_end=True).serialize()), ORIGIN) == WITHDRAWAL_ROUND_END
+    assert aggregator.process(burn(13, JettonComment('x').serialize()), ORIGIN) is None
+    assert aggregator.rounds[0].withdrawals == {WITHDRAWAL_INSTANT: 7, WITHDRAWAL_ROUND_END: 11, WITHDRAWAL_BEST_EFFORT: 5}
+    assert aggregator.pending_withdrawals(0) == 16
+
+
+def test_rounds_are_counted_from_origin():
+    aggregator = TonstakersAggregator.from_validator_set(SimpleNamespace(utime_since=ORIGIN, utime_until=ORIGIN + 100))
+    aggregator.process(TonstakersDeposit(), ORIGIN - 1, 10)
+    aggregator.process(TonstakersDeposit(), ORIGIN + 99, 20)
+    aggregator.process(TonstakersDeposit(), ORIGIN + 100, 30)
+    assert {round_id: result.deposits for round_id, result in aggregator.rounds.items()} == {-1: 10, 0: 20, 1: 30}
+    restored = TonstakersAggregator.restore(aggregator.snapshot(), ORIGIN, 100)
+    assert restored.snapshot() == aggregator.snapshot()